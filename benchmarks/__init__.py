@@ -0,0 +1,2 @@
+# Benchmarks for InvoiceMint's storage layer (run from the project root,
+# e.g. `python -m benchmarks.bench_codec`).
@@ -0,0 +1,133 @@
+# benchmarks/bench_codec.py
+"""
+Compare JSON codecs and on-disk layouts for the files InvoiceMint writes.
+
+    python -m benchmarks.bench_codec                 # table
+    python -m benchmarks.bench_codec --json          # machine-readable
+    python -m benchmarks.bench_codec --clients 1000 10000 --items 1000
+
+For each synthetic file (clients lists and large drafts) every available
+codec/layout is timed for encode, decode and a save/load round trip
+through a temporary file.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import make_clients, make_draft
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _codecs():
+    codecs = {
+        "json-indent": (
+            lambda o: json.dumps(o, indent=2).encode("utf-8"),
+            json.loads,
+        ),
+        "json-compact": (
+            lambda o: json.dumps(o, separators=(",", ":")).encode("utf-8"),
+            json.loads,
+        ),
+    }
+    if orjson is not None:
+        codecs["orjson-indent"] = (
+            lambda o: orjson.dumps(o, option=orjson.OPT_INDENT_2),
+            orjson.loads,
+        )
+        codecs["orjson-compact"] = (orjson.dumps, orjson.loads)
+    return codecs
+
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _datasets(client_sizes, item_sizes):
+    for n in client_sizes:
+        yield f"clients-{n}", make_clients(n)
+    rng = random.Random(7)
+    for n in item_sizes:
+        yield f"draft-{n}-items", make_draft(n, rng)
+
+
+def run(client_sizes, item_sizes, repeat: int = 3) -> list[dict]:
+    results = []
+    with tempfile.TemporaryDirectory(prefix="invoicemint-bench-") as tmp:
+        path = os.path.join(tmp, "data.json")
+        for label, data in _datasets(client_sizes, item_sizes):
+            for codec_name, (encode, decode) in _codecs().items():
+                payload = encode(data)
+
+                def save():
+                    with open(path, "wb") as f:
+                        f.write(encode(data))
+
+                def load():
+                    with open(path, "rb") as f:
+                        decode(f.read())
+
+                t_enc = _best(lambda: encode(data), repeat)
+                t_dec = _best(lambda: decode(payload), repeat)
+                t_save = _best(save, repeat)
+                t_load = _best(load, repeat)
+                mb = len(payload) / 1e6
+                results.append({
+                    "dataset": label,
+                    "codec": codec_name,
+                    "bytes": len(payload),
+                    "encode_s": t_enc,
+                    "decode_s": t_dec,
+                    "save_s": t_save,
+                    "load_s": t_load,
+                    "save_mb_s": mb / t_save if t_save else None,
+                    "load_mb_s": mb / t_load if t_load else None,
+                })
+    return results
+
+
+def _print_table(results):
+    header = f"{'dataset':<20} {'codec':<15} {'size':>10} {'encode':>9} {'decode':>9} {'save':>9} {'load':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['dataset']:<20} {r['codec']:<15} {r['bytes'] / 1024:>8.0f}KB"
+            f" {r['encode_s'] * 1e3:>7.1f}ms {r['decode_s'] * 1e3:>7.1f}ms"
+            f" {r['save_s'] * 1e3:>7.1f}ms {r['load_s'] * 1e3:>7.1f}ms"
+        )
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--clients", type=int, nargs="*", default=[1_000, 10_000, 100_000],
+                    help="client-list sizes to generate")
+    ap.add_argument("--items", type=int, nargs="*", default=[1_000, 10_000],
+                    help="line-item counts for large drafts")
+    ap.add_argument("--repeat", type=int, default=3, help="runs per measurement (best is kept)")
+    ap.add_argument("--json", action="store_true", help="print results as JSON")
+    args = ap.parse_args(argv)
+
+    results = run(args.clients, args.items, args.repeat)
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        _print_table(results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
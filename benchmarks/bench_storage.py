@@ -0,0 +1,325 @@
+# benchmarks/bench_storage.py
+"""
+Time the storage API on synthetic corpora, optionally against a baseline.
+
+    python -m benchmarks.bench_storage                          # 1k/10k/100k drafts
+    python -m benchmarks.bench_storage --drafts 1000 --clients 10000 --out now.json
+    python -m benchmarks.bench_storage --baseline before.json   # compare, flag regressions
+
+Every corpus runs in a fresh child process whose HOME is a scratch
+directory, so the real ~/.invoicemint is never touched and no cache
+survives from one corpus to the next. The child writes the drafts
+straight into the sharded layout (timestamps spread over six years) and
+then times the public functions in invoicemint.services.storage:
+list_drafts, get_recent_documents, load_draft, save_draft, rename_draft,
+load_clients/save_clients, settings round trips, search and rollups.
+
+Results are JSON: {"meta": {...}, "results": [{"corpus", "backend", "op",
+"seconds", "n", "repeat"}, ...]}, where seconds is the median time of one
+operation (n operations per run, repeat runs). Operations ending in
+".cold" run once, first thing in the process.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.synthetic import make_clients, make_draft
+
+DEFAULT_THRESHOLD = 0.10   # slower than baseline by more than this = regression
+_SPAN_SECONDS = 6 * 365 * 86400
+
+
+# ---------- child: one corpus ----------
+def _timed(results, op, fn, n: int = 1, repeat: int = 1):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) / n)
+    results.append({"op": op, "seconds": statistics.median(samples), "n": n, "repeat": repeat})
+
+
+def _write_corpus(storage, drafts: int, clients: int, seed: int) -> list[str]:
+    """Write drafts straight to disk (like a long-lived install) and the client book."""
+    rng = random.Random(seed)
+    now = time.time()
+    names = []
+    for i in range(drafts):
+        name = f"invoice-{i:06d}.json"
+        path = storage._layout.locate(name)
+        path.write_bytes(storage._encode_json(make_draft(rng.randint(1, 12), rng, 1000 + i)))
+        mtime = now - rng.random() * _SPAN_SECONDS
+        os.utime(path, (mtime, mtime))
+        names.append(name)
+    if clients:
+        storage.save_clients(make_clients(clients, seed))
+        storage.flush_pending_writes()
+    return names
+
+
+def run_corpus(drafts: int, clients: int, backend: str = "json", repeat: int = 3,
+               sample: int = 200, seed: int = 1) -> list[dict]:
+    """Time the storage API on one corpus. Call only with HOME set to a scratch directory."""
+    from invoicemint.services import storage
+
+    results: list[dict] = []
+    names = _write_corpus(storage, drafts, clients, seed)
+    if backend == "sqlite":
+        settings = storage.load_settings()
+        settings["storage"] = {**(settings.get("storage") or {}), "backend": "sqlite"}
+        storage.save_settings(settings)
+        storage.flush_pending_writes()
+        _timed(results, "sqlite_import.cold", lambda: storage._sqlite_store())
+
+    rng = random.Random(seed + 1)
+    picked = rng.sample(names, min(sample, len(names)))
+
+    # listings
+    _timed(results, "list_drafts.cold", lambda: storage.list_drafts())
+    _timed(results, "list_drafts", lambda: storage.list_drafts(), repeat=repeat)
+    _timed(results, "list_drafts.rescan", lambda: storage.list_drafts(rescan=True), repeat=repeat)
+    _timed(results, "get_recent_documents", lambda: storage.get_recent_documents(10),
+           repeat=repeat)
+
+    # documents
+    def load_all():
+        for name in picked:
+            storage.load_draft(name)
+
+    _timed(results, "load_draft", load_all, n=len(picked), repeat=repeat)
+
+    edits = iter(range(1, 1 << 30))
+
+    def save_edits():
+        k = next(edits)
+        for name in picked:
+            data = storage.load_draft(name)
+            data["notes"] = f"Edited {k}"
+            storage.save_draft(data, name)
+        storage.flush_pending_writes()
+
+    _timed(results, "save_draft.edit", save_edits, n=len(picked), repeat=repeat)
+
+    fresh = random.Random(seed + 2)
+
+    def save_new():
+        k = next(edits)
+        for i in range(len(picked)):
+            storage.save_draft(make_draft(fresh.randint(1, 12), fresh), f"new-{k}-{i}")
+        storage.flush_pending_writes()
+
+    _timed(results, "save_draft.new", save_new, n=len(picked), repeat=repeat)
+
+    current = list(picked)
+
+    def rename_all():
+        k = next(edits)
+        for i, name in enumerate(current):
+            new = f"renamed-{k}-{i}.json"
+            if storage.rename_draft(name, new) is not None:
+                current[i] = new
+
+    _timed(results, "rename_draft", rename_all, n=len(picked), repeat=repeat)
+
+    # search index and report rollups (first use builds them)
+    _timed(results, "search_documents.cold", lambda: storage.search_documents("server migration"))
+    _timed(results, "search_documents", lambda: storage.search_documents("hopper"), repeat=repeat)
+    _timed(results, "report_rollups.cold", lambda: storage.get_report_rollups())
+    _timed(results, "report_rollups.overdue", lambda: storage.get_report_rollups().overdue(),
+           repeat=repeat)
+
+    # clients
+    if clients:
+        _timed(results, "load_clients", lambda: storage.load_clients(), repeat=repeat)
+        book = storage.load_clients()
+
+        def save_book():
+            storage.save_clients(book)
+            storage.flush_pending_writes()
+
+        _timed(results, "save_clients", save_book, repeat=repeat)
+
+        def add_some():
+            for c in make_clients(len(picked), next(edits)):
+                storage.add_client(c)
+            storage.flush_pending_writes()
+
+        _timed(results, "add_client", add_some, n=len(picked), repeat=repeat)
+
+    # settings
+    def settings_round_trip():
+        settings = storage.load_settings()
+        settings["theme"] = "dark" if settings.get("theme") == "light" else "light"
+        storage.save_settings(settings)
+        storage.flush_pending_writes()
+
+    _timed(results, "settings.round_trip", settings_round_trip, repeat=repeat)
+    _timed(results, "get_settings", lambda: storage.get_settings(), repeat=repeat)
+    return results
+
+
+def _child(spec: dict) -> int:
+    results = run_corpus(spec["drafts"], spec["clients"], spec["backend"],
+                         spec["repeat"], spec["sample"], spec["seed"])
+    json.dump(results, sys.stdout)
+    return 0
+
+
+# ---------- parent ----------
+def _spawn(spec: dict) -> list[dict]:
+    with tempfile.TemporaryDirectory(prefix="invoicemint-bench-") as home:
+        env = {**os.environ, "HOME": home, "USERPROFILE": home}
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_storage", "--child", json.dumps(spec)],
+            env=env, capture_output=True, text=True,
+        )
+    if proc.returncode != 0:
+        raise RuntimeError(f"benchmark run {spec} failed:\n{proc.stderr}")
+    return json.loads(proc.stdout)
+
+
+def run(draft_sizes, clients: int, backends, repeat: int = 3, sample: int = 200,
+        seed: int = 1, progress=None) -> dict:
+    results = []
+    for backend in backends:
+        for n in draft_sizes:
+            spec = {"drafts": n, "clients": clients, "backend": backend,
+                    "repeat": repeat, "sample": sample, "seed": seed}
+            if progress is not None:
+                progress(f"{backend}: {n:,} drafts, {clients:,} clients")
+            for r in _spawn(spec):
+                results.append({"corpus": f"drafts-{n}", "backend": backend, **r})
+    return {"meta": _meta(), "results": results}
+
+
+def _meta() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, cwd=os.path.dirname(__file__)).stdout.strip()
+    except OSError:
+        commit = ""
+    try:
+        import orjson  # noqa: F401
+        codec = "orjson"
+    except ImportError:
+        codec = "json"
+    return {
+        "at": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "codec": codec,
+    }
+
+
+# ---------- comparison ----------
+def _key(r: dict) -> tuple:
+    return (r["corpus"], r["backend"], r["op"])
+
+
+def compare(current: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> list[dict]:
+    """
+    Pair each current result with the baseline's. ratio = current / baseline
+    seconds; status is "slower" / "faster" beyond threshold, else "same"
+    ("new" when the baseline has no such measurement).
+    """
+    base = {_key(r): r for r in baseline.get("results", ())}
+    rows = []
+    for r in current["results"]:
+        b = base.get(_key(r))
+        row = {**r, "baseline_seconds": b["seconds"] if b else None, "ratio": None}
+        if b is None or not b["seconds"]:
+            row["status"] = "new"
+        else:
+            row["ratio"] = r["seconds"] / b["seconds"]
+            if row["ratio"] > 1 + threshold:
+                row["status"] = "slower"
+            elif row["ratio"] < 1 / (1 + threshold):
+                row["status"] = "faster"
+            else:
+                row["status"] = "same"
+        rows.append(row)
+    return rows
+
+
+def _fmt(seconds: float | None) -> str:
+    if seconds is None:
+        return "-"
+    if seconds >= 1:
+        return f"{seconds:.2f}s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.1f}ms"
+    return f"{seconds * 1e6:.0f}us"
+
+
+def _print_table(rows):
+    header = f"{'corpus':<14} {'backend':<7} {'op':<26} {'time':>9} {'baseline':>9} {'ratio':>7}"
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        ratio = f"{r['ratio']:.2f}x" if r.get("ratio") is not None else ""
+        flag = {"slower": "  <-- slower", "faster": "  faster"}.get(r.get("status"), "")
+        print(f"{r['corpus']:<14} {r['backend']:<7} {r['op']:<26} {_fmt(r['seconds']):>9}"
+              f" {_fmt(r.get('baseline_seconds')):>9} {ratio:>7}{flag}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--drafts", type=int, nargs="*", default=[1_000, 10_000, 100_000],
+                    help="corpus sizes (number of drafts)")
+    ap.add_argument("--clients", type=int, default=100_000, help="clients in every corpus")
+    ap.add_argument("--backend", nargs="*", choices=("json", "sqlite"), default=["json"],
+                    help="document backends to time")
+    ap.add_argument("--repeat", type=int, default=3, help="runs per measurement (median is kept)")
+    ap.add_argument("--sample", type=int, default=200,
+                    help="drafts loaded/saved/renamed per run")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--out", help="write the results JSON here")
+    ap.add_argument("--json", action="store_true", help="print results as JSON")
+    ap.add_argument("--baseline", help="results JSON from an earlier run to compare with")
+    ap.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                    help="relative slowdown that counts as a regression (default 0.10)")
+    ap.add_argument("--fail-on-regression", action="store_true",
+                    help="exit with status 1 if anything got slower than the threshold")
+    ap.add_argument("--child", help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args.child:
+        return _child(json.loads(args.child))
+
+    def show(msg):
+        print(msg, file=sys.stderr, flush=True)
+
+    current = run(args.drafts, args.clients, args.backend, args.repeat, args.sample,
+                  args.seed, progress=show)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+            f.write("\n")
+
+    rows = current["results"]
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            rows = compare(current, json.load(f), args.threshold)
+        current["comparison"] = rows
+    if args.json:
+        json.dump(current, sys.stdout, indent=2)
+        print()
+    else:
+        _print_table(rows)
+
+    if args.fail_on_regression and any(r.get("status") == "slower" for r in rows):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+# benchmarks/synthetic.py
+"""Deterministic synthetic clients and drafts shaped like the real ones."""
+import random
+from datetime import date, timedelta
+
+_FIRST = ["Ada", "Ben", "Cleo", "Dan", "Eve", "Finn", "Gus", "Hana", "Ivo", "Jun",
+          "Kai", "Lena", "Milo", "Nia", "Otto", "Pia", "Quin", "Rosa", "Sam", "Tess"]
+_LAST = ["Lovelace", "Turing", "Hopper", "Knuth", "Ritchie", "Liskov", "Dijkstra",
+         "Hamilton", "Torvalds", "Wirth", "Kay", "Moore", "Perlis", "Shannon"]
+_BIZ = ["Studio", "Labs", "Consulting", "Bakery", "Garage", "Design", "Legal",
+        "Dental", "Logistics", "Media", "Systems", "Works"]
+_STREETS = ["Main St", "High St", "Oak Ave", "Pine Rd", "Harbour Way", "Mill Lane"]
+_CITIES = ["Springfield", "Riverton", "Lakeside", "Fairview", "Brookfield", "Ashford"]
+_SERVICES = ["Consulting", "Server migration", "Logo design", "Site audit",
+             "Support retainer", "Hosting", "Training", "Copywriting", "Photography"]
+_WORDS = ("review plan deliver migrate configure test deploy document onsite remote "
+          "hours phase backend frontend database backup monitoring license").split()
+
+
+def make_client(i: int, rng: random.Random) -> dict:
+    first, last = rng.choice(_FIRST), rng.choice(_LAST)
+    client = {
+        "name": f"{first} {last}",
+        "email": f"{first.lower()}.{last.lower()}{i}@example.com",
+        "address": f"{rng.randint(1, 999)} {rng.choice(_STREETS)}, {rng.choice(_CITIES)}",
+        "phone": f"+1 555 {rng.randint(100, 999)} {rng.randint(1000, 9999)}",
+    }
+    if rng.random() < 0.6:
+        client["business"] = f"{last} {rng.choice(_BIZ)}"
+    return client
+
+
+def make_clients(n: int, seed: int = 1) -> list[dict]:
+    rng = random.Random(seed)
+    return [make_client(i, rng) for i in range(n)]
+
+
+def make_item(rng: random.Random) -> dict:
+    words = rng.randint(3, 30)
+    return {
+        "service": rng.choice(_SERVICES),
+        "description": " ".join(rng.choice(_WORDS) for _ in range(words)),
+        "qty": float(rng.randint(1, 40)),
+        "unit_price": round(rng.uniform(5, 400), 2),
+        "tax_pct": rng.choice([0.0, 5.0, 10.0, 20.0]),
+    }
+
+
+def make_draft(n_items: int, rng: random.Random, number: int = 1000) -> dict:
+    """A draft dict in the shape InvoiceBuilder.get_state() produces."""
+    doc_type = "quote" if rng.random() < 0.3 else "invoice"
+    issued = date(2020, 1, 1) + timedelta(days=rng.randint(0, 6 * 365))
+    items = [make_item(rng) for _ in range(n_items)]
+    subtotal = sum(it["qty"] * it["unit_price"] for it in items)
+    tax = sum(it["qty"] * it["unit_price"] * it["tax_pct"] / 100.0 for it in items)
+    status = rng.choice(["", "UNPAID", "PAID", "OVERDUE"])
+    meta = {
+        "number": str(number),
+        "date": issued.isoformat(),
+        "due_date": (issued + timedelta(days=14)).isoformat(),
+        "terms": "Net 14",
+        "status": status,
+    }
+    return {
+        "kind": doc_type,
+        "created_at": f"{issued.isoformat()}T09:00:00",
+        "client": make_client(number, rng),
+        "meta": meta,
+        "items": items,
+        "totals": {
+            "subtotal": round(subtotal, 2),
+            "tax": round(tax, 2),
+            "grand_total": round(subtotal + tax, 2),
+        },
+        "notes": "Thank you for your business!\nPayment is due in 14 days.",
+        "doc_type": doc_type,
+        "date": meta["date"],
+        "total_amount": round(subtotal + tax, 2),
+        "status": status,
+    }
+
+
+def make_drafts(n: int, seed: int = 1, max_items: int = 12) -> list[dict]:
+    rng = random.Random(seed)
+    return [make_draft(rng.randint(1, max_items), rng, 1000 + i) for i in range(n)]
@@ -0,0 +1,193 @@
+# invoicemint/render.py
+"""
+Render invoices and quotes to PDF without the GUI.
+
+    python -m invoicemint.render -o out/                      # every saved draft
+    python -m invoicemint.render -o out/ ~/backup/drafts      # a drafts folder
+    python -m invoicemint.render -o out/ "exports/2025-*.json"
+    some-job | python -m invoicemint.render -o out/ -         # JSON lines on stdin
+
+JSON-lines input holds one document per line: a draft dict, or
+{"name": "...", "state": {...}} to choose the PDF's file name. Documents
+are rendered in parallel (see pdf.generate_invoice_pdfs) with the
+template and company details from the app settings. Nothing here needs a
+display, so it runs fine from cron. A file or line that can't be read as
+a document counts as a failed document. The exit status is 1 if any
+document failed, 2 if there was nothing to render.
+"""
+import argparse
+import glob
+import sys
+import time
+from pathlib import Path
+
+from invoicemint.services import codec
+
+
+def _read_draft(path: Path) -> dict:
+    """
+    State of one draft file, journal applied. Raises OSError or ValueError
+    if it can't be read as a document (storage.load_draft would return {}).
+    """
+    from invoicemint.services import storage
+
+    state = codec.loads(path.read_bytes())
+    if not isinstance(state, dict):
+        raise ValueError("not a JSON object")
+    loaded = storage._load_draft_file(path)
+    return loaded[0] if loaded is not None else state
+
+
+def _try_read(path: Path):
+    try:
+        return _read_draft(path)
+    except (OSError, ValueError) as e:
+        return e
+
+
+def _drafts_in(directory: Path):
+    """(name, state or exception) for every draft in a drafts folder, sharded or flat."""
+    from invoicemint.services.layout import DraftsLayout
+
+    seen = set()
+    for entry in sorted(DraftsLayout(directory).scan(), key=lambda e: e.name):
+        if entry.name not in seen:
+            seen.add(entry.name)
+            yield entry.name, _try_read(Path(entry.path).resolve())
+
+
+def _json_lines(stream, label: str):
+    """(name, state or exception) for every non-blank line."""
+    for num, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            obj = codec.loads(line)
+        except ValueError as e:
+            yield f"{label}-{num}", ValueError(f"line {num}: {e}")
+            continue
+        if isinstance(obj, dict) and isinstance(obj.get("state"), dict):
+            yield obj.get("name") or f"{label}-{num}", obj["state"]
+        elif isinstance(obj, dict):
+            yield f"{label}-{num}", obj
+        else:
+            yield f"{label}-{num}", ValueError(f"line {num}: not a JSON object")
+
+
+def _saved_drafts():
+    from invoicemint.services import storage
+
+    for d in storage.list_drafts():
+        if d.get("archived"):
+            state = storage.load_draft(d["name"])
+            yield d["name"], state or ValueError("unreadable archived document")
+        else:
+            yield d["name"], _try_read(Path(d["path"]))
+
+
+def collect(sources, doc_type: str | None = None) -> tuple[list[tuple], list]:
+    """
+    Documents the sources name: drafts folders, JSON files or glob
+    patterns of them, .jsonl files, or "-" for JSON lines on stdin. No
+    sources means every draft the app has saved.
+
+    Returns ([(name, state)], [PdfResult]) where the second list holds a
+    failed result for every file or line that couldn't be read.
+    """
+    from invoicemint.services.models import Document
+    from invoicemint.services.pdf import PdfResult
+
+    found = []
+    if not sources:
+        found.extend(_saved_drafts())
+    for src in sources:
+        if src == "-":
+            found.extend(_json_lines(sys.stdin, "stdin"))
+            continue
+        path = Path(src).expanduser()
+        if path.is_dir():
+            found.extend(_drafts_in(path))
+            continue
+        matches = sorted(glob.glob(str(path))) if glob.has_magic(src) else [str(path)]
+        if not matches:
+            raise ValueError(f"no files match {src}")
+        for m in matches:
+            p = Path(m)
+            if p.suffix.lower() == ".jsonl":
+                with open(p, encoding="utf-8") as f:
+                    found.extend(_json_lines(f, p.stem))
+            elif p.is_file():
+                found.append((p.name, _try_read(p.resolve())))
+            else:
+                raise ValueError(f"no such file: {m}")
+
+    items, failed = [], []
+    for name, state in found:
+        if isinstance(state, Exception):
+            failed.append(PdfResult(name, None, f"{type(state).__name__}: {state}"))
+        elif not doc_type or Document.from_state(state).doc_type == doc_type:
+            items.append((name, state))
+    return items, failed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m invoicemint.render",
+        description="Render InvoiceMint drafts to PDF files (no display needed).",
+    )
+    parser.add_argument("sources", nargs="*",
+                        help="drafts folders, JSON files or glob patterns, .jsonl files, "
+                             "or - for JSON lines on stdin (default: all saved drafts)")
+    parser.add_argument("-o", "--out-dir", required=True, help="where to write the PDFs")
+    parser.add_argument("-j", "--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--template", choices=("Modern", "Compact", "Minimal"),
+                        help="override the template from the settings")
+    parser.add_argument("--type", choices=("invoice", "quote"), dest="doc_type",
+                        help="only render this kind of document")
+    parser.add_argument("--chunksize", type=int, help="documents per worker task")
+    parser.add_argument("-q", "--quiet", action="store_true", help="print failures only")
+    args = parser.parse_args(argv)
+
+    from invoicemint.services.pdf import generate_invoice_pdfs
+    from invoicemint.services.storage import load_settings
+
+    try:
+        items, unreadable = collect(args.sources, args.doc_type)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    if not items and not unreadable:
+        print("nothing to render", file=sys.stderr)
+        return 2
+
+    settings = load_settings()
+    if args.template:
+        settings["pdf"] = {**(settings.get("pdf") or {}), "template": args.template}
+
+    def show(done, total):
+        if not args.quiet and sys.stderr.isatty():
+            print(f"\r{done:,}/{total:,}", end="", file=sys.stderr, flush=True)
+
+    start = time.perf_counter()
+    results = generate_invoice_pdfs(items, settings, args.out_dir, workers=args.workers,
+                                    chunksize=args.chunksize, progress=show)
+    elapsed = time.perf_counter() - start
+    if not args.quiet and sys.stderr.isatty():
+        print("\r", end="", file=sys.stderr)
+
+    results = unreadable + results
+    failed = [r for r in results if not r.ok]
+    for r in failed:
+        print(f"failed: {r.source}: {r.error}", file=sys.stderr)
+    if not args.quiet:
+        ok = len(results) - len(failed)
+        rate = ok / elapsed if elapsed else 0.0
+        print(f"rendered {ok:,} of {len(results):,} documents to {args.out_dir} "
+              f"in {elapsed:.1f} s ({rate:.1f} documents/s)"
+              + (f", {len(failed):,} failed" if failed else ""))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
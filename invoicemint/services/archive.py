@@ -0,0 +1,314 @@
+# invoicemint/services/archive.py
+"""
+Compressed pack files for old documents.
+
+A pack holds many documents, each compressed on its own so any one can be
+read without touching the rest:
+
+    b"IMPACK1\\n"
+    dictionary                  <- zlib preset dictionary (raw bytes)
+    record, record, ...         <- one zlib stream per document
+    index                       <- zlib-compressed JSON, see below
+    trailer                     <- struct TRAILER: index offset, index size,
+                                   dictionary size, magic
+
+The index maps each document name to [offset, size, mtime, summary], so
+loading a document is one seek + read + decompress. Invoices look much
+alike, so every record is compressed against a shared preset dictionary
+made of sample documents from the same pack. That recovers most of the
+ratio that compressing documents separately would lose.
+
+Packs are immutable once written. A name found in several packs resolves
+to the newest pack. Deleting or renaming an archived document leaves a
+tombstone in TOMBSTONES_FILE instead: name -> newest pack it is hidden in,
+so packs written later can hold that name again.
+"""
+import argparse
+import os
+import struct
+import sys
+import tempfile
+import threading
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+from invoicemint.services import codec
+from invoicemint.services.writer import atomic_write_bytes
+
+MAGIC = b"IMPACK1\n"
+TRAILER = struct.Struct("<QQI8s")  # index offset, index size, dictionary size, magic
+PACK_SUFFIX = ".impack"
+TOMBSTONES_FILE = "deleted.json"
+DICT_MAX_BYTES = 32 * 1024          # zlib's window; more is never used
+DICT_SAMPLES = 64
+LEVEL = 9
+
+
+def build_dictionary(payloads) -> bytes:
+    """
+    Preset dictionary from sample payloads. zlib favours matches near the
+    end of the dictionary, so the samples are laid out back to front.
+    """
+    out, size = [], 0
+    for p in payloads:
+        if size >= DICT_MAX_BYTES:
+            break
+        out.append(p)
+        size += len(p)
+    return b"".join(reversed(out))[-DICT_MAX_BYTES:]
+
+
+def _compress(payload: bytes, zdict: bytes) -> bytes:
+    c = zlib.compressobj(LEVEL, zdict=zdict) if zdict else zlib.compressobj(LEVEL)
+    return c.compress(payload) + c.flush()
+
+
+def _decompress(data: bytes, zdict: bytes) -> bytes:
+    d = zlib.decompressobj(zdict=zdict) if zdict else zlib.decompressobj()
+    return d.decompress(data) + d.flush()
+
+
+def write_pack(path: str | Path, documents) -> dict:
+    """
+    Write a pack with documents: iterable of (name, data dict, mtime, summary).
+    Returns its index. The file appears atomically, complete or not at all.
+    """
+    path = Path(path)
+    docs = [(name, codec.dumps(data, compact=True), mtime, summary)
+            for name, data, mtime, summary in documents]
+    zdict = build_dictionary(p for _, p, _, _ in docs[:DICT_SAMPLES])
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    index = {}
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            f.write(zdict)
+            offset = len(MAGIC) + len(zdict)
+            for name, payload, mtime, summary in docs:
+                blob = _compress(payload, zdict)
+                f.write(blob)
+                index[name] = [offset, len(blob), mtime, summary]
+                offset += len(blob)
+            raw_index = zlib.compress(codec.dumps(index, compact=True), LEVEL)
+            f.write(raw_index)
+            f.write(TRAILER.pack(offset, len(raw_index), len(zdict), MAGIC))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return index
+
+
+class Pack:
+    """Read access to one pack file; the index and dictionary are read once."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            f.seek(-TRAILER.size, os.SEEK_END)
+            index_at, index_size, dict_size, magic = TRAILER.unpack(f.read(TRAILER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{self.path.name} is not an archive pack")
+            f.seek(len(MAGIC))
+            self.zdict = f.read(dict_size)
+            f.seek(index_at)
+            self.index: dict[str, list] = codec.loads(zlib.decompress(f.read(index_size)))
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+
+    def load(self, name: str) -> dict:
+        offset, size, _mtime, _summary = self.index[name]
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            blob = f.read(size)
+        return codec.loads(_decompress(blob, self.zdict))
+
+
+class PackArchive:
+    """All packs in directory `root`, with a merged name -> pack lookup."""
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self._lock = threading.RLock()
+        self._packs: dict[str, Pack] = {}   # file name -> Pack
+        self._names: dict[str, Pack] = {}   # document name -> newest pack holding it
+        self._tombstones: dict[str, str] = {}   # document name -> pack file name
+        self._seen: tuple | None = None     # pack files when _names was built
+
+    def _pack_files(self) -> tuple:
+        """(file name, mtime_ns) of every pack, and of the tombstones file."""
+        try:
+            with os.scandir(self.root) as it:
+                return tuple(sorted((e.name, e.stat().st_mtime_ns) for e in it
+                                    if e.name.endswith(PACK_SUFFIX) or e.name == TOMBSTONES_FILE))
+        except OSError:
+            return ()
+
+    def _read_tombstones(self) -> dict:
+        try:
+            raw = codec.loads((self.root / TOMBSTONES_FILE).read_bytes())
+        except (OSError, ValueError):
+            return {}
+        return raw if isinstance(raw, dict) else {}
+
+    def _refresh(self):
+        files = self._pack_files()
+        if files == self._seen:
+            return
+        tombstones = self._read_tombstones()
+        packs = {}
+        for name, _ in files:
+            if name == TOMBSTONES_FILE:
+                continue
+            pack = self._packs.get(name)
+            if pack is None:
+                try:
+                    pack = Pack(self.root / name)
+                except (OSError, ValueError, zlib.error, struct.error):
+                    continue  # unreadable pack: skip it rather than fail every load
+            packs[name] = pack
+        names = {}
+        for name in sorted(packs):  # pack names sort oldest first
+            for doc in packs[name].index:
+                if name > tombstones.get(doc, ""):
+                    names[doc] = packs[name]
+        self._packs, self._names, self._seen = packs, names, files
+        self._tombstones = tombstones
+
+    def __contains__(self, name: str) -> bool:
+        with self._lock:
+            self._refresh()
+            return name in self._names
+
+    def load(self, name: str) -> dict | None:
+        """Archived document `name`, or None if it isn't archived."""
+        with self._lock:
+            self._refresh()
+            pack = self._names.get(name)
+        if pack is None:
+            return None
+        try:
+            return pack.load(name)
+        except (OSError, ValueError, zlib.error):
+            return None
+
+    def forget(self, name: str) -> bool:
+        """
+        Delete archived document `name` by tombstoning it in every pack
+        written so far. Returns False if it isn't archived.
+        """
+        with self._lock:
+            self._refresh()
+            pack = self._names.get(name)
+            if pack is None:
+                return False
+            tombstones = {**self._tombstones, name: pack.path.name}
+            atomic_write_bytes(self.root / TOMBSTONES_FILE, codec.dumps(tombstones, compact=True))
+            self._seen = None
+            return True
+
+    @staticmethod
+    def _entry(name: str, pack: Pack) -> dict:
+        _offset, size, mtime, summary = pack.index[name]
+        return {**(summary or {}), "name": name, "mtime": mtime, "size": size,
+                "pack": pack.path.name, "archived": True}
+
+    def entry(self, name: str) -> dict | None:
+        """list_drafts()-style dict of archived document `name`, or None."""
+        with self._lock:
+            self._refresh()
+            pack = self._names.get(name)
+        return self._entry(name, pack) if pack is not None else None
+
+    def entries(self) -> list[dict]:
+        """Archived documents as list_drafts()-style dicts (name, mtime, summary fields, pack)."""
+        with self._lock:
+            self._refresh()
+            names = dict(self._names)
+        return [self._entry(name, pack) for name, pack in sorted(names.items())]
+
+    def new_pack_path(self) -> Path:
+        self.root.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        n = 0
+        while True:
+            path = self.root / f"pack-{stamp}-{n:03d}{PACK_SUFFIX}"
+            if not path.exists():
+                return path
+            n += 1
+
+    def add_pack(self, documents) -> Path:
+        """Write documents (see write_pack) as a new pack and return its path."""
+        with self._lock:
+            path = self.new_pack_path()
+            write_pack(path, documents)
+            self._seen = None
+            return path
+
+    def size_bytes(self) -> int:
+        return sum((self.root / name).stat().st_size for name, _ in self._pack_files())
+
+
+# ---------- reporting ----------
+@dataclass(slots=True)
+class ArchiveReport:
+    cutoff: str
+    dry_run: bool
+    documents: int = 0
+    kept: int = 0                  # changed while packing; left as loose files
+    packs: list = field(default_factory=list)
+    loose_bytes: int = 0           # disk space of the loose files (and journals)
+    packed_bytes: int = 0
+    loose_load_ms: float | None = None   # median load time, loose file
+    packed_load_ms: float | None = None  # median load time, from the pack
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.loose_bytes - self.packed_bytes
+
+    def summary(self) -> str:
+        verb = "would archive" if self.dry_run else "archived"
+        text = f"{verb} {self.documents:,} documents dated before {self.cutoff}"
+        if self.dry_run:
+            return f"{text} ({_mb(self.loose_bytes)} as loose files)"
+        text += (f" into {len(self.packs)} pack(s): {_mb(self.loose_bytes)} -> "
+                 f"{_mb(self.packed_bytes)}, saved {_mb(self.saved_bytes)}")
+        if self.loose_load_ms is not None and self.packed_load_ms is not None:
+            text += (f"; load {self.loose_load_ms:.2f} ms loose vs "
+                     f"{self.packed_load_ms:.2f} ms packed (median)")
+        if self.kept:
+            text += f"; {self.kept} changed meanwhile and stayed loose"
+        return text
+
+
+def _mb(n: int) -> str:
+    return f"{n / (1024 * 1024):.1f} MB"
+
+
+# ---------- command line ----------
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m invoicemint.services.archive",
+        description="Pack InvoiceMint documents dated before a cutoff into compressed archives.",
+    )
+    parser.add_argument("before", help="cutoff date, YYYY-MM-DD")
+    parser.add_argument("--dry-run", action="store_true", help="report only, change nothing")
+    args = parser.parse_args(argv)
+
+    from invoicemint.services import storage
+
+    report = storage.archive_drafts(args.before, dry_run=args.dry_run)
+    print(report.summary())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,416 @@
+# invoicemint/services/client_index.py
+"""
+In-memory search index over the client book.
+
+Clients are split into word tokens across name, business, email, address
+and phone. Inverted indexes over the distinct tokens sit on top:
+
+- trigram -> tokens containing it
+- 1-2 character prefix -> tokens starting with it
+- token -> client ids (positions in the client list)
+
+Client books repeat the same names, streets, cities and domains, so the
+token vocabulary is much smaller than the text and the index builds fast.
+A query is split into words, and each word narrows the candidates to
+clients holding a token that contains it (or starts with it, for words
+too short to have a trigram). Every candidate is then confirmed with a
+substring test on its normalized text, so results match the old linear
+scan. The one exception is a query of a single 1-2 character word, which
+matches the start of a word ("jo" finds John, not Major).
+
+Postings are only ever appended to. An edited client gets postings for
+its new tokens, and the final check drops stale hits. rebuild() compacts
+everything.
+
+rank() serves the builder's client popup instead: the best k matches,
+ordered prefix > word start > trigram look-alike > small edit distance,
+so typos still find the client.
+"""
+import heapq
+import re
+
+SEARCH_FIELDS = ("name", "business", "email", "address", "phone")
+_SEP = "\x1f"  # joins fields so a match can't span two of them
+_WORD = re.compile(r"[^\W_]+")
+
+
+def normalize(text) -> str:
+    return str(text or "").casefold()
+
+
+def haystack(client: dict) -> str:
+    """Searchable text of one client: its fields, normalized and joined."""
+    return _SEP.join(normalize(client.get(f)) for f in SEARCH_FIELDS)
+
+
+def words(text: str) -> list[str]:
+    return _WORD.findall(text)
+
+
+def is_short(query: str) -> bool:
+    """
+    True for a normalized query that is just one 1-2 character word
+    ("jo", not "jo." or "nc."): it matches word starts, not substrings.
+    """
+    return len(query) < 3 and words(query) == [query]
+
+
+class ClientIndex:
+    def __init__(self, clients=()):
+        self.rebuild(clients)
+
+    # ---------- building ----------
+    def rebuild(self, clients):
+        self._clients: list[dict | None] = []
+        self._text: list[str | None] = []
+        self._token_ids: dict[str, int] = {}
+        self._tokens: list[str] = []
+        self._token_clients: list[list[int]] = []
+        self._grams: dict[str, list[int]] = {}     # trigram -> token ids
+        self._prefixes: dict[str, list[int]] = {}  # 1-2 char prefix -> token ids
+        self._edited: set[int] = set()
+        for client in clients:
+            cid = self.add(client or {})
+            if client is None:  # a deleted slot: keep the numbering
+                self.remove(cid)
+
+    def _token(self, tok: str) -> int:
+        tid = self._token_ids.get(tok)
+        if tid is not None:
+            return tid
+        tid = len(self._tokens)
+        self._token_ids[tok] = tid
+        self._tokens.append(tok)
+        self._token_clients.append([])
+        grams = self._grams
+        for g in {tok[i:i + 3] for i in range(len(tok) - 2)}:
+            posting = grams.get(g)
+            if posting is None:
+                grams[g] = [tid]
+            else:
+                posting.append(tid)
+        prefixes = self._prefixes
+        for p in {tok[:1], tok[:2]}:
+            posting = prefixes.get(p)
+            if posting is None:
+                prefixes[p] = [tid]
+            else:
+                posting.append(tid)
+        return tid
+
+    def _post(self, cid: int, text: str, skip=frozenset()):
+        token_ids, token_clients = self._token_ids, self._token_clients
+        for tok in set(words(text)):
+            if tok in skip:
+                continue
+            tid = token_ids.get(tok)
+            if tid is None:
+                tid = self._token(tok)
+            token_clients[tid].append(cid)
+
+    def add(self, client: dict) -> int:
+        """Index a new client; returns its id (its position in the list)."""
+        cid = len(self._clients)
+        text = haystack(client)
+        self._clients.append(client)
+        self._text.append(text)
+        self._post(cid, text)
+        return cid
+
+    def update(self, cid: int, client: dict):
+        """Re-index client cid after an edit."""
+        text = haystack(client)
+        old = self._text[cid]
+        self._clients[cid] = client
+        self._text[cid] = text
+        if text != old:
+            self._edited.add(cid)
+            self._post(cid, text, skip=set(words(old or "")))
+
+    def put(self, cid: int, client: dict):
+        """Index client as id cid: the next new id, or an existing one."""
+        if cid < len(self._clients):
+            self.update(cid, client)
+        elif cid == len(self._clients):
+            self.add(client)
+        else:
+            raise IndexError(cid)
+
+    def remove(self, cid: int):
+        self._clients[cid] = None
+        self._text[cid] = None
+
+    # ---------- queries ----------
+    def get(self, cid: int) -> dict | None:
+        return self._clients[cid]
+
+    def text(self, cid: int) -> str | None:
+        """Normalized searchable text of client cid (None once removed)."""
+        return self._text[cid]
+
+    def clients(self) -> list[dict]:
+        return [c for c in self._clients if c is not None]
+
+    def __len__(self):
+        return sum(1 for c in self._clients if c is not None)
+
+    def tokens_containing(self, word: str) -> list[int]:
+        """Ids of indexed tokens that contain word (start with it, if < 3 chars)."""
+        if len(word) < 3:
+            return self._prefixes.get(word, [])
+        postings = []
+        for g in {word[i:i + 3] for i in range(len(word) - 2)}:
+            posting = self._grams.get(g)
+            if posting is None:
+                return []
+            postings.append(posting)
+        postings.sort(key=len)
+        tokens = self._tokens
+        if len(postings) == 1 and len(word) == 3:
+            return postings[0]
+        return [t for t in postings[0] if word in tokens[t]]
+
+    def _clients_with(self, tids) -> set[int]:
+        token_clients = self._token_clients
+        out: set[int] = set()
+        for t in tids:
+            out.update(token_clients[t])
+        return out
+
+    def candidates(self, query: str) -> set[int] | None:
+        """
+        Superset of the ids matching normalized query, or None when the
+        words can't narrow it down (no word characters, or only a short
+        first word with punctuation); callers fall back to a scan.
+        """
+        qwords = words(query)
+        if not qwords:
+            return None
+        # the first word may be the tail of a longer token, so a short one
+        # there says nothing; later short words are whole words or prefixes
+        useful = [w for i, w in enumerate(qwords) if len(w) >= 3 or i > 0]
+        if not useful:
+            if not is_short(query):
+                return None  # e.g. "nc.": a substring test on every client
+            useful = qwords  # a lone 1-2 char word: match word starts
+        sets = []
+        for w in sorted(useful, key=len, reverse=True):
+            sets.append(self._clients_with(self.tokens_containing(w)))
+            if not sets[-1]:
+                return set()
+        sets.sort(key=len)
+        result = sets[0]
+        for s in sets[1:]:
+            result = result & s
+        return result
+
+    def _word_start_match(self, cid: int, q: str) -> bool:
+        return any(w.startswith(q) for w in words(self._text[cid] or ""))
+
+    def search(self, query: str, limit: int | None = None) -> list[int]:
+        """
+        Ids of clients matching query, in client-list order.
+
+        Matching is a case-insensitive substring test on each field, like
+        the old scan, except that a single 1-2 character word matches the
+        start of a word.
+        """
+        q = normalize(query).strip()
+        texts = self._text
+        if not q:
+            ids = [i for i, t in enumerate(texts) if t is not None]
+            return ids[:limit] if limit is not None else ids
+
+        cand = self.candidates(q)
+        if cand is None:
+            cand = range(len(texts))
+        short = is_short(q)
+        hits = []
+        for cid in sorted(cand):
+            text = texts[cid]
+            if text is None:
+                continue
+            if short:
+                if cid in self._edited and not self._word_start_match(cid, q):
+                    continue
+            elif q not in text:
+                continue
+            hits.append(cid)
+        return hits[:limit] if limit is not None else hits
+
+    def search_clients(self, query: str, limit: int | None = None) -> list[dict]:
+        return [self._clients[i] for i in self.search(query, limit)]
+
+    # ---------- ranked matching ----------
+    def tokens_starting_with(self, word: str) -> list[int]:
+        if len(word) < 3:
+            return self._prefixes.get(word, [])
+        tokens = self._tokens
+        return [t for t in self.tokens_containing(word) if tokens[t].startswith(word)]
+
+    def _similar_tokens(self, word: str) -> dict[int, float]:
+        """token id -> trigram Dice similarity with word, for similar tokens."""
+        grams = {word[i:i + 3] for i in range(len(word) - 2)}
+        if not grams:
+            return {}
+        shared: dict[int, int] = {}
+        for g in grams:
+            for t in self._grams.get(g, ()):
+                shared[t] = shared.get(t, 0) + 1
+        tokens, n = self._tokens, len(grams)
+        out = {}
+        for t, c in shared.items():
+            score = 2.0 * c / (n + max(1, len(tokens[t]) - 2))
+            if score >= MIN_TRIGRAM_SIMILARITY:
+                out[t] = score
+        return out
+
+    def _close_tokens(self, word: str) -> dict[int, int]:
+        """token id -> edit distance to word, for tokens within the typo budget."""
+        limit = 1 if len(word) <= 5 else 2
+        tokens = self._tokens
+        out = {}
+        # typos rarely hit the first two letters at once
+        seen = set()
+        for first in {word[:1], word[1:2]}:
+            for t in self._prefixes.get(first, ()):
+                if t in seen:
+                    continue
+                seen.add(t)
+                tok = tokens[t]
+                if abs(len(tok) - len(word)) > limit:
+                    continue
+                d = edit_distance(word, tok, limit)
+                if d <= limit:
+                    out[t] = d
+        return out
+
+    def _fuzzy_candidates(self, qwords, per_word) -> dict[int, float]:
+        """
+        Clients that have a matching token for every query word, with the
+        summed per-word score. per_word(word) -> {token id: score}.
+        """
+        token_clients = self._token_clients
+        total: dict[int, float] | None = None
+        for w in qwords:
+            scores: dict[int, float] = {}
+            for t, sc in per_word(w).items():
+                for cid in token_clients[t]:
+                    if sc > scores.get(cid, -1.0):
+                        scores[cid] = sc
+            if total is None:
+                total = scores
+            else:
+                total = {cid: total[cid] + sc for cid, sc in scores.items() if cid in total}
+            if not total:
+                return {}
+        return total or {}
+
+    def rank(self, query: str, k: int = 8) -> list[int]:
+        """
+        Best k client ids for query, best first. Tiers, in order:
+
+          1. a field starts with the query
+          2. every query word starts a word in the client
+          3. substring, then trigram similarity (catches most typos)
+          4. edit distance (typos too short or too close to share trigrams)
+
+        Lower tiers are only computed while fewer than k clients matched.
+        """
+        q = normalize(query).strip()
+        qwords = words(q)
+        if not qwords or k <= 0:
+            return []
+        texts = self._text
+        ranked: list[tuple] = []
+        taken: set[int] = set()
+
+        def take(entries):
+            for entry in heapq.nsmallest(k - len(ranked), entries):
+                ranked.append(entry)
+                taken.add(entry[-1])
+
+        # tiers 1 + 2 share their candidates: clients with a word-start hit
+        # for every query word
+        sets = sorted(
+            (self._clients_with(self.tokens_starting_with(w)) for w in qwords), key=len
+        )
+        cand = sets[0].intersection(*sets[1:]) if sets else set()
+        # walk candidates in list order so a full set of field-prefix hits
+        # ends the walk early; ties keep the book's order
+        prefix, word_start = [], []
+        for cid in sorted(cand):
+            text = texts[cid]
+            if text is None:
+                continue
+            if cid in self._edited and not all(
+                any(x.startswith(w) for x in words(text)) for w in qwords
+            ):
+                continue
+            if any(field.startswith(q) for field in text.split(_SEP)):
+                prefix.append((0, cid))
+                if len(prefix) >= k:
+                    break
+            elif len(word_start) < k:
+                word_start.append((1, cid))
+        take(prefix)
+        if len(ranked) < k:
+            take(word_start)
+        if len(ranked) >= k:
+            return [e[-1] for e in ranked]
+
+        # tier 3: plain substring first, then trigram look-alikes
+        fuzzy = []
+        long_words = [w for w in qwords if len(w) >= 3]
+        if long_words:
+            for cid in self.candidates(q) or ():
+                if cid not in taken and texts[cid] is not None and q in texts[cid]:
+                    fuzzy.append((2, -1.0, cid))
+            sims = self._fuzzy_candidates(long_words, self._similar_tokens)
+            n = len(long_words)
+            for cid, score in sims.items():
+                if cid not in taken and texts[cid] is not None and q not in texts[cid]:
+                    fuzzy.append((2, -score / n, cid))
+        take(fuzzy)
+        if len(ranked) >= k:
+            return [e[-1] for e in ranked]
+
+        # tier 4: bounded edit distance per word
+        close = self._fuzzy_candidates(qwords, self._close_tokens)
+        take((3, dist, cid) for cid, dist in close.items()
+             if cid not in taken and texts[cid] is not None)
+        return [e[-1] for e in ranked]
+
+    def rank_clients(self, query: str, k: int = 8) -> list[dict]:
+        return [self._clients[i] for i in self.rank(query, k)]
+
+
+MIN_TRIGRAM_SIMILARITY = 0.5
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Levenshtein distance with adjacent transpositions, giving up (returning
+    limit + 1) as soon as it must exceed limit.
+    """
+    if a == b:
+        return 0
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2 = None
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i] + [0] * len(b)
+        best = i
+        for j, cb in enumerate(b, 1):
+            cost = 0 if ca == cb else 1
+            v = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if prev2 is not None and i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                v = min(v, prev2[j - 2] + 1)
+            cur[j] = v
+            if v < best:
+                best = v
+        if best > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1]
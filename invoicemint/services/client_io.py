@@ -0,0 +1,379 @@
+# invoicemint/services/client_io.py
+"""
+Bulk client import/export: CSV and vCard.
+
+Files are read and written one record at a time, so a 50k-row import
+keeps only the current row and a set of short key hashes in memory.
+
+Duplicates are found by client_key(): a hash of the client's normalized
+email or, without one, of its name, business and phone digits. Clients
+already in the book and repeats within the file are both skipped.
+
+Headless use:
+
+    python -m invoicemint.services.client_io import clients.csv --dry-run
+    python -m invoicemint.services.client_io export clients.vcf
+"""
+import argparse
+import csv
+import hashlib
+import os
+import re
+import sys
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+
+FIELDS = ("name", "business", "email", "address", "phone")
+
+# CSV header spellings we accept, normalized (lowercase, no spaces/punctuation)
+_CSV_ALIASES = {
+    "name": "name", "fullname": "name", "contact": "name", "contactname": "name",
+    "displayname": "name",
+    "business": "business", "company": "business", "companyname": "business",
+    "organization": "business", "organisation": "business", "org": "business",
+    "email": "email", "emailaddress": "email", "mail": "email",
+    "address": "address", "streetaddress": "address", "postaladdress": "address",
+    "phone": "phone", "telephone": "phone", "tel": "phone", "mobile": "phone",
+    "phonenumber": "phone",
+}
+_SPACES = re.compile(r"\s+")
+_NON_DIGITS = re.compile(r"\D+")
+
+
+def _norm(value) -> str:
+    return _SPACES.sub(" ", str(value or "")).strip().casefold()
+
+
+def client_key(client: dict) -> bytes | None:
+    """Duplicate-detection key of a client, or None if it has nothing to match on."""
+    email = _norm(client.get("email"))
+    if email:
+        raw = "e\x1f" + email
+    else:
+        name, business = _norm(client.get("name")), _norm(client.get("business"))
+        if not (name or business):
+            return None
+        phone = _NON_DIGITS.sub("", str(client.get("phone") or ""))
+        raw = "\x1f".join(("n", name, business, phone))
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=12).digest()
+
+
+def detect_format(path: str | Path) -> str:
+    ext = Path(path).suffix.lower()
+    if ext in (".vcf", ".vcard"):
+        return "vcard"
+    if ext in (".csv", ".txt"):
+        return "csv"
+    raise ValueError(f"unknown client file type: {ext or Path(path).name}")
+
+
+# ---------- reading ----------
+def iter_csv(path: str | Path):
+    """Yield (line number, client dict) per CSV row. The header row maps columns."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = [_CSV_ALIASES.get(re.sub(r"[\W_]+", "", h.casefold())) for h in header]
+        if not any(columns):
+            raise ValueError("CSV header has no name/business/email/address/phone column")
+        for row in reader:
+            client = {}
+            for col, value in zip(columns, row):
+                if col and value.strip() and col not in client:
+                    client[col] = value.strip()
+            yield reader.line_num, client
+
+
+def _vcard_unescape(value: str) -> str:
+    out, i = [], 0
+    while i < len(value):
+        ch = value[i]
+        if ch == "\\" and i + 1 < len(value):
+            nxt = value[i + 1]
+            out.append("\n" if nxt in "nN" else nxt)
+            i += 2
+        else:
+            out.append(ch)
+            i += 1
+    return "".join(out)
+
+
+def _vcard_split(value: str, sep: str) -> list[str]:
+    """Split on sep, ignoring escaped separators."""
+    parts, cur, i = [], [], 0
+    while i < len(value):
+        ch = value[i]
+        if ch == "\\" and i + 1 < len(value):
+            cur.append(value[i:i + 2])
+            i += 2
+            continue
+        if ch == sep:
+            parts.append("".join(cur))
+            cur = []
+        else:
+            cur.append(ch)
+        i += 1
+    parts.append("".join(cur))
+    return parts
+
+
+def _vcard_lines(f):
+    """Unfold continuation lines: yield (line number, logical line)."""
+    pending, start = None, 0
+    for num, line in enumerate(f, 1):
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and pending is not None:
+            pending += line[1:]
+            continue
+        if pending is not None:
+            yield start, pending
+        pending, start = line, num
+    if pending is not None:
+        yield start, pending
+
+
+def _vcard_client(props: dict) -> dict:
+    client = {}
+    org = _vcard_unescape(_vcard_split(props["ORG"], ";")[0]).strip() if props.get("ORG") else ""
+    n_parts = [_vcard_unescape(p).strip() for p in _vcard_split(props.get("N") or "", ";")]
+    family, given = (n_parts + ["", ""])[:2]
+    name = props.get("FN")
+    if not name and props.get("N"):
+        name = " ".join(p for p in (given, family) if p)
+    else:
+        name = _vcard_unescape(name or "").strip()
+        # a company card (ours, and most address books') has an empty N and
+        # FN = the organization: that's a business without a contact name
+        if "N" in props and not any(n_parts) and name == org:
+            name = ""
+    if name:
+        client["name"] = name
+    if org:
+        client["business"] = org
+    if props.get("EMAIL"):
+        client["email"] = _vcard_unescape(props["EMAIL"]).strip()
+    if props.get("TEL"):
+        client["phone"] = _vcard_unescape(props["TEL"]).strip()
+    if props.get("ADR"):
+        # PO box; extended; street; locality; region; postal code; country
+        parts = [_vcard_unescape(p).strip() for p in _vcard_split(props["ADR"], ";")]
+        client["address"] = ", ".join(p for p in parts if p)
+    return {k: v for k, v in client.items() if v}
+
+
+def iter_vcard(path: str | Path):
+    """Yield (line number of BEGIN, client dict) per vCard in the file."""
+    with open(path, encoding="utf-8-sig") as f:
+        props, start = None, 0
+        for num, line in _vcard_lines(f):
+            name, sep, value = line.partition(":")
+            if not sep:
+                continue
+            key = name.split(";", 1)[0].split(".")[-1].upper()  # drop params/groups
+            if key == "BEGIN" and value.strip().upper() == "VCARD":
+                props, start = {}, num
+            elif key == "END" and value.strip().upper() == "VCARD":
+                if props is not None:
+                    yield start, _vcard_client(props)
+                props = None
+            elif props is not None and key not in props:
+                props[key] = value  # first EMAIL/TEL/ADR wins
+
+
+def iter_clients(path: str | Path, fmt: str | None = None):
+    fmt = fmt or detect_format(path)
+    if fmt == "csv":
+        return iter_csv(path)
+    if fmt == "vcard":
+        return iter_vcard(path)
+    raise ValueError(f"unknown client file format: {fmt}")
+
+
+# ---------- import ----------
+@dataclass(slots=True)
+class ImportReport:
+    path: str
+    dry_run: bool
+    rows: int = 0
+    added: int = 0
+    existing: int = 0           # already in the client book
+    repeated: int = 0           # seen earlier in the same file
+    skipped: int = 0            # no name, business or email
+    error: str | None = None    # why reading stopped early, if it did
+
+    def summary(self) -> str:
+        verb = "would add" if self.dry_run else "added"
+        text = (f"{self.rows:,} rows: {verb} {self.added:,}, "
+                f"{self.existing:,} already saved, {self.repeated:,} repeated in file, "
+                f"{self.skipped:,} skipped")
+        if self.error:
+            text += f" (stopped early: {self.error})"
+        return text
+
+
+def import_clients(path: str | Path, fmt: str | None = None, dry_run: bool = False,
+                   progress=None, progress_every: int = 500) -> ImportReport:
+    """
+    Import clients from a CSV or vCard file into the client book. New
+    clients are saved in batches of progress_every rows.
+
+    dry_run:  count what would happen without saving anything
+    progress: progress(report) every progress_every rows and at the end
+    """
+    from invoicemint.services import storage
+
+    report = ImportReport(path=str(path), dry_run=dry_run)
+    seen = {k for c in storage.load_clients() if (k := client_key(c)) is not None}
+    in_file: set[bytes] = set()
+    batch: list[dict] = []
+
+    def save_batch():
+        if batch and not dry_run:
+            storage.add_clients(batch)
+        report.added += len(batch)
+        batch.clear()
+
+    try:
+        for _line, client in iter_clients(path, fmt):
+            report.rows += 1
+            key = client_key(client)
+            if key is None:
+                report.skipped += 1
+            elif key in seen:
+                report.existing += 1
+            elif key in in_file:
+                report.repeated += 1
+            else:
+                in_file.add(key)
+                batch.append(client)
+            if report.rows % progress_every == 0:
+                save_batch()
+                if progress is not None:
+                    progress(report)
+        save_batch()
+    except (OSError, UnicodeDecodeError, csv.Error, ValueError) as e:
+        save_batch()
+        report.error = str(e)
+    if progress is not None:
+        progress(report)
+    return report
+
+
+# ---------- export ----------
+def _vcard_escape(value: str) -> str:
+    return (value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def _vcard_fold(line: str) -> str:
+    # lines longer than 75 characters continue on lines starting with a space
+    if len(line) <= 75:
+        return line + "\r\n"
+    parts = [line[:75]] + [line[i:i + 74] for i in range(75, len(line), 74)]
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _vcard_record(client: dict) -> str:
+    # FN is required; a business-only client gets FN = business, N empty
+    # (read back as business-only by _vcard_client)
+    name = client.get("name") or client.get("business") or ""
+    lines = ["BEGIN:VCARD", "VERSION:3.0", f"FN:{_vcard_escape(name)}",
+             f"N:{_vcard_escape(client.get('name') or '')};;;;"]
+    if client.get("business"):
+        lines.append(f"ORG:{_vcard_escape(client['business'])}")
+    if client.get("email"):
+        lines.append(f"EMAIL;TYPE=INTERNET:{_vcard_escape(client['email'])}")
+    if client.get("phone"):
+        lines.append(f"TEL:{_vcard_escape(client['phone'])}")
+    if client.get("address"):
+        lines.append(f"ADR:;;{_vcard_escape(client['address'])};;;;")
+    if client.get("id"):
+        lines.append(f"UID:{_vcard_escape(client['id'])}")
+    lines.append("END:VCARD")
+    return "".join(_vcard_fold(line) for line in lines)
+
+
+def export_clients(path: str | Path, fmt: str | None = None, clients=None,
+                   progress=None, progress_every: int = 500) -> int:
+    """
+    Write clients (default: the whole book) to a CSV or vCard file,
+    atomically. progress(count) is called every progress_every clients.
+    Returns how many were written.
+    """
+    if clients is None:
+        from invoicemint.services import storage
+
+        clients = storage.load_clients()
+    fmt = fmt or detect_format(path)
+    if fmt not in ("csv", "vcard"):
+        raise ValueError(f"unknown client file format: {fmt}")
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    count = 0
+    try:
+        with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+            if fmt == "csv":
+                writer = csv.writer(f)
+                writer.writerow(FIELDS)
+            for client in clients:
+                if fmt == "csv":
+                    writer.writerow([client.get(k) or "" for k in FIELDS])
+                else:
+                    f.write(_vcard_record(client))
+                count += 1
+                if progress is not None and count % progress_every == 0:
+                    progress(count)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    if progress is not None:
+        progress(count)
+    return count
+
+
+# ---------- command line ----------
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m invoicemint.services.client_io",
+        description="Import or export InvoiceMint clients (CSV or vCard).",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="add clients from a .csv or .vcf file")
+    imp.add_argument("path")
+    imp.add_argument("--format", choices=("csv", "vcard"))
+    imp.add_argument("--dry-run", action="store_true", help="report only, save nothing")
+    exp = sub.add_parser("export", help="write all clients to a .csv or .vcf file")
+    exp.add_argument("path")
+    exp.add_argument("--format", choices=("csv", "vcard"))
+    args = parser.parse_args(argv)
+
+    def show(msg):
+        if sys.stderr.isatty():
+            print(f"\r{msg}", end="", file=sys.stderr, flush=True)
+
+    from invoicemint.services import storage
+
+    if args.command == "import":
+        report = import_clients(args.path, args.format, dry_run=args.dry_run,
+                                progress=lambda r: show(f"{r.rows:,} rows"))
+        show("")
+        storage.flush_pending_writes()
+        print(report.summary())
+        return 1 if report.error else 0
+
+    count = export_clients(args.path, args.format,
+                           progress=lambda n: show(f"{n:,} clients"))
+    show("")
+    print(f"exported {count:,} clients to {args.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,304 @@
+# invoicemint/services/client_store.py
+"""
+Client book with stable ids and per-record saves.
+
+The book is a snapshot (`clients.json`, a plain list of client dicts, each
+carrying an "id") plus an append-only change log next to it:
+
+    {"clients_log": 1, "base": "<snapshot id>"}        <- header
+    {"op": "put", "id": "...", "client": {...}}        <- added or edited
+    {"op": "del", "id": "..."}                         <- deleted
+
+Adding, editing or deleting one client appends one short line, so the
+cost does not grow with the size of the book. Like the draft journal, the
+header names the snapshot the log applies to (journal.snapshot_id). When
+the snapshot is rewritten, whether by compaction or by another program,
+the stale log is ignored. The log is folded into a new snapshot once it
+outgrows the snapshot (and COMPACT_MIN_BYTES).
+
+Clients from older versions have no id; they get one on first load, and
+the book is compacted once to store it.
+"""
+import threading
+import uuid
+from pathlib import Path
+
+from invoicemint.services import codec, journal
+from invoicemint.services.writer import atomic_write_bytes, append_bytes
+
+LOG_VERSION = 1
+COMPACT_MIN_BYTES = 64 * 1024
+
+
+def new_client_id() -> str:
+    return uuid.uuid4().hex
+
+
+def _stat_key(path: Path):
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class ClientStore:
+    """
+    Clients in `snapshot_path` + changes in `log_path`.
+
+    writer: optional WriteBehindQueue to write on its thread (in order, so
+            a compacted snapshot always lands before its fresh log)
+    encode: serializer for the snapshot (defaults to indented JSON)
+
+    Clients keep their position (`rows`) until the book is reloaded or
+    replaced; deleted ones leave a None behind. `generation` changes
+    whenever positions are renumbered, so position-keyed caches (the
+    search index) know to rebuild.
+    """
+
+    def __init__(self, snapshot_path: str | Path, log_path: str | Path,
+                 writer=None, encode=None):
+        self.snapshot_path = Path(snapshot_path)
+        self.log_path = Path(log_path)
+        self._writer = writer
+        self._encode = encode or codec.dumps
+        self._lock = threading.RLock()
+        self.rows: list[dict | None] = []
+        self.generation = 0
+        self._positions: dict[str, int] = {}
+        self._base: str | None = None       # snapshot id the log applies to
+        self._log_ok = False                # log on disk has our header
+        self._log_torn = False              # ...but ends in a partial line
+        self._log_bytes = 0
+        self._snapshot_bytes = 0
+        self._stat = None                   # (snapshot key, log key) when read
+        self._loaded = False
+
+    # ---------- io ----------
+    def _write(self, path: Path, payload: bytes, append: bool = False, on_written=None):
+        if self._writer is not None:
+            self._writer.submit(path, payload, on_written, append=append)
+            return
+        if append:
+            append_bytes(path, payload)
+        else:
+            atomic_write_bytes(path, payload)
+        if on_written is not None:
+            on_written()
+
+    def _pending(self) -> bool:
+        w = self._writer
+        return w is not None and (w.is_pending(self.snapshot_path) or w.is_pending(self.log_path))
+
+    def _read_snapshot(self) -> bytes | None:
+        if self._writer is not None:
+            payload = self._writer.pending(self.snapshot_path)
+            if payload is not None:
+                return payload
+        try:
+            return self.snapshot_path.read_bytes()
+        except OSError:
+            return None
+
+    def _read_log(self) -> bytes:
+        if self._writer is not None:
+            self._writer.flush(self.log_path)
+        try:
+            return self.log_path.read_bytes()
+        except OSError:
+            return b""
+
+    def _stat_keys(self):
+        return (_stat_key(self.snapshot_path), _stat_key(self.log_path))
+
+    def _rekey(self):
+        # called once our own write is on disk, so it isn't re-read
+        with self._lock:
+            self._stat = self._stat_keys()
+
+    # ---------- loading ----------
+    def refresh(self) -> bool:
+        """Load the book, or reload it if the files changed under us. True if (re)loaded."""
+        with self._lock:
+            if self._loaded and (self._pending() or self._stat == self._stat_keys()):
+                return False
+            self._load()
+            return True
+
+    def _load(self):
+        self._stat = self._stat_keys()
+        raw = self._read_snapshot()
+        try:
+            clients = codec.loads(raw) if raw else []
+        except ValueError:
+            clients = []
+        if not isinstance(clients, list):
+            clients = []
+        self.rows = []
+        self._positions = {}
+        migrate = False
+        for c in clients:
+            if not isinstance(c, dict):
+                continue
+            if not c.get("id") or c["id"] in self._positions:
+                c = {**c, "id": new_client_id()}
+                migrate = True
+            self._set(c)
+        self._base = journal.snapshot_id(raw) if raw else None
+        self._snapshot_bytes = len(raw or b"")
+        self._log_ok = False
+        self._log_torn = False
+        self._log_bytes = 0
+        if self._base is not None:
+            self._replay(self._read_log())
+        self.generation += 1
+        self._loaded = True
+        if migrate:
+            self.compact()
+
+    def _replay(self, log: bytes):
+        lines = log.splitlines(keepends=True)
+        if not lines:
+            return
+        try:
+            header = codec.loads(lines[0])
+        except ValueError:
+            return
+        if not isinstance(header, dict) or header.get("base") != self._base:
+            return  # written against another snapshot
+        good = len(lines[0])
+        for line in lines[1:]:
+            try:
+                entry = codec.loads(line)
+                self._apply(entry)
+            except (ValueError, KeyError, TypeError, AttributeError):
+                break  # torn final line after a crash
+            good += len(line)
+        self._log_ok = good == len(log)
+        self._log_torn = not self._log_ok
+        self._log_bytes = good
+
+    def _apply(self, entry: dict):
+        if entry["op"] == "put":
+            self._set(entry["client"])
+        elif entry["op"] == "del":
+            self._unset(entry["id"])
+
+    def _set(self, client: dict):
+        pos = self._positions.get(client["id"])
+        if pos is None:
+            self._positions[client["id"]] = len(self.rows)
+            self.rows.append(client)
+        else:
+            self.rows[pos] = client
+
+    def _unset(self, client_id: str) -> int | None:
+        pos = self._positions.pop(client_id, None)
+        if pos is not None:
+            self.rows[pos] = None
+        return pos
+
+    # ---------- reading ----------
+    def clients(self) -> list[dict]:
+        self.refresh()
+        return [c for c in self.rows if c is not None]
+
+    def get(self, client_id: str) -> dict | None:
+        self.refresh()
+        pos = self._positions.get(client_id)
+        return None if pos is None else self.rows[pos]
+
+    def position(self, client_id: str) -> int | None:
+        return self._positions.get(client_id)
+
+    def __len__(self):
+        self.refresh()
+        return len(self._positions)
+
+    # ---------- writing ----------
+    def _log(self, entries: list[dict]):
+        line = b"".join(codec.dumps(e, compact=True) + b"\n" for e in entries)
+        if self._log_ok:
+            self._write(self.log_path, line, append=True, on_written=self._rekey)
+        else:
+            # no usable log for this snapshot yet. A torn one still holds
+            # changes before the tear, so fold them into a new snapshot.
+            if self._base is None or self._log_torn:
+                self.compact()
+                return
+            header = codec.dumps({"clients_log": LOG_VERSION, "base": self._base}, compact=True) + b"\n"
+            line = header + line
+            self._write(self.log_path, line, on_written=self._rekey)
+            self._log_ok = True
+            self._log_bytes = 0
+        self._log_bytes += len(line)
+        if self._log_bytes > max(self._snapshot_bytes, COMPACT_MIN_BYTES):
+            self.compact()
+
+    def upsert(self, client: dict) -> str:
+        """
+        Add client, or replace the one with the same "id". Returns the id
+        (a new one is assigned if client has none).
+        """
+        return self.upsert_many([client])[0]
+
+    def upsert_many(self, clients) -> list[str]:
+        """upsert() for a batch of clients, written as one log append."""
+        with self._lock:
+            self.refresh()
+            ids, entries = [], []
+            for client in clients:
+                client = dict(client)
+                if not client.get("id"):
+                    client["id"] = new_client_id()
+                self._set(client)
+                ids.append(client["id"])
+                entries.append({"op": "put", "id": client["id"], "client": client})
+            if entries:
+                self._log(entries)
+            return ids
+
+    def delete(self, client_id: str) -> bool:
+        """Remove a client. False if there is no client with that id."""
+        with self._lock:
+            self.refresh()
+            if self._unset(client_id) is None:
+                return False
+            self._log([{"op": "del", "id": client_id}])
+            return True
+
+    def replace(self, clients) -> None:
+        """Make `clients` the whole book (ids are kept, or assigned)."""
+        with self._lock:
+            self.rows = []
+            self._positions = {}
+            for c in clients or ():
+                c = dict(c)
+                if not c.get("id") or c["id"] in self._positions:
+                    c["id"] = new_client_id()
+                self._set(c)
+            self.generation += 1
+            self._loaded = True
+            self.compact()
+
+    def compact(self):
+        """Rewrite the snapshot with every change folded in and start an empty log."""
+        with self._lock:
+            payload = self._encode([c for c in self.rows if c is not None])
+            self._base = journal.snapshot_id(payload)
+            self._snapshot_bytes = len(payload)
+            header = codec.dumps({"clients_log": LOG_VERSION, "base": self._base}, compact=True) + b"\n"
+            # snapshot first: a crash in between leaves a log for the old
+            # snapshot, which is ignored, and the new snapshot has it all
+            self._write(self.snapshot_path, payload, on_written=self._rekey)
+            self._write(self.log_path, header, on_written=self._rekey)
+            self._log_ok = True
+            self._log_torn = False
+            self._log_bytes = len(header)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until queued writes of the book are on disk."""
+        if self._writer is None:
+            return True
+        return (self._writer.flush(self.snapshot_path, timeout)
+                and self._writer.flush(self.log_path, timeout))
@@ -0,0 +1,36 @@
+# invoicemint/services/codec.py
+import json
+
+# orjson is optional: several times faster than the stdlib for both
+# directions. Everything falls back to `json` when it isn't installed.
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+def loads(data: bytes | str):
+    """Decode JSON from bytes or str. Raises ValueError on bad input."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj, compact: bool = False) -> bytes:
+    """
+    Encode obj as UTF-8 JSON bytes.
+
+    compact=False keeps the historical 2-space indented layout (handy for
+    hand-editing); compact=True drops all optional whitespace.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=0 if compact else orjson.OPT_INDENT_2)
+        except TypeError:
+            # e.g. non-str keys or ints beyond 64 bits; the stdlib copes
+            pass
+    if compact:
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+    return json.dumps(obj, indent=2).encode("utf-8")
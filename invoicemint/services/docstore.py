@@ -0,0 +1,204 @@
+# invoicemint/services/docstore.py
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from invoicemint.services import codec
+
+# Summary columns kept next to the JSON payload. Everything the list views
+# need lives in these columns so listings never decode a document.
+SUMMARY_COLUMNS = (
+    "doc_type",
+    "number",
+    "client_name",
+    "date",
+    "due_date",
+    "status",
+    "total",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    name        TEXT PRIMARY KEY,
+    doc_type    TEXT NOT NULL DEFAULT 'invoice',
+    number      TEXT,
+    client_name TEXT,
+    date        TEXT,
+    due_date    TEXT,
+    status      TEXT,
+    total       REAL,
+    mtime       REAL NOT NULL,
+    size        INTEGER NOT NULL DEFAULT 0,
+    data        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_documents_doc_type ON documents(doc_type);
+CREATE INDEX IF NOT EXISTS idx_documents_number   ON documents(number);
+CREATE INDEX IF NOT EXISTS idx_documents_client   ON documents(client_name);
+CREATE INDEX IF NOT EXISTS idx_documents_date     ON documents(date);
+CREATE INDEX IF NOT EXISTS idx_documents_due_date ON documents(due_date);
+CREATE INDEX IF NOT EXISTS idx_documents_status   ON documents(status);
+CREATE INDEX IF NOT EXISTS idx_documents_total    ON documents(total);
+CREATE INDEX IF NOT EXISTS idx_documents_mtime    ON documents(mtime);
+
+CREATE TABLE IF NOT EXISTS store_meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class SQLiteDocumentStore:
+    """
+    Invoices and quotes stored as rows of a single SQLite database.
+
+    Rows are keyed by the draft file name (e.g. "invoice-1001.json") so the
+    drafts API in storage.py can keep handing names and paths to the UI
+    exactly as it does for the JSON-file layout.
+    """
+
+    def __init__(self, db_path: str | Path):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ---------- meta ----------
+    def get_meta(self, key: str, default=None):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM store_meta WHERE key = ?", (key,)
+            ).fetchone()
+        return row["value"] if row else default
+
+    def set_meta(self, key: str, value: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO store_meta(key, value) VALUES (?, ?)",
+                (key, value),
+            )
+
+    # ---------- documents ----------
+    def save(self, name: str, data: dict, summary: dict, mtime: float | None = None):
+        """Insert or replace a document together with its summary columns."""
+        payload = codec.dumps(data, compact=True).decode("utf-8")
+        row = self._row_values(name, payload, summary, mtime)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents"
+                " (name, doc_type, number, client_name, date, due_date, status,"
+                "  total, mtime, size, data)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                row,
+            )
+
+    def save_many(self, rows):
+        """
+        Bulk insert: rows is an iterable of (name, data, summary, mtime).
+        Runs in a single transaction.
+        """
+        count = 0
+        with self._lock, self._conn:
+            for name, data, summary, mtime in rows:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO documents"
+                    " (name, doc_type, number, client_name, date, due_date, status,"
+                    "  total, mtime, size, data)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    self._row_values(
+                        name, codec.dumps(data, compact=True).decode("utf-8"), summary, mtime
+                    ),
+                )
+                count += 1
+        return count
+
+    def load(self, name: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM documents WHERE name = ?", (name,)
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            return codec.loads(row["data"])
+        except ValueError:
+            return {}
+
+    def exists(self, name: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM documents WHERE name = ?", (name,)
+            ).fetchone()
+        return row is not None
+
+    def delete(self, name: str) -> bool:
+        with self._lock, self._conn:
+            cur = self._conn.execute("DELETE FROM documents WHERE name = ?", (name,))
+        return cur.rowcount > 0
+
+    def rename(self, name: str, new_name: str) -> bool:
+        try:
+            with self._lock, self._conn:
+                cur = self._conn.execute(
+                    "UPDATE documents SET name = ?, mtime = ? WHERE name = ?",
+                    (new_name, time.time(), name),
+                )
+        except sqlite3.IntegrityError:
+            # target name already taken
+            return False
+        return cur.rowcount > 0
+
+    def list_summaries(self, order_by: str = "name") -> list[dict]:
+        """Summary rows (no payload) for every document."""
+        order = "mtime DESC" if order_by == "mtime" else "name"
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT name, mtime, size, {', '.join(SUMMARY_COLUMNS)}"
+                f" FROM documents ORDER BY {order}"
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def recent(self, limit: int = 5) -> list[dict]:
+        """Newest documents first, served straight from the mtime index."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT name, mtime, size, {', '.join(SUMMARY_COLUMNS)}"
+                " FROM documents ORDER BY mtime DESC LIMIT ?",
+                (int(limit),),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    # ---------- helpers ----------
+    @staticmethod
+    def _row_values(name, payload, summary, mtime):
+        summary = summary or {}
+        total = summary.get("total")
+        try:
+            total = float(total) if total is not None else None
+        except (TypeError, ValueError):
+            total = None
+        return (
+            name,
+            summary.get("doc_type") or "invoice",
+            summary.get("number"),
+            summary.get("client_name"),
+            summary.get("date"),
+            summary.get("due_date"),
+            summary.get("status"),
+            total,
+            mtime if mtime is not None else time.time(),
+            len(payload.encode("utf-8")),
+            payload,
+        )
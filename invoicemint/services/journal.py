@@ -0,0 +1,172 @@
+# invoicemint/services/journal.py
+"""
+Field-level change journal for drafts.
+
+A journal is a JSON-lines file that sits next to a draft snapshot:
+
+    {"journal": 1, "base": "<snapshot id>"}       <- header
+    {"ts": "...", "ops": [...]}                   <- one line per save
+    {"ts": "...", "ops": [...]}
+
+The header names the snapshot the entries apply to (a hash of its bytes).
+If the snapshot is rewritten (compaction, or edited by another program)
+the header no longer matches and the stale journal is ignored.
+
+Ops are small, JSON-friendly dicts:
+
+    {"op": "set", "path": ["meta", "status"], "value": "PAID"}
+    {"op": "del", "path": ["converted_from_quote"]}
+    {"op": "splice", "path": ["items"], "at": 3, "del": 1, "ins": [{...}]}
+"""
+import hashlib
+import json
+from datetime import datetime
+from difflib import SequenceMatcher
+
+from invoicemint.services import codec
+
+JOURNAL_VERSION = 1
+
+
+def snapshot_id(payload: bytes) -> str:
+    """Short content hash identifying one snapshot version."""
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+def encode_header(base_id: str) -> bytes:
+    return codec.dumps({"journal": JOURNAL_VERSION, "base": base_id}, compact=True) + b"\n"
+
+
+def encode_entry(ops: list) -> bytes:
+    entry = {"ts": datetime.now().isoformat(timespec="seconds"), "ops": ops}
+    return codec.dumps(entry, compact=True) + b"\n"
+
+
+# ---------- diff ----------
+def clone(value):
+    """Deep copy for JSON-shaped data; much cheaper than copy.deepcopy."""
+    if isinstance(value, dict):
+        return {k: clone(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [clone(v) for v in value]
+    return value
+
+
+def diff(old: dict, new: dict) -> list:
+    """
+    Ops that turn `old` into `new`. Nested dicts (meta, client, totals) are
+    diffed per key; lists (items) become splices, and an item edited in
+    place becomes per-field sets on that item.
+    """
+    ops: list = []
+    _diff_dict(old or {}, new or {}, [], ops, depth=0)
+    return ops
+
+
+def _diff_dict(old: dict, new: dict, path: list, ops: list, depth: int):
+    for key in old:
+        if key not in new:
+            ops.append({"op": "del", "path": path + [key]})
+    for key, value in new.items():
+        if key not in old:
+            ops.append({"op": "set", "path": path + [key], "value": value})
+            continue
+        prev = old[key]
+        if prev == value:
+            continue
+        if depth == 0 and isinstance(prev, dict) and isinstance(value, dict):
+            _diff_dict(prev, value, path + [key], ops, depth + 1)
+        elif depth == 0 and isinstance(prev, list) and isinstance(value, list):
+            _diff_list(prev, value, path + [key], ops)
+        else:
+            ops.append({"op": "set", "path": path + [key], "value": value})
+
+
+def _item_key(item):
+    """Hashable stand-in for a list element (line items are flat dicts)."""
+    try:
+        if isinstance(item, dict):
+            return frozenset(item.items())
+        hash(item)
+        return item
+    except TypeError:
+        return json.dumps(item, sort_keys=True)
+
+
+def _diff_list(old: list, new: list, path: list, ops: list):
+    matcher = SequenceMatcher(
+        None, [_item_key(x) for x in old], [_item_key(x) for x in new], autojunk=False
+    )
+    # Emit from the end so earlier indices stay valid while replaying
+    for tag, i1, i2, j1, j2 in reversed(matcher.get_opcodes()):
+        if tag == "equal":
+            continue
+        if tag == "replace" and i2 - i1 == j2 - j1:
+            # same number of rows edited in place: per-field changes
+            for offset in reversed(range(i2 - i1)):
+                a, b = old[i1 + offset], new[j1 + offset]
+                if isinstance(a, dict) and isinstance(b, dict):
+                    _diff_dict(a, b, path + [i1 + offset], ops, depth=1)
+                else:
+                    ops.append({"op": "set", "path": path + [i1 + offset], "value": b})
+            continue
+        ops.append({
+            "op": "splice",
+            "path": path,
+            "at": i1,
+            "del": i2 - i1,
+            "ins": new[j1:j2],
+        })
+
+
+# ---------- apply / replay ----------
+def apply(doc: dict, ops: list) -> dict:
+    """Apply ops to doc in place and return it."""
+    for op in ops:
+        path = op["path"]
+        parent = doc
+        for key in path[:-1]:
+            parent = parent[key]
+        last = path[-1]
+        kind = op["op"]
+        if kind == "set":
+            parent[last] = op["value"]
+        elif kind == "del":
+            if isinstance(parent, dict):
+                parent.pop(last, None)
+            else:
+                del parent[last]
+        elif kind == "splice":
+            seq = parent[last]
+            at = op["at"]
+            seq[at:at + op["del"]] = op["ins"]
+        else:
+            raise ValueError(f"unknown journal op {kind!r}")
+    return doc
+
+
+def replay(doc: dict, journal: bytes, base_id: str) -> tuple[dict, bool]:
+    """
+    Apply a journal's entries to the snapshot `doc` (in place).
+
+    Returns (doc, applies) where applies is False when the journal belongs
+    to a different snapshot and was ignored. Replay stops at the first
+    unreadable entry (e.g. a torn final line after a crash).
+    """
+    lines = journal.splitlines()
+    if not lines:
+        return doc, False
+    try:
+        header = codec.loads(lines[0])
+    except ValueError:
+        return doc, False
+    if not isinstance(header, dict) or header.get("base") != base_id:
+        return doc, False
+
+    for line in lines[1:]:
+        try:
+            entry = codec.loads(line)
+            apply(doc, entry["ops"])
+        except Exception:
+            break
+    return doc, True
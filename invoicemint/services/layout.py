@@ -0,0 +1,236 @@
+# invoicemint/services/layout.py
+"""
+On-disk layout of the JSON drafts directory.
+
+Drafts are spread over 256 shard directories named after the first byte
+of a hash of the file name:
+
+    drafts/3f/invoice-1001.json
+    drafts/3f/.journal/invoice-1001.jsonl
+    drafts/a0/quote-2001.json
+
+The shard follows from the name alone, so finding a draft by name is one
+path computation and one stat, however many drafts there are, and no
+single directory grows past a few hundred entries per 100k drafts.
+
+Older versions kept every draft flat in drafts/. Those files are moved
+into their shard in the background (see start_migration), or on the spot
+when one is looked up first, so the app keeps working while a large
+folder migrates. Moves are renames within one file system and keep each
+file's mtime, so caches keyed on stat data stay valid. When a draft
+exists both flat and in its shard, the newer file (by mtime) wins and the
+other is set aside in drafts/.superseded/, never deleted.
+"""
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+
+JOURNAL_DIRNAME = ".journal"
+SUPERSEDED_DIRNAME = ".superseded"
+
+
+def shard_of(name: str) -> str:
+    """Shard directory name for a draft file name."""
+    return hashlib.blake2b(name.encode("utf-8"), digest_size=1).hexdigest()
+
+
+def _is_shard(name: str) -> bool:
+    return len(name) == 2 and all(c in "0123456789abcdef" for c in name)
+
+
+def _is_draft(name: str) -> bool:
+    return name.endswith(".json") and not name.startswith(".")
+
+
+class DraftsLayout:
+    """
+    Sharded drafts directory rooted at `root`.
+
+    lock: held while a draft is being moved, so readers that take it see
+          a draft and its journal either both at the old place or both at
+          the new one
+    """
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self.lock = threading.RLock()
+        self._made: set[str] = set()
+        self._migration: threading.Thread | None = None
+
+    # ---------- paths ----------
+    def path(self, name: str) -> Path:
+        """Where draft `name` lives (whether or not it exists)."""
+        return self.root / shard_of(name) / name
+
+    def legacy_path(self, name: str) -> Path:
+        return self.root / name
+
+    @staticmethod
+    def journal_path(path: Path) -> Path:
+        """drafts/3f/invoice-1001.json -> drafts/3f/.journal/invoice-1001.jsonl"""
+        path = Path(path)
+        return path.parent / JOURNAL_DIRNAME / f"{path.name}l"
+
+    def contains(self, path: str | Path) -> bool:
+        """True if path names a draft in this directory (sharded or flat)."""
+        parent = Path(path).parent
+        return parent == self.root or (parent.parent == self.root and _is_shard(parent.name))
+
+    def find(self, name: str) -> Path | None:
+        """Existing file for draft `name`, sharded or not yet migrated; None if absent."""
+        for p in (self.path(name), self.legacy_path(name)):
+            if p.is_file():
+                return p
+        return None
+
+    def locate(self, name: str) -> Path:
+        """
+        Path to read or write draft `name` at. A draft still in the flat
+        layout is moved into its shard first; the shard directory is
+        created if needed.
+        """
+        path = self.path(name)
+        with self.lock:
+            if not path.exists() and self.legacy_path(name).is_file():
+                if not self._move(name):
+                    return self.legacy_path(name)
+            self._ensure_shard(path.parent)
+        return path
+
+    def _ensure_shard(self, directory: Path):
+        if directory.name not in self._made:
+            directory.mkdir(parents=True, exist_ok=True)
+            self._made.add(directory.name)
+
+    # ---------- listing ----------
+    def scan(self):
+        """
+        os.DirEntry for every draft file. Flat leftovers come first, then
+        the shards, so a file moved mid-scan is seen twice rather than
+        missed.
+        """
+        try:
+            with os.scandir(self.root) as it:
+                entries = list(it)
+        except OSError:
+            return
+        shards = []
+        for entry in entries:
+            try:
+                if _is_draft(entry.name) and entry.is_file():
+                    yield entry
+                elif _is_shard(entry.name) and entry.is_dir():
+                    shards.append(entry.path)
+            except OSError:
+                continue
+        for shard in sorted(shards):
+            try:
+                with os.scandir(shard) as it:
+                    for entry in it:
+                        try:
+                            if _is_draft(entry.name) and entry.is_file():
+                                yield entry
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+
+    def legacy_names(self) -> list[str]:
+        """Drafts still in the flat layout."""
+        try:
+            with os.scandir(self.root) as it:
+                return [e.name for e in it if _is_draft(e.name) and e.is_file()]
+        except OSError:
+            return []
+
+    # ---------- migration ----------
+    def _move(self, name: str) -> bool:
+        """Move one flat draft (and its journal) into its shard. Call with lock held."""
+        src, dest = self.legacy_path(name), self.path(name)
+        self._ensure_shard(dest.parent)
+        src_journal, dest_journal = self.journal_path(src), self.journal_path(dest)
+        try:
+            os.replace(src, dest)
+        except FileNotFoundError:
+            return dest.exists()
+        except OSError:
+            return False
+        if src_journal.exists():
+            try:
+                dest_journal.parent.mkdir(exist_ok=True)
+                os.replace(src_journal, dest_journal)
+            except OSError:
+                pass
+        return True
+
+    def _set_aside(self, path: Path) -> bool:
+        """Move a draft file (and its journal) into drafts/.superseded/. Call with lock held."""
+        aside = self.root / SUPERSEDED_DIRNAME
+        stem, n = path.stem, 1
+        dest = aside / path.name
+        while dest.exists():
+            n += 1
+            dest = aside / f"{stem}-{n}{path.suffix}"
+        try:
+            aside.mkdir(exist_ok=True)
+            os.replace(path, dest)
+        except OSError:
+            return False
+        journal = self.journal_path(path)
+        if journal.exists():
+            try:
+                self.journal_path(dest).parent.mkdir(exist_ok=True)
+                os.replace(journal, self.journal_path(dest))
+            except OSError:
+                pass
+        return True
+
+    def migrate(self, limit: int | None = None, pause: float = 0.0) -> int:
+        """
+        Move flat drafts into their shards, one at a time. Returns how many
+        were moved. pause: seconds to sleep between moves, to stay out of
+        the way of the UI.
+        """
+        moved = 0
+        for name in self.legacy_names():
+            if limit is not None and moved >= limit:
+                break
+            with self.lock:
+                src, dest = self.legacy_path(name), self.path(name)
+                if dest.exists():
+                    # both copies exist (e.g. a script or a restored backup
+                    # wrote the flat one): keep the newer where listings
+                    # look, set the other aside
+                    try:
+                        flat_newer = src.stat().st_mtime_ns > dest.stat().st_mtime_ns
+                    except OSError:
+                        continue
+                    if not self._set_aside(dest if flat_newer else src) or not flat_newer:
+                        continue
+                if self._move(name):
+                    moved += 1
+            if pause:
+                time.sleep(pause)
+        return moved
+
+    def start_migration(self, pause: float = 0.001, on_done=None):
+        """Migrate flat drafts on a background thread, if there are any."""
+        if self._migration is not None and self._migration.is_alive():
+            return
+        if not self.legacy_names():
+            return
+
+        def run():
+            moved = self.migrate(pause=pause)
+            if on_done is not None:
+                on_done(moved)
+
+        self._migration = threading.Thread(target=run, name="invoicemint-drafts-migration",
+                                           daemon=True)
+        self._migration.start()
+
+    def wait_migration(self, timeout: float | None = None):
+        if self._migration is not None:
+            self._migration.join(timeout)
@@ -0,0 +1,182 @@
+# invoicemint/services/manifest.py
+import os
+import threading
+from pathlib import Path
+
+from invoicemint.services import codec
+
+MANIFEST_VERSION = 1
+
+
+class DraftManifest:
+    """
+    Persistent cache of per-draft summary fields.
+
+    Each entry is keyed by draft file name and holds the list-view fields
+    (doc_type, client_name, number, date, due_date, total, status) together
+    with the file's size/mtime at the time it was summarized. The manifest
+    is only a cache: reconcile() re-checks it against directory stat data,
+    so a stale or missing manifest file costs a few re-parses, never wrong
+    results.
+    """
+
+    def __init__(self, path: str | Path, layout, summarize):
+        """
+        path: where the manifest JSON is kept
+        layout: DraftsLayout of the drafts directory (see layout.py)
+        summarize: callable(Path) -> dict of summary fields for one draft
+        """
+        self.path = Path(path)
+        self.layout = layout
+        self._summarize = summarize
+        self._entries: dict[str, dict] = {}
+        self._dirty = False
+        self._lock = threading.RLock()
+        self._load()
+
+    # ---------- persistence ----------
+    def _load(self):
+        try:
+            raw = codec.loads(self.path.read_bytes())
+        except Exception:
+            return
+        if isinstance(raw, dict) and raw.get("version") == MANIFEST_VERSION:
+            entries = raw.get("entries")
+            if isinstance(entries, dict):
+                self._entries = entries
+
+    def save(self, force: bool = False):
+        """Write the manifest if it changed since the last save."""
+        with self._lock:
+            if not (self._dirty or force):
+                return
+            payload = codec.dumps(
+                {"version": MANIFEST_VERSION, "entries": self._entries},
+                compact=True,
+            )
+            self._dirty = False
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        try:
+            tmp.write_bytes(payload)
+            os.replace(tmp, self.path)
+        except Exception:
+            with self._lock:
+                self._dirty = True
+
+    # ---------- reconciliation ----------
+    def reconcile(self) -> bool:
+        """
+        Bring the manifest in line with the drafts directory using stat data
+        only. Drafts whose size or mtime changed (or that are new) are
+        re-summarized; entries for vanished files are dropped.
+
+        Returns True when anything changed.
+        """
+        changed = False
+        seen = set()
+        for entry in self.layout.scan():
+            name = entry.name
+            if name in seen:
+                continue  # moved into its shard during the scan
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            seen.add(name)
+            with self._lock:
+                cur = self._entries.get(name)
+            if cur and self._matches(cur, st):
+                continue
+            summary = self._summarize(Path(entry.path))
+            with self._lock:
+                self._entries[name] = self._entry(summary, st)
+            changed = True
+
+        with self._lock:
+            for name in [n for n in self._entries if n not in seen]:
+                del self._entries[name]
+                changed = True
+            if changed:
+                self._dirty = True
+
+        if changed:
+            self.save()
+        return changed
+
+    def refresh(self, names) -> bool:
+        """
+        reconcile() limited to the given file names, for when a watcher
+        already knows which drafts changed. Returns True when anything changed.
+        """
+        changed = False
+        for name in names:
+            path = self.layout.find(name)
+            try:
+                st = os.stat(path) if path is not None else None
+            except OSError:
+                st = None
+            with self._lock:
+                cur = self._entries.get(name)
+                if st is None:
+                    if cur is not None:
+                        del self._entries[name]
+                        self._dirty = changed = True
+                    continue
+            if cur and self._matches(cur, st):
+                continue
+            summary = self._summarize(path)
+            with self._lock:
+                self._entries[name] = self._entry(summary, st)
+                self._dirty = changed = True
+        return changed
+
+    # ---------- updates from the drafts API ----------
+    def update(self, name: str, summary: dict, stat: os.stat_result):
+        with self._lock:
+            self._entries[name] = self._entry(summary, stat)
+            self._dirty = True
+
+    def remove(self, name: str):
+        with self._lock:
+            if self._entries.pop(name, None) is not None:
+                self._dirty = True
+
+    def rename(self, name: str, new_name: str, stat: os.stat_result | None = None):
+        with self._lock:
+            entry = self._entries.pop(name, None)
+            if entry is None:
+                return
+            if stat is not None:
+                entry = {**entry, "size": stat.st_size,
+                         "mtime": stat.st_mtime, "mtime_ns": stat.st_mtime_ns}
+            self._entries[new_name] = entry
+            self._dirty = True
+
+    # ---------- queries ----------
+    def get(self, name: str) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(name)
+        return dict(entry, name=name) if entry is not None else None
+
+    def entries(self) -> list[dict]:
+        """All entries as dicts with a "name" key, sorted by name."""
+        with self._lock:
+            items = sorted(self._entries.items())
+        return [dict(e, name=n) for n, e in items]
+
+    def __len__(self):
+        return len(self._entries)
+
+    # ---------- helpers ----------
+    @staticmethod
+    def _matches(entry: dict, st: os.stat_result) -> bool:
+        return entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns
+
+    @staticmethod
+    def _entry(summary: dict, st: os.stat_result) -> dict:
+        return {
+            **(summary or {}),
+            "size": st.st_size,
+            "mtime": st.st_mtime,
+            "mtime_ns": st.st_mtime_ns,
+        }
@@ -0,0 +1,236 @@
+# invoicemint/services/models.py
+"""
+Typed document model shared by the builder, storage and the PDF engine.
+
+Drafts on disk stay plain JSON in the shape InvoiceBuilder has always
+written. Document.from_state() is the single place that copes with the
+older shapes (flat client_name, invoice_date/issue_date, kind instead of
+doc_type, numbers stored as strings); everything downstream reads typed
+attributes instead of repeating .get() chains and float() coercion.
+"""
+from dataclasses import dataclass, field
+
+DOC_TYPES = ("invoice", "quote")
+_CLIENT_FIELDS = ("name", "business", "email", "address", "phone")
+
+
+def _num(value) -> float:
+    """float() that treats None, "" and junk as 0.0."""
+    if value.__class__ is float:
+        return value
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _str(value) -> str:
+    if value is None:
+        return ""
+    return value if value.__class__ is str else str(value)
+
+
+@dataclass(slots=True)
+class Client:
+    name: str = ""
+    business: str = ""
+    email: str = ""
+    address: str = ""
+    phone: str = ""
+    extra: dict = field(default_factory=dict)  # keys we don't model (kept on round trip)
+
+    @property
+    def display_name(self) -> str:
+        return self.business or self.name
+
+    @classmethod
+    def from_dict(cls, data: dict | None) -> "Client":
+        data = data or {}
+        extra = {k: v for k, v in data.items() if k not in _CLIENT_FIELDS}
+        return cls(
+            name=_str(data.get("name")),
+            business=_str(data.get("business")),
+            email=_str(data.get("email")),
+            address=_str(data.get("address")),
+            phone=_str(data.get("phone")),
+            extra=extra,
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            **self.extra,
+            "name": self.name,
+            "business": self.business,
+            "address": self.address,
+            "email": self.email,
+            "phone": self.phone,
+        }
+
+
+@dataclass(slots=True)
+class LineItem:
+    service: str = ""
+    description: str = ""
+    qty: float = 0.0
+    unit_price: float = 0.0
+    tax_pct: float = 0.0
+
+    @property
+    def net(self) -> float:
+        return self.qty * self.unit_price
+
+    @property
+    def tax(self) -> float:
+        return self.qty * self.unit_price * (self.tax_pct / 100.0)
+
+    @property
+    def total(self) -> float:
+        return self.qty * self.unit_price * (1 + self.tax_pct / 100.0)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LineItem":
+        return cls(
+            _str(data.get("service")),
+            _str(data.get("description")),
+            _num(data.get("qty")),
+            _num(data.get("unit_price")),
+            _num(data.get("tax_pct")),
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "service": self.service,
+            "description": self.description,
+            "qty": self.qty,
+            "unit_price": self.unit_price,
+            "tax_pct": self.tax_pct,
+        }
+
+
+@dataclass(slots=True)
+class Totals:
+    subtotal: float = 0.0
+    tax: float = 0.0
+    grand_total: float = 0.0
+
+    @classmethod
+    def from_items(cls, items: list[LineItem]) -> "Totals":
+        subtotal = sum(it.net for it in items)
+        tax = sum(it.tax for it in items)
+        return cls(subtotal, tax, subtotal + tax)
+
+    def to_dict(self) -> dict:
+        return {"subtotal": self.subtotal, "tax": self.tax, "grand_total": self.grand_total}
+
+
+@dataclass(slots=True)
+class Document:
+    doc_type: str = "invoice"
+    number: str = ""
+    date: str = ""
+    due_date: str = ""
+    terms: str = ""
+    status: str = ""
+    client: Client = field(default_factory=Client)
+    items: list[LineItem] = field(default_factory=list)
+    totals: Totals = field(default_factory=Totals)
+    notes: str | None = None  # None = never set (builder falls back to default notes)
+    converted_from_quote: str = ""
+    created_at: str = ""
+
+    @property
+    def title(self) -> str:
+        return "Quote" if self.doc_type == "quote" else "Invoice"
+
+    @property
+    def client_name(self) -> str:
+        return self.client.display_name or "Unknown client"
+
+    # ---------- decode ----------
+    @classmethod
+    def from_state(cls, data: dict | None) -> "Document":
+        """Normalize any stored draft / builder state dict into a Document."""
+        data = data or {}
+        meta = data.get("meta") or {}
+
+        doc_type = _str(data.get("doc_type")).lower()
+        if doc_type not in DOC_TYPES:
+            kind = _str(data.get("kind")).lower()
+            doc_type = kind if kind in DOC_TYPES else "invoice"
+
+        client = Client.from_dict(data.get("client"))
+        if not client.display_name and data.get("client_name"):
+            client.name = _str(data.get("client_name"))
+
+        items = [LineItem.from_dict(it) for it in data.get("items") or () if isinstance(it, dict)]
+
+        raw_totals = data.get("totals")
+        if isinstance(raw_totals, dict):
+            totals = Totals(
+                _num(raw_totals.get("subtotal")),
+                _num(raw_totals.get("tax")),
+                _num(raw_totals.get("grand_total")),
+            )
+        else:
+            totals = Totals.from_items(items)
+            if data.get("total_amount") is not None:
+                totals.grand_total = _num(data.get("total_amount"))
+
+        return cls(
+            doc_type=doc_type,
+            number=_str(meta.get("number")),
+            date=_str(meta.get("date") or data.get("date")
+                      or data.get("invoice_date") or data.get("issue_date")),
+            due_date=_str(meta.get("due_date")),
+            terms=_str(meta.get("terms")),
+            status=_str(meta.get("status") or data.get("status")).strip(),
+            client=client,
+            items=items,
+            totals=totals,
+            notes=data["notes"] if isinstance(data.get("notes"), str) else None,
+            converted_from_quote=_str(meta.get("converted_from_quote")
+                                      or data.get("converted_from_quote")),
+            created_at=_str(data.get("created_at")),
+        )
+
+    # ---------- encode ----------
+    def to_state(self) -> dict:
+        """The builder-state dict that drafts are saved as."""
+        meta = {
+            "number": self.number,
+            "date": self.date,
+            "due_date": self.due_date,
+            "terms": self.terms,
+            "status": self.status,
+        }
+        state = {
+            "kind": self.doc_type,
+            "created_at": self.created_at,
+            "client": self.client.to_dict(),
+            "meta": meta,
+            "items": [it.to_dict() for it in self.items],
+            "totals": self.totals.to_dict(),
+            "notes": self.notes or "",
+        }
+        if self.doc_type == "invoice" and self.converted_from_quote:
+            meta["converted_from_quote"] = self.converted_from_quote
+            state["converted_from_quote"] = self.converted_from_quote
+
+        # flat copies kept for older readers
+        state["doc_type"] = self.doc_type
+        state["date"] = self.date
+        state["total_amount"] = self.totals.grand_total
+        state["status"] = self.status
+        return state
+
+    def summary(self) -> dict:
+        """List-view fields (drafts manifest, SQLite columns, recent documents)."""
+        return {
+            "doc_type": self.doc_type,
+            "number": self.number or None,
+            "client_name": self.client_name,
+            "date": self.date or None,
+            "due_date": self.due_date or None,
+            "status": self.status,
+            "total": self.totals.grand_total,
+        }
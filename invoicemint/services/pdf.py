@@ -1,3 +1,10 @@
+import io
+import os
+from collections import OrderedDict
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
@@ -6,6 +13,13 @@ from reportlab.lib.units import mm
 from reportlab.lib.utils import ImageReader
 from reportlab.pdfbase import pdfmetrics
 
+from invoicemint.services.models import Document
+
+try:
+    from PIL import Image as PILImage
+except ImportError:  # reportlab still draws PNG/JPEG logos, just not downscaled
+    PILImage = None
+
 # ---------- text helpers ----------
 def _draw_text(c, x, y, text, size=10, bold=False):
     c.setFont("Helvetica-Bold" if bold else "Helvetica", size)
@@ -17,41 +31,154 @@ def _draw_rtext(c, x, y, text, size=10, bold=False):
 
 def _fit_rtext(c, right_x, y, text, max_width, base_size=10, bold=False, min_size=8):
     """Right-aligned text that auto-shrinks if it would exceed max_width."""
-    s = base_size
+    text = text or ""
     font = "Helvetica-Bold" if bold else "Helvetica"
-    while s >= min_size:
-        w = pdfmetrics.stringWidth(text or "", font, s)
-        if w <= max_width:
-            c.setFont(font, s)
-            c.drawRightString(right_x, y, text or "")
-            return
-        s -= 0.5
-    c.setFont(font, min_size)
-    c.drawRightString(right_x, y, text or "")
+    w = _text_width(text, font, base_size)
+    s = base_size
+    if w > max_width:
+        # width grows linearly with the size, so the size that fits is a ratio
+        s = max(min_size, base_size * max_width / w)
+        w = w * s / base_size
+    c.setFont(font, s)
+    c.drawString(right_x - w, y, text)
 
 def _wrap_lines(text, font_name, font_size, max_width):
     """Word-wrap that preserves explicit newlines."""
     if text is None:
         return [""]
     paragraphs = text.splitlines() or [""]
+    # widths of the line so far are kept in font units and grown word by
+    # word instead of re-measuring the whole line for every word
+    space = _glyph_widths(font_name)[" "]
     lines = []
     for para in paragraphs:
         words = para.split()
         if not words:
             lines.append("")  # keep blank line
             continue
-        line = ""
+        line, line_units = "", 0
         for w in words:
-            test = w if not line else f"{line} {w}"
-            if pdfmetrics.stringWidth(test, font_name, font_size) <= max_width:
-                line = test
+            word_units = _text_units(w, font_name)
+            test_units = word_units if not line else line_units + space + word_units
+            if test_units * 0.001 * font_size <= max_width:
+                line = w if not line else f"{line} {w}"
+                line_units = test_units
             else:
                 lines.append(line)
-                line = w
+                line, line_units = w, word_units
         if line:
             lines.append(line)
     return lines or [""]
 
+# ---------- text metrics ----------
+# A string's width is the sum of its glyph widths (reportlab doesn't
+# kern), so each font gets a glyph table in font units (1/1000 em) filled
+# on first use, and whole strings (words, amounts, labels: the same few
+# thousand over a batch) are memoized on top. Summing units and scaling
+# once matches pdfmetrics.stringWidth to the last bit.
+_TEXT_WIDTH_CACHE = 8192
+
+
+class _GlyphWidths(dict):
+    """char -> advance width in font units for one font, measured on first use."""
+
+    def __init__(self, font_name: str):
+        super().__init__()
+        self.font_name = font_name
+
+    def __missing__(self, ch: str) -> float:
+        units = self[ch] = round(pdfmetrics.stringWidth(ch, self.font_name, 1000), 3)
+        return units
+
+
+_glyph_tables: dict[str, _GlyphWidths] = {}
+
+
+def _glyph_widths(font_name: str) -> _GlyphWidths:
+    table = _glyph_tables.get(font_name)
+    if table is None:
+        table = _glyph_tables[font_name] = _GlyphWidths(font_name)
+    return table
+
+
+@lru_cache(maxsize=_TEXT_WIDTH_CACHE)
+def _text_units(text: str, font_name: str) -> float:
+    return sum(map(_glyph_widths(font_name).__getitem__, text))
+
+
+def _text_width(text: str, font_name: str, font_size: float) -> float:
+    """Same as pdfmetrics.stringWidth, from the glyph tables."""
+    return _text_units(text, font_name) * 0.001 * font_size
+
+# ---------- logo cache ----------
+# Logos are decoded once per file version (path + mtime + size) and
+# downscaled to the size they are drawn at, so a 4000px logo isn't
+# re-decoded for every document or embedded at full resolution in every
+# PDF. settings["pdf"]["logo_dpi"] sets the target resolution.
+LOGO_DPI = 300
+_LOGO_CACHE_MAX = 8
+_logo_decoded: OrderedDict[tuple, tuple] = OrderedDict()    # file key -> (PIL image, format)
+_logo_readers: OrderedDict[tuple, ImageReader] = OrderedDict()  # + (box, dpi)
+
+
+def _lru_put(cache: OrderedDict, key, value):
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > _LOGO_CACHE_MAX:
+        cache.popitem(last=False)
+
+
+def _logo_file_key(logo_path: str) -> tuple:
+    st = os.stat(logo_path)
+    return (str(logo_path), st.st_mtime_ns, st.st_size)
+
+
+def _decoded_logo(file_key: tuple):
+    """(PIL image, source format) for a logo file version."""
+    hit = _logo_decoded.get(file_key)
+    if hit is None:
+        with PILImage.open(file_key[0]) as f:
+            fmt = f.format
+            img = f.copy() if f.mode in ("RGB", "RGBA", "L", "LA") else f.convert("RGBA")
+        hit = (img, fmt)
+        _lru_put(_logo_decoded, file_key, hit)
+    return hit
+
+
+def _logo_image(logo_path: str, box: float, settings: dict | None = None) -> ImageReader:
+    """
+    Logo to draw inside a box x box points square, cached. Images with more
+    pixels than the box needs at the target DPI come back downscaled.
+    """
+    dpi = ((settings or {}).get("pdf") or {}).get("logo_dpi") or LOGO_DPI
+    file_key = _logo_file_key(logo_path)
+    key = (*file_key, round(box, 2), dpi)
+    reader = _logo_readers.get(key)
+    if reader is not None:
+        _logo_readers.move_to_end(key)
+        return reader
+    if PILImage is None:
+        reader = ImageReader(logo_path)
+    else:
+        img, fmt = _decoded_logo(file_key)
+        target = max(1, round(box / 72 * dpi))
+        scale = target / max(img.size)
+        if scale < 1:
+            size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+            small = img.resize(size, PILImage.LANCZOS)
+            if fmt == "JPEG" and small.mode in ("RGB", "L"):
+                # keep photos as JPEG: far smaller in the PDF than raw pixels
+                buf = io.BytesIO()
+                small.save(buf, "JPEG", quality=90)
+                buf.seek(0)
+                reader = ImageReader(buf)
+            else:
+                reader = ImageReader(small)
+        else:
+            reader = ImageReader(logo_path)  # small enough; JPEGs embed as they are
+    _lru_put(_logo_readers, key, reader)
+    return reader
+
 # ---------- watermark helper ----------
 def _draw_status_watermark(c, status_text: str):
     """
@@ -77,9 +204,15 @@ def _draw_status_watermark(c, status_text: str):
         c.restoreState()
 
 # ---------- public entry ----------
-def generate_invoice_pdf(state: dict, settings: dict, out_path: str):
+def generate_invoice_pdf(state: dict | Document, settings: dict, out=None):
     """
     Public entry: choose template based on settings["pdf"]["template"].
+    state may be a builder/draft dict or an already-normalized Document.
+
+    out is where the PDF goes:
+    - a file path (str or Path)   => written there; the path is returned
+    - a binary file-like object   => written to it; the object is returned
+    - None                        => nothing touches the disk; the PDF bytes are returned
 
     - "Modern"  => _generate_invoice_pdf_modern
     - "Compact" => _generate_invoice_pdf_compact
@@ -87,34 +220,30 @@ def generate_invoice_pdf(state: dict, settings: dict, out_path: str):
     """
     pdf_cfg = (settings or {}).get("pdf") or {}
     template = (pdf_cfg.get("template") or "Modern").lower()
+    doc = state if isinstance(state, Document) else Document.from_state(state)
 
+    sink = io.BytesIO() if out is None else (str(out) if isinstance(out, Path) else out)
     if template == "compact":
-        return _generate_invoice_pdf_compact(state, settings, out_path)
+        _generate_invoice_pdf_compact(doc, settings, sink)
     elif template == "minimal":
-        return _generate_invoice_pdf_minimal(state, settings, out_path)
+        _generate_invoice_pdf_minimal(doc, settings, sink)
     else:
-        return _generate_invoice_pdf_modern(state, settings, out_path)
+        _generate_invoice_pdf_modern(doc, settings, sink)
+    return sink.getvalue() if out is None else out
 
 # ============================================================
 # MODERN template implementation
 # ============================================================
-def _generate_invoice_pdf_modern(state: dict, settings: dict, out_path: str):
+def _generate_invoice_pdf_modern(doc: Document, settings: dict, out):
     company = (settings or {}).get("company", {})
-    client  = (state or {}).get("client", {}) or {}
-    meta    = (state or {}).get("meta", {}) or {}
+    client  = doc.client
 
-    # Use doc_type if present; fall back to kind/invoice
-    doc_type  = (state or {}).get("doc_type") or ("invoice" if state.get("kind") == "invoice" else "quote")
-    doc_title = "Quote" if str(doc_type).lower() == "quote" else "Invoice"
+    doc_title = doc.title
 
     # If this invoice was converted from a quote, pick up that info
-    converted_from = (
-        meta.get("converted_from_quote")
-        or state.get("converted_from_quote")
-        or ""
-    )
+    converted_from = doc.converted_from_quote
 
-    c = canvas.Canvas(out_path, pagesize=A4)
+    c = canvas.Canvas(out, pagesize=A4)
     c.setTitle(doc_title)
 
     PAGE_W, PAGE_H = A4
@@ -123,7 +252,7 @@ def _generate_invoice_pdf_modern(state: dict, settings: dict, out_path: str):
     CONTENT_R = PAGE_W - MARGIN - RIGHT_GUTTER  # right margin alignment
 
     # Status watermark on first page
-    status = (meta.get("status") or "").upper()
+    status = doc.status.upper()
     _draw_status_watermark(c, status)
 
     # ====== COLUMN RIGHT-EDGES (numeric columns) ======
@@ -163,7 +292,7 @@ def _generate_invoice_pdf_modern(state: dict, settings: dict, out_path: str):
     logo_w = logo_h = 25 * mm
     if logo_path and Path(logo_path).exists():
         try:
-            img = ImageReader(logo_path)
+            img = _logo_image(logo_path, logo_w, settings)
             c.drawImage(img, MARGIN, y_top - logo_h + 5, width=logo_w, height=logo_h,
                         preserveAspectRatio=True, mask='auto')
             left_x = MARGIN + logo_w + 6*mm
@@ -189,11 +318,11 @@ def _generate_invoice_pdf_modern(state: dict, settings: dict, out_path: str):
     _draw_text(c, right_x, y_right, f"{doc_title} Details", size=12, bold=True)
     y_right -= 16
 
-    status_label = meta.get("status") or ""
+    status_label = doc.status
     lines = [
-        f"{doc_title} #: {meta.get('number','')}",
-        f"Date: {meta.get('date','')}",
-        f"Due: {meta.get('due_date','')}" + (f"  ({meta.get('terms')})" if meta.get('terms') else ""),
+        f"{doc_title} #: {doc.number}",
+        f"Date: {doc.date}",
+        f"Due: {doc.due_date}" + (f"  ({doc.terms})" if doc.terms else ""),
     ]
 
     # Only show "Converted from Quote" on invoices
@@ -209,14 +338,14 @@ def _generate_invoice_pdf_modern(state: dict, settings: dict, out_path: str):
     y_right -= 10
     _draw_text(c, right_x, y_right, "Bill To", size=12, bold=True); y_right -= 14
     for t in filter(None, [
-        client.get("business") or client.get("name"),
-        client.get("address"),
-        client.get("email"),
+        client.display_name,
+        client.address,
+        client.email,
     ]):
         for ln in _wrap_lines(t, "Helvetica", 10, right_w):
             _draw_text(c, right_x, y_right, ln); y_right -= 12
-    if client.get("phone"):
-        _draw_text(c, right_x, y_right, client.get("phone")); y_right -= 12
+    if client.phone:
+        _draw_text(c, right_x, y_right, client.phone); y_right -= 12
 
     # ====== TABLE HEADER ======
     table_top = min(y_left_bottom, y_right) - 10*mm
@@ -237,13 +366,13 @@ def _generate_invoice_pdf_modern(state: dict, settings: dict, out_path: str):
     TOTAL_BOX_H = 30 * mm
     SAFE_FOOTER_Y = (30 * mm) + TOTAL_BOX_H + (8 * mm)
 
-    for it in state.get("items", []):
-        service = it.get("service", "")
-        desc    = it.get("description", "") or ""
-        qty     = float(it.get("qty", 0) or 0)
-        unit    = float(it.get("unit_price", 0) or 0)
-        tax     = float(it.get("tax_pct", 0) or 0)
-        total   = qty * unit * (1 + tax/100.0)
+    for it in doc.items:
+        service = it.service
+        desc    = it.description
+        qty     = it.qty
+        unit    = it.unit_price
+        tax     = it.tax_pct
+        total   = it.total
 
         desc_lines = _wrap_lines(desc, FONT, SIZE, DESC_MAX_W)
         row_height = max(LINE_H, len(desc_lines) * LINE_H)
@@ -273,7 +402,7 @@ def _generate_invoice_pdf_modern(state: dict, settings: dict, out_path: str):
         line_y -= row_height + 2
 
     # ====== TOTALS BOX ======
-    totals = state.get("totals", {})
+    totals = doc.totals
     box_w = 62 * mm
     box_h = TOTAL_BOX_H
     box_x = CONTENT_R - box_w
@@ -284,34 +413,26 @@ def _generate_invoice_pdf_modern(state: dict, settings: dict, out_path: str):
     value_r = box_x + box_w - 6 * mm
     baseline = box_y + box_h - 12
     _draw_text (c, label_x, baseline,      "Subtotal:", bold=True)
-    _draw_rtext(c, value_r, baseline,      f"{totals.get('subtotal',0):.2f}", bold=True)
+    _draw_rtext(c, value_r, baseline,      f"{totals.subtotal:.2f}", bold=True)
     _draw_text (c, label_x, baseline-12,   "Tax:")
-    _draw_rtext(c, value_r, baseline-12,   f"{totals.get('tax',0):.2f}")
+    _draw_rtext(c, value_r, baseline-12,   f"{totals.tax:.2f}")
     _draw_text (c, label_x, box_y+10,      "Grand Total:", bold=True)
-    _draw_rtext(c, value_r, box_y+10,      f"{totals.get('grand_total',0):.2f}", bold=True)
+    _draw_rtext(c, value_r, box_y+10,      f"{totals.grand_total:.2f}", bold=True)
 
     c.showPage()
     c.save()
-    return out_path
 
 # ============================================================
 # COMPACT template (denser: smaller fonts, tighter rows)
 # ============================================================
-def _generate_invoice_pdf_compact(state: dict, settings: dict, out_path: str):
+def _generate_invoice_pdf_compact(doc: Document, settings: dict, out):
     company = (settings or {}).get("company", {})
-    client  = (state or {}).get("client", {}) or {}
-    meta    = (state or {}).get("meta", {}) or {}
-
-    doc_type  = (state or {}).get("doc_type") or ("invoice" if state.get("kind") == "invoice" else "quote")
-    doc_title = "Quote" if str(doc_type).lower() == "quote" else "Invoice"
+    client  = doc.client
 
-    converted_from = (
-        meta.get("converted_from_quote")
-        or state.get("converted_from_quote")
-        or ""
-    )
+    doc_title = doc.title
+    converted_from = doc.converted_from_quote
 
-    c = canvas.Canvas(out_path, pagesize=A4)
+    c = canvas.Canvas(out, pagesize=A4)
     c.setTitle(doc_title)
 
     PAGE_W, PAGE_H = A4
@@ -320,7 +441,7 @@ def _generate_invoice_pdf_compact(state: dict, settings: dict, out_path: str):
     CONTENT_R = PAGE_W - MARGIN - RIGHT_GUTTER
 
     # Status watermark on first page
-    status = (meta.get("status") or "").upper()
+    status = doc.status.upper()
     _draw_status_watermark(c, status)
 
     GAP     = 6 * mm
@@ -359,7 +480,7 @@ def _generate_invoice_pdf_compact(state: dict, settings: dict, out_path: str):
     logo_w = logo_h = 22 * mm
     if logo_path and Path(logo_path).exists():
         try:
-            img = ImageReader(logo_path)
+            img = _logo_image(logo_path, logo_w, settings)
             c.drawImage(img, MARGIN, y_top - logo_h + 4, width=logo_w, height=logo_h,
                         preserveAspectRatio=True, mask='auto')
             left_x = MARGIN + logo_w + 5*mm
@@ -385,11 +506,11 @@ def _generate_invoice_pdf_compact(state: dict, settings: dict, out_path: str):
     _draw_text(c, right_x, y_right, f"{doc_title} Details", size=11, bold=True)
     y_right -= 14
 
-    status_label = meta.get("status") or ""
+    status_label = doc.status
     lines = [
-        f"{doc_title} #: {meta.get('number','')}",
-        f"Date: {meta.get('date','')}",
-        f"Due: {meta.get('due_date','')}" + (f"  ({meta.get('terms')})" if meta.get('terms') else ""),
+        f"{doc_title} #: {doc.number}",
+        f"Date: {doc.date}",
+        f"Due: {doc.due_date}" + (f"  ({doc.terms})" if doc.terms else ""),
     ]
 
     if doc_title == "Invoice" and converted_from:
@@ -404,14 +525,14 @@ def _generate_invoice_pdf_compact(state: dict, settings: dict, out_path: str):
     y_right -= 8
     _draw_text(c, right_x, y_right, "Bill To", size=11, bold=True); y_right -= 12
     for t in filter(None, [
-        client.get("business") or client.get("name"),
-        client.get("address"),
-        client.get("email"),
+        client.display_name,
+        client.address,
+        client.email,
     ]):
         for ln in _wrap_lines(t, "Helvetica", 9, right_w):
             _draw_text(c, right_x, y_right, ln, size=9); y_right -= 11
-    if client.get("phone"):
-        _draw_text(c, right_x, y_right, client.get("phone"), size=9); y_right -= 11
+    if client.phone:
+        _draw_text(c, right_x, y_right, client.phone, size=9); y_right -= 11
 
     # Table header
     table_top = min(y_left_bottom, y_right) - 8*mm
@@ -432,13 +553,13 @@ def _generate_invoice_pdf_compact(state: dict, settings: dict, out_path: str):
     TOTAL_BOX_H = 24 * mm
     SAFE_FOOTER_Y = (26 * mm) + TOTAL_BOX_H + (6 * mm)
 
-    for it in state.get("items", []):
-        service = it.get("service", "")
-        desc    = it.get("description", "") or ""
-        qty     = float(it.get("qty", 0) or 0)
-        unit    = float(it.get("unit_price", 0) or 0)
-        tax     = float(it.get("tax_pct", 0) or 0)
-        total   = qty * unit * (1 + tax/100.0)
+    for it in doc.items:
+        service = it.service
+        desc    = it.description
+        qty     = it.qty
+        unit    = it.unit_price
+        tax     = it.tax_pct
+        total   = it.total
 
         desc_lines = _wrap_lines(desc, FONT, SIZE, DESC_MAX_W)
         row_height = max(LINE_H, len(desc_lines) * LINE_H)
@@ -471,7 +592,7 @@ def _generate_invoice_pdf_compact(state: dict, settings: dict, out_path: str):
         line_y -= row_height + 2
 
     # Totals box
-    totals = state.get("totals", {})
+    totals = doc.totals
     box_w = 60 * mm
     box_h = TOTAL_BOX_H
     box_x = CONTENT_R - box_w
@@ -482,35 +603,27 @@ def _generate_invoice_pdf_compact(state: dict, settings: dict, out_path: str):
     value_r = box_x + box_w - 5 * mm
     baseline = box_y + box_h - 11
     _draw_text (c, label_x, baseline,      "Subtotal:", size=9, bold=True)
-    _draw_rtext(c, value_r, baseline,      f"{totals.get('subtotal',0):.2f}", size=9, bold=True)
+    _draw_rtext(c, value_r, baseline,      f"{totals.subtotal:.2f}", size=9, bold=True)
     _draw_text (c, label_x, baseline-11,   "Tax:",      size=9)
-    _draw_rtext(c, value_r, baseline-11,   f"{totals.get('tax',0):.2f}", size=9)
+    _draw_rtext(c, value_r, baseline-11,   f"{totals.tax:.2f}", size=9)
     _draw_text (c, label_x, box_y+8,       "Grand Total:", size=9, bold=True)
-    _draw_rtext(c, value_r, box_y+8,       f"{totals.get('grand_total',0):.2f}", size=9, bold=True)
+    _draw_rtext(c, value_r, box_y+8,       f"{totals.grand_total:.2f}", size=9, bold=True)
 
     c.showPage()
     c.save()
-    return out_path
 
 # ============================================================
 # MINIMAL template (clean, no dark bar, lots of white)
 # ============================================================
-def _generate_invoice_pdf_minimal(state: dict, settings: dict, out_path: str):
+def _generate_invoice_pdf_minimal(doc: Document, settings: dict, out):
     company = (settings or {}).get("company", {})
-    client  = (state or {}).get("client", {}) or {}
-    meta    = (state or {}).get("meta", {}) or {}
-    notes   = (state or {}).get("notes", "") or ""
-
-    doc_type  = (state or {}).get("doc_type") or ("invoice" if state.get("kind") == "invoice" else "quote")
-    doc_title = "Quote" if str(doc_type).lower() == "quote" else "Invoice"
+    client  = doc.client
+    notes   = doc.notes or ""
 
-    converted_from = (
-        meta.get("converted_from_quote")
-        or state.get("converted_from_quote")
-        or ""
-    )
+    doc_title = doc.title
+    converted_from = doc.converted_from_quote
 
-    c = canvas.Canvas(out_path, pagesize=A4)
+    c = canvas.Canvas(out, pagesize=A4)
     c.setTitle(doc_title)
 
     PAGE_W, PAGE_H = A4
@@ -519,7 +632,7 @@ def _generate_invoice_pdf_minimal(state: dict, settings: dict, out_path: str):
     CONTENT_R = PAGE_W - MARGIN - RIGHT_GUTTER
 
     # Status watermark on first page
-    status = (meta.get("status") or "").upper()
+    status = doc.status.upper()
     _draw_status_watermark(c, status)
 
     GAP     = 6 * mm
@@ -552,7 +665,7 @@ def _generate_invoice_pdf_minimal(state: dict, settings: dict, out_path: str):
     logo_w = logo_h = 20 * mm
     if logo_path and Path(logo_path).exists():
         try:
-            img = ImageReader(logo_path)
+            img = _logo_image(logo_path, logo_w, settings)
             c.drawImage(img, MARGIN, y_top - logo_h + 4, width=logo_w, height=logo_h,
                         preserveAspectRatio=True, mask='auto')
             left_x = MARGIN + logo_w + 5*mm
@@ -574,11 +687,11 @@ def _generate_invoice_pdf_minimal(state: dict, settings: dict, out_path: str):
     _draw_rtext(c, CONTENT_R, title_y, doc_title.upper(), size=14, bold=True)
     y_meta = title_y - 14
 
-    status_label = meta.get("status") or ""
+    status_label = doc.status
     meta_lines = [
-        f"{doc_title} #: {meta.get('number','')}",
-        f"Date: {meta.get('date','')}",
-        f"Due: {meta.get('due_date','')}",
+        f"{doc_title} #: {doc.number}",
+        f"Date: {doc.date}",
+        f"Due: {doc.due_date}",
     ]
 
     if doc_title == "Invoice" and converted_from:
@@ -601,10 +714,10 @@ def _generate_invoice_pdf_minimal(state: dict, settings: dict, out_path: str):
     _draw_text(c, MARGIN, y_bill, "Bill To", size=11, bold=True)
     y_bill -= 12
     bill_lines = [
-        client.get("business") or client.get("name"),
-        client.get("address"),
-        client.get("email"),
-        client.get("phone"),
+        client.display_name,
+        client.address,
+        client.email,
+        client.phone,
     ]
     for t in filter(None, bill_lines):
         for ln in _wrap_lines(t, "Helvetica", 9, 70*mm):
@@ -612,8 +725,8 @@ def _generate_invoice_pdf_minimal(state: dict, settings: dict, out_path: str):
 
     # Maybe a reference / terms on the right (minimal)
     y_ref = y_company - 16
-    if meta.get("terms"):
-        _draw_rtext(c, CONTENT_R, y_ref, meta.get("terms", ""), size=9)
+    if doc.terms:
+        _draw_rtext(c, CONTENT_R, y_ref, doc.terms, size=9)
         y_ref -= 11
 
     # ====== TABLE HEADER ======
@@ -635,13 +748,13 @@ def _generate_invoice_pdf_minimal(state: dict, settings: dict, out_path: str):
     TOTAL_BOX_H = 26 * mm
     SAFE_FOOTER_Y = (26 * mm) + TOTAL_BOX_H + (8 * mm)  # reserved zone at bottom
 
-    for it in state.get("items", []):
-        service = it.get("service", "")
-        desc    = it.get("description", "") or ""
-        qty     = float(it.get("qty", 0) or 0)
-        unit    = float(it.get("unit_price", 0) or 0)
-        tax     = float(it.get("tax_pct", 0) or 0)
-        total   = qty * unit * (1 + tax/100.0)
+    for it in doc.items:
+        service = it.service
+        desc    = it.description
+        qty     = it.qty
+        unit    = it.unit_price
+        tax     = it.tax_pct
+        total   = it.total
 
         desc_lines = _wrap_lines(desc, FONT, SIZE, DESC_MAX_W)
         row_height = max(LINE_H, len(desc_lines) * LINE_H)
@@ -699,7 +812,7 @@ def _generate_invoice_pdf_minimal(state: dict, settings: dict, out_path: str):
         c.setFillColor(colors.black)
 
     # ====== TOTALS (inline, no big box) ======
-    totals = state.get("totals", {})
+    totals = doc.totals
     label_x = X_DESC_L
     value_r = CONTENT_R
 
@@ -708,12 +821,150 @@ def _generate_invoice_pdf_minimal(state: dict, settings: dict, out_path: str):
     c.line(MARGIN, base_y + 22, PAGE_W - MARGIN, base_y + 22)
 
     _draw_text (c, label_x, base_y + 12,  "Subtotal:", size=9, bold=True)
-    _draw_rtext(c, value_r, base_y + 12,  f"{totals.get('subtotal',0):.2f}", size=9, bold=True)
+    _draw_rtext(c, value_r, base_y + 12,  f"{totals.subtotal:.2f}", size=9, bold=True)
     _draw_text (c, label_x, base_y + 0,   "Tax:",      size=9)
-    _draw_rtext(c, value_r, base_y + 0,   f"{totals.get('tax',0):.2f}", size=9)
+    _draw_rtext(c, value_r, base_y + 0,   f"{totals.tax:.2f}", size=9)
     _draw_text (c, label_x, base_y - 12,  "Grand Total:", size=10, bold=True)
-    _draw_rtext(c, value_r, base_y - 12,  f"{totals.get('grand_total',0):.2f}", size=10, bold=True)
+    _draw_rtext(c, value_r, base_y - 12,  f"{totals.grand_total:.2f}", size=10, bold=True)
 
     c.showPage()
     c.save()
-    return out_path
+
+
+# ============================================================
+# BATCH rendering (process pool)
+# ============================================================
+@dataclass(slots=True)
+class PdfResult:
+    source: str              # draft name, or "#<position>" for bare states
+    path: str | None         # the PDF written (None if rendering failed)
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+# per worker process: set once by _init_worker
+_worker_settings: dict | None = None
+
+
+def _plain(value):
+    """Settings as plain dicts/lists (read-only views don't pickle)."""
+    if isinstance(value, Mapping):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    return value
+
+
+def _init_worker(settings: dict):
+    # the logo is decoded by the worker's first document and then cached
+    global _worker_settings
+    _worker_settings = settings
+
+
+def _render_chunk(chunk: list) -> list[tuple]:
+    """Worker: render (position, state, out_path) items, capturing errors per item."""
+    out = []
+    for pos, state, out_path in chunk:
+        try:
+            generate_invoice_pdf(state, _worker_settings, out_path)
+            out.append((pos, None))
+        except Exception as e:
+            out.append((pos, f"{type(e).__name__}: {e}"))
+    return out
+
+
+def _batch_items(states) -> list[tuple]:
+    """(source, state) for states given bare or as (name, state) pairs."""
+    items = []
+    for i, item in enumerate(states):
+        if isinstance(item, tuple) and len(item) == 2 and isinstance(item[0], (str, Path)):
+            items.append((Path(item[0]).name, item[1]))
+        else:
+            items.append((f"#{i + 1}", item))
+    return items
+
+
+def _batch_filename(source: str, state, taken: set) -> str:
+    if source.startswith("#"):
+        try:
+            doc = state if isinstance(state, Document) else Document.from_state(state)
+            stem = f"{doc.title}-{doc.number}" if doc.number else f"{doc.title}-{source[1:]}"
+        except Exception:
+            # not a document: rendering it fails too, and its result says why
+            stem = f"document-{source[1:]}"
+    else:
+        stem = Path(source).stem
+    stem = "".join(ch if ch.isalnum() or ch in "-_. " else "_" for ch in stem).strip() or "document"
+    name, n = f"{stem}.pdf", 1
+    while name.lower() in taken:
+        n += 1
+        name = f"{stem}-{n}.pdf"
+    taken.add(name.lower())
+    return name
+
+
+def generate_invoice_pdfs(states, settings: dict, out_dir: str | Path, workers: int | None = None,
+                          chunksize: int | None = None, progress=None) -> list[PdfResult]:
+    """
+    Render many documents to PDFs in out_dir, in parallel worker processes.
+
+    states:    builder/draft dicts or Documents, or (name, state) pairs; a
+               PDF is named after the draft name, else "<Title>-<number>.pdf"
+    workers:   processes to use (default: CPU count); 1 renders in this process
+    chunksize: documents per task (default: a few tasks per worker)
+    progress:  progress(done, total), called in this process as tasks finish
+
+    Each worker receives the settings once and, through the logo cache,
+    decodes the logo once. A document that fails to render doesn't stop
+    the batch: its result carries the error. Results come back in input
+    order.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    settings = _plain(settings or {})
+    taken: set[str] = set()
+    items = [(source, state, str(out_dir / _batch_filename(source, state, taken)))
+             for source, state in _batch_items(states)]
+    results = [PdfResult(source, path) for source, _state, path in items]
+    total = len(items)
+    if not items:
+        return results
+
+    def record(done_chunk):
+        for pos, error in done_chunk:
+            if error is not None:
+                results[pos].path, results[pos].error = None, error
+
+    workers = max(1, min(workers or os.cpu_count() or 1, total))
+    if workers == 1:
+        for pos, (_source, state, path) in enumerate(items):
+            try:
+                generate_invoice_pdf(state, settings, path)
+            except Exception as e:
+                record([(pos, f"{type(e).__name__}: {e}")])
+            if progress is not None:
+                progress(pos + 1, total)
+        return results
+
+    if chunksize is None:
+        chunksize = max(1, min(32, -(-total // (workers * 4))))
+    tasks = [[(pos, state, path) for pos, (_source, state, path)
+              in enumerate(items[start:start + chunksize], start)]
+             for start in range(0, total, chunksize)]
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(settings,)) as pool:
+        futures = {pool.submit(_render_chunk, task): task for task in tasks}
+        for fut in as_completed(futures):
+            task = futures[fut]
+            try:
+                record(fut.result())
+            except Exception as e:  # the worker died (e.g. unpicklable state)
+                record([(pos, f"{type(e).__name__}: {e}") for pos, _state, _path in task])
+            done += len(task)
+            if progress is not None:
+                progress(done, total)
+    return results
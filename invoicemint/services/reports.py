@@ -0,0 +1,270 @@
+# invoicemint/services/reports.py
+"""
+Running totals over all invoices and quotes, for the dashboard and reports.
+
+Every document contributes one record (its doc_type, status, client, month
+and amounts) to a set of rollups: count, subtotal, tax and grand total per
+value of each dimension in DIMENSIONS, over all documents and per doc_type
+("invoices in March"), plus a grand rollup of everything.
+A changed document takes its old record out and puts the new one in, so
+keeping the rollups current costs the same whether there are ten
+documents or a hundred thousand, and reading one is a dict lookup.
+
+Amounts are summed in integer cents so adding and removing the same
+document many times never drifts.
+
+The records are saved to a JSON file (see save) with the mtime each was
+computed at, so a restart only re-reads documents that changed since.
+As in search.py, a None stamp means "recorded straight from a save".
+"""
+import threading
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+
+from invoicemint.services import codec
+from invoicemint.services.models import Document
+from invoicemint.services.writer import atomic_write_bytes
+
+ROLLUPS_VERSION = 1
+DIMENSIONS = ("doc_type", "status", "client", "month")
+PAID = "PAID"
+OVERDUE = "OVERDUE"
+SYNC_BATCH = 500
+
+# record layout: [stamp, doc_type, status, client, month, due_date, subtotal, tax, total]
+_STAMP, _TYPE, _STATUS, _CLIENT, _MONTH, _DUE, _SUB = 0, 1, 2, 3, 4, 5, 6
+
+
+def _cents(value: float) -> int:
+    return int(round(value * 100))
+
+
+@dataclass(slots=True)
+class Rollup:
+    count: int = 0
+    subtotal: float = 0.0
+    tax: float = 0.0
+    grand_total: float = 0.0
+
+    @classmethod
+    def from_cents(cls, sums: list | None) -> "Rollup":
+        if not sums:
+            return cls()
+        count, sub, tax, total = sums
+        return cls(count, sub / 100, tax / 100, total / 100)
+
+    def to_dict(self) -> dict:
+        return {"count": self.count, "subtotal": self.subtotal, "tax": self.tax,
+                "grand_total": self.grand_total}
+
+
+def document_record(data: dict, stamp: float | None = None) -> list:
+    """The rollup record of one draft dict (see the record layout above)."""
+    doc = Document.from_state(data)
+    month = doc.date[:7] if len(doc.date) >= 7 and doc.date[4:5] == "-" else ""
+    return [
+        stamp,
+        doc.doc_type,
+        doc.status.upper(),
+        doc.client_name,
+        month,
+        doc.due_date[:10],
+        _cents(doc.totals.subtotal),
+        _cents(doc.totals.tax),
+        _cents(doc.totals.grand_total),
+    ]
+
+
+class ReportRollups:
+    """Rollups of every document, persisted in `path`."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._records: dict[str, list] = {}
+        self._all = [0, 0, 0, 0]
+        self._groups: dict[tuple, list] = {}    # (dimension, value, doc_type or None) -> sums
+        # unpaid invoices by (due date, marked OVERDUE) -> sums, for
+        # outstanding/overdue figures that depend on today's date
+        self._unpaid: dict[tuple, list] = {}
+        self._dirty = False
+        self._load()
+
+    # ---------- persistence ----------
+    def _load(self):
+        try:
+            raw = codec.loads(self.path.read_bytes())
+        except (OSError, ValueError):
+            return
+        if not isinstance(raw, dict) or raw.get("version") != ROLLUPS_VERSION:
+            return
+        for name, rec in (raw.get("records") or {}).items():
+            if isinstance(rec, list) and len(rec) == 9:
+                self._add(name, rec)
+        self._dirty = False
+
+    def save(self, force: bool = False):
+        """Write the records if anything changed since the last save."""
+        with self._lock:
+            if not (self._dirty or force):
+                return
+            payload = codec.dumps({"version": ROLLUPS_VERSION, "records": self._records},
+                                  compact=True)
+            self._dirty = False
+        try:
+            atomic_write_bytes(self.path, payload)
+        except OSError:
+            with self._lock:
+                self._dirty = True
+
+    # ---------- bookkeeping ----------
+    @staticmethod
+    def _bump(sums: list, rec: list, sign: int):
+        sums[0] += sign
+        sums[1] += sign * rec[_SUB]
+        sums[2] += sign * rec[_SUB + 1]
+        sums[3] += sign * rec[_SUB + 2]
+
+    def _apply(self, rec: list, sign: int):
+        self._bump(self._all, rec, sign)
+        for dim, value in zip(DIMENSIONS, rec[_TYPE:_MONTH + 1]):
+            for key in ((dim, value, None), (dim, value, rec[_TYPE])):
+                sums = self._groups.get(key)
+                if sums is None:
+                    sums = self._groups[key] = [0, 0, 0, 0]
+                self._bump(sums, rec, sign)
+                if not sums[0]:
+                    del self._groups[key]
+        if rec[_TYPE] == "invoice" and rec[_STATUS] != PAID:
+            key = (rec[_DUE], rec[_STATUS] == OVERDUE)
+            sums = self._unpaid.setdefault(key, [0, 0, 0, 0])
+            self._bump(sums, rec, sign)
+            if not sums[0]:
+                del self._unpaid[key]
+
+    def _add(self, name: str, rec: list):
+        old = self._records.get(name)
+        if old is not None:
+            self._apply(old, -1)
+        self._records[name] = rec
+        self._apply(rec, 1)
+        self._dirty = True
+
+    def _discard(self, name: str) -> bool:
+        old = self._records.pop(name, None)
+        if old is None:
+            return False
+        self._apply(old, -1)
+        self._dirty = True
+        return True
+
+    # ---------- updates ----------
+    def put(self, name: str, data: dict, stamp: float | None = None):
+        """Count document `name` with its current content."""
+        rec = document_record(data, stamp)
+        with self._lock:
+            self._add(name, rec)
+
+    def remove(self, name: str) -> bool:
+        with self._lock:
+            return self._discard(name)
+
+    def rename(self, name: str, new_name: str) -> bool:
+        with self._lock:
+            rec = self._records.get(name)
+            if rec is None or name == new_name:
+                return rec is not None
+            self._discard(name)
+            self._add(new_name, [None, *rec[1:]])
+            return True
+
+    def sync(self, entries, load, complete: bool = True, progress=None) -> int:
+        """
+        Bring the rollups in line with `entries`: iterable of (name, mtime)
+        for the documents that exist; same contract as SearchIndex.sync.
+        Returns how many documents were re-read.
+        """
+        with self._lock:
+            stamps = {name: rec[_STAMP] for name, rec in self._records.items()}
+        stale, seen = [], set()
+        with self._lock:
+            for name, mtime in entries:
+                seen.add(name)
+                if name not in stamps:
+                    stale.append((name, mtime))
+                elif stamps[name] is None:
+                    self._records[name][_STAMP] = mtime
+                    self._dirty = True
+                elif stamps[name] != mtime:
+                    stale.append((name, mtime))
+            if complete:
+                for name in [n for n in stamps if n not in seen]:
+                    self._discard(name)
+
+        done = 0
+        for start in range(0, len(stale), SYNC_BATCH):
+            for name, mtime in stale[start:start + SYNC_BATCH]:
+                try:
+                    data = load(name)
+                except Exception:
+                    data = None
+                if data is None:
+                    self.remove(name)
+                else:
+                    self.put(name, data, mtime)
+                    done += 1
+            if progress is not None:
+                progress(min(start + SYNC_BATCH, len(stale)), len(stale))
+        return done
+
+    # ---------- reading ----------
+    def total(self) -> Rollup:
+        """Every document, invoices and quotes together."""
+        with self._lock:
+            return Rollup.from_cents(self._all)
+
+    def get(self, dimension: str, value: str, doc_type: str | None = None) -> Rollup:
+        """
+        Rollup of one value, e.g. get("client", "Acme Ltd") or
+        get("month", "2025-03", doc_type="invoice"). Statuses are upper case.
+        """
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"unknown dimension: {dimension}")
+        with self._lock:
+            return Rollup.from_cents(self._groups.get((dimension, value, doc_type)))
+
+    def by(self, dimension: str, doc_type: str | None = None) -> dict[str, Rollup]:
+        """Every value of one dimension -> its rollup."""
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"unknown dimension: {dimension}")
+        with self._lock:
+            return {value: Rollup.from_cents(sums)
+                    for (dim, value, dt), sums in self._groups.items()
+                    if dim == dimension and dt == doc_type}
+
+    def outstanding(self) -> Rollup:
+        """Invoices not marked PAID."""
+        out = [0, 0, 0, 0]
+        with self._lock:
+            for sums in self._unpaid.values():
+                for i in range(4):
+                    out[i] += sums[i]
+        return Rollup.from_cents(out)
+
+    def overdue(self, today: date | str | None = None) -> Rollup:
+        """
+        Unpaid invoices due before `today` (default: the current date) or
+        marked OVERDUE. Costs one step per distinct due date, not per invoice.
+        """
+        today = str(today or date.today())[:10]
+        out = [0, 0, 0, 0]
+        with self._lock:
+            for (due, marked), sums in self._unpaid.items():
+                if marked or (due and due < today):
+                    for i in range(4):
+                        out[i] += sums[i]
+        return Rollup.from_cents(out)
+
+    def __len__(self):
+        return len(self._records)
@@ -0,0 +1,282 @@
+# invoicemint/services/revisions.py
+"""
+Per-document revision history.
+
+Every document gets an append-only log in `logs/<name>l` (JSON lines).
+Each line is one revision, either a snapshot reference or a delta:
+
+    {"rev": 1, "at": "...", "base": "<object id>"}    <- full snapshot
+    {"rev": 2, "at": "...", "ops": [...]}             <- changes vs rev 1
+    {"rev": 3, "at": "...", "ops": [...]}             <- changes vs rev 2
+
+Snapshots are stored once in `objects/<id>.json`, where the id is a
+content hash (journal.snapshot_id). Identical content, such as a
+"save as new" copy or a restored revision, therefore shares one object.
+Deltas use the same ops as the draft journal (see journal.py). A new
+snapshot is only taken when the deltas since the last one outgrow it,
+or after KEYFRAME_EVERY revisions. That keeps history close to the size
+of the edits while bounding how much has to be replayed to restore a
+revision.
+"""
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+
+from invoicemint.services import codec, journal
+from invoicemint.services.writer import atomic_write_bytes, append_bytes
+
+KEYFRAME_EVERY = 50
+KEYFRAME_MIN_BYTES = 4 * 1024
+_TRACKED_MAX = 32
+
+
+class RevisionStore:
+    """
+    Revision logs + content-addressed snapshot objects under `root`.
+
+    writer: optional WriteBehindQueue; when given, objects and log lines are
+    written on its thread (in submission order, so an object always lands
+    before the log line that refers to it).
+    """
+
+    def __init__(self, root: str | Path, writer=None):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.logs_dir = self.root / "logs"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.logs_dir.mkdir(parents=True, exist_ok=True)
+        self._writer = writer
+        self._lock = threading.RLock()
+        # name -> {"rev", "state", "chain_bytes", "base_bytes", "since_base"}
+        self._tracked: OrderedDict[str, dict] = OrderedDict()
+
+    # ---------- paths / io ----------
+    def _log_path(self, name: str) -> Path:
+        return self.logs_dir / f"{name}l"
+
+    def _object_path(self, object_id: str) -> Path:
+        return self.objects_dir / f"{object_id}.json"
+
+    def _write(self, path: Path, payload: bytes, append: bool = False):
+        if self._writer is not None:
+            self._writer.submit(path, payload, append=append)
+        elif append:
+            append_bytes(path, payload)
+        else:
+            atomic_write_bytes(path, payload)
+
+    def _read(self, path: Path) -> bytes:
+        if self._writer is not None:
+            payload = self._writer.pending(path)
+            if payload is not None:
+                return payload
+            self._writer.flush(path)
+        return path.read_bytes()
+
+    def _entries(self, name: str) -> list[dict]:
+        try:
+            raw = self._read(self._log_path(name))
+        except OSError:
+            return []
+        entries = []
+        for line in raw.splitlines():
+            try:
+                entries.append(codec.loads(line))
+            except ValueError:
+                break  # torn final line after a crash
+        return entries
+
+    def _load_object(self, object_id: str) -> dict:
+        return codec.loads(self._read(self._object_path(object_id)))
+
+    def _store_object(self, payload: bytes) -> str:
+        object_id = journal.snapshot_id(payload)
+        path = self._object_path(object_id)
+        pending = self._writer is not None and self._writer.is_pending(path)
+        if not pending and not path.exists():
+            self._write(path, payload)
+        return object_id
+
+    # ---------- replay ----------
+    @staticmethod
+    def _keyframe_index(entries: list[dict], upto: int) -> int:
+        for i in range(upto, -1, -1):
+            if "base" in entries[i]:
+                return i
+        raise ValueError("revision log has no base snapshot")
+
+    def _state_at(self, entries: list[dict], index: int) -> dict:
+        start = self._keyframe_index(entries, index)
+        doc = self._load_object(entries[start]["base"])
+        for entry in entries[start + 1:index + 1]:
+            journal.apply(doc, entry["ops"])
+        return doc
+
+    def _track(self, name: str, rec: dict):
+        self._tracked[name] = rec
+        self._tracked.move_to_end(name)
+        while len(self._tracked) > _TRACKED_MAX:
+            self._tracked.popitem(last=False)
+
+    def _tip(self, name: str) -> dict | None:
+        """Latest revision of name (from cache, else rebuilt from the log)."""
+        rec = self._tracked.get(name)
+        if rec is not None:
+            self._tracked.move_to_end(name)
+            return rec
+        entries = self._entries(name)
+        if not entries:
+            return None
+        last = len(entries) - 1
+        try:
+            start = self._keyframe_index(entries, last)
+            state = self._state_at(entries, last)
+            base_bytes = len(codec.dumps(state, compact=True))
+        except (OSError, ValueError, KeyError, IndexError, TypeError):
+            # history can't be replayed (missing object?): keep numbering
+            # going and start over from a fresh snapshot
+            rec = {"rev": entries[last].get("rev", last + 1), "state": None,
+                   "chain_bytes": 0, "base_bytes": 0, "since_base": 0}
+            self._track(name, rec)
+            return rec
+        chain = sum(len(codec.dumps(e, compact=True)) + 1 for e in entries[start + 1:])
+        rec = {
+            "rev": entries[last]["rev"],
+            "state": state,
+            "chain_bytes": chain,
+            "base_bytes": base_bytes,
+            "since_base": last - start,
+        }
+        self._track(name, rec)
+        return rec
+
+    # ---------- public API ----------
+    def record(self, name: str, data: dict) -> int | None:
+        """
+        Add `data` as the newest revision of `name`.
+        Returns the new revision number, or None if nothing changed.
+        """
+        now = datetime.now().isoformat(timespec="seconds")
+        with self._lock:
+            tip = self._tip(name)
+            rev = tip["rev"] + 1 if tip else 1
+            line = None
+            if tip is not None and tip["state"] is not None:
+                ops = journal.diff(tip["state"], data)
+                if not ops:
+                    return None
+                line = codec.dumps({"rev": rev, "at": now, "ops": ops}, compact=True) + b"\n"
+                budget = max(tip["base_bytes"], KEYFRAME_MIN_BYTES)
+                if (tip["chain_bytes"] + len(line) > budget
+                        or tip["since_base"] + 1 >= KEYFRAME_EVERY):
+                    line = None  # start a new snapshot instead
+
+            if line is not None:
+                rec = {
+                    "rev": rev,
+                    "state": journal.clone(data),
+                    "chain_bytes": tip["chain_bytes"] + len(line),
+                    "base_bytes": tip["base_bytes"],
+                    "since_base": tip["since_base"] + 1,
+                }
+            else:
+                payload = codec.dumps(data, compact=True)
+                object_id = self._store_object(payload)
+                line = codec.dumps({"rev": rev, "at": now, "base": object_id}, compact=True) + b"\n"
+                rec = {
+                    "rev": rev,
+                    "state": journal.clone(data),
+                    "chain_bytes": 0,
+                    "base_bytes": len(payload),
+                    "since_base": 0,
+                }
+
+            self._write(self._log_path(name), line, append=True)
+            self._track(name, rec)
+            return rev
+
+    def revisions(self, name: str) -> list[dict]:
+        """
+        Revisions of name, oldest first:
+        {"rev", "at", "kind": "snapshot"|"delta", "changes"}
+        """
+        out = []
+        for e in self._entries(name):
+            is_base = "base" in e
+            out.append({
+                "rev": e.get("rev"),
+                "at": e.get("at"),
+                "kind": "snapshot" if is_base else "delta",
+                "changes": None if is_base else len(e.get("ops") or ()),
+            })
+        return out
+
+    def load(self, name: str, rev: int | None = None) -> dict:
+        """Document content at revision rev (default: latest). KeyError if unknown."""
+        entries = self._entries(name)
+        if not entries:
+            raise KeyError(name)
+        if rev is None:
+            index = len(entries) - 1
+        else:
+            index = next((i for i, e in enumerate(entries) if e.get("rev") == rev), None)
+            if index is None:
+                raise KeyError(f"{name} has no revision {rev}")
+        return self._state_at(entries, index)
+
+    def diff(self, name: str, rev_a: int, rev_b: int | None = None) -> list:
+        """Journal-style ops turning revision rev_a into rev_b (default: latest)."""
+        return journal.diff(self.load(name, rev_a), self.load(name, rev_b))
+
+    def rename(self, name: str, new_name: str):
+        with self._lock:
+            src, dst = self._log_path(name), self._log_path(new_name)
+            if self._writer is not None:
+                self._writer.flush(src)
+                self._writer.discard(dst)
+            self._tracked.pop(new_name, None)
+            rec = self._tracked.pop(name, None)
+            try:
+                os.replace(src, dst)
+            except FileNotFoundError:
+                return
+            if rec is not None:
+                self._track(new_name, rec)
+
+    def delete(self, name: str):
+        """Drop the history of name. Unreferenced objects are left for gc()."""
+        with self._lock:
+            path = self._log_path(name)
+            if self._writer is not None:
+                self._writer.discard(path)
+            self._tracked.pop(name, None)
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def gc(self) -> int:
+        """Remove snapshot objects no log refers to. Returns how many were removed."""
+        with self._lock:
+            if self._writer is not None:
+                self._writer.flush()
+            live = set()
+            for log in self.logs_dir.glob("*.jsonl"):
+                for line in log.read_bytes().splitlines():
+                    if b'"base"' not in line:
+                        continue
+                    try:
+                        live.add(codec.loads(line)["base"])
+                    except (ValueError, KeyError):
+                        continue
+            removed = 0
+            for obj in self.objects_dir.glob("*.json"):
+                if obj.stem not in live:
+                    try:
+                        obj.unlink()
+                        removed += 1
+                    except OSError:
+                        pass
+            return removed
@@ -0,0 +1,228 @@
+# invoicemint/services/search.py
+"""
+Full-text search over invoices and quotes (SQLite FTS5).
+
+Each document is one row of an FTS5 table with four columns, ranked by
+bm25 with the weights in COLUMN_WEIGHTS, so a hit on the document number
+counts for more than one in the notes:
+
+    number   document number
+    client   client name, business, email, address, phone
+    items    line-item service and description text
+    notes    the notes block
+
+The index lives in its own database (search.db) and is a cache: storage.py
+updates it as drafts are saved, deleted and renamed, and sync() re-checks
+it against listing mtimes for changes made behind our back. Each indexed
+name carries a stamp (the mtime it was indexed at). A NULL stamp means
+"indexed straight from a save": the next sync adopts the file's mtime
+without re-reading the document.
+"""
+import re
+import sqlite3
+import threading
+from pathlib import Path
+
+from invoicemint.services.models import Document
+
+COLUMNS = ("number", "client", "items", "notes")
+COLUMN_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+SYNC_BATCH = 500
+MIN_PREFIX_CHARS = 2
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS indexed (
+    id    INTEGER PRIMARY KEY,
+    name  TEXT NOT NULL UNIQUE,
+    stamp REAL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS docs USING fts5(
+    {", ".join(COLUMNS)},
+    tokenize = "unicode61 remove_diacritics 2"
+);
+"""
+
+_TERM = re.compile(r"\w+")
+
+
+def fts5_available() -> bool:
+    try:
+        conn = sqlite3.connect(":memory:")
+        try:
+            conn.execute("CREATE VIRTUAL TABLE t USING fts5(x)")
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return False
+    return True
+
+
+def document_text(data: dict) -> tuple[str, str, str, str]:
+    """The indexed columns of a draft dict, in COLUMNS order."""
+    doc = Document.from_state(data)
+    c = doc.client
+    client = "\n".join(v for v in (c.name, c.business, c.email, c.address, c.phone) if v)
+    items = "\n".join(f"{it.service}\n{it.description}" for it in doc.items)
+    return doc.number, client, items, doc.notes or ""
+
+
+def match_query(text: str) -> str | None:
+    """
+    FTS5 MATCH expression for what a user typed: every word must occur,
+    the last one as a prefix (so results show up while typing). None when
+    there is nothing to search for.
+    """
+    terms = _TERM.findall(text or "")
+    if not terms:
+        return None
+    quoted = [f'"{t}"' for t in terms]  # \w+ never contains a quote
+    # a one-letter prefix matches nearly every document, and bm25 would
+    # have to score them all
+    if len(terms[-1]) >= MIN_PREFIX_CHARS:
+        quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+class SearchIndex:
+    """FTS5 index of documents by draft name, stored in `db_path`."""
+
+    def __init__(self, db_path: str | Path):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            # persistent default ranking: lets ORDER BY rank LIMIT stop early
+            weights = ", ".join(str(w) for w in COLUMN_WEIGHTS)
+            self._conn.execute("INSERT INTO docs(docs, rank) VALUES ('rank', ?)",
+                               (f"bm25({weights})",))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ---------- updates ----------
+    def _put(self, name: str, data: dict, stamp: float | None):
+        row = self._conn.execute("SELECT id FROM indexed WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            doc_id = self._conn.execute(
+                "INSERT INTO indexed(name, stamp) VALUES (?, ?)", (name, stamp)
+            ).lastrowid
+        else:
+            doc_id = row[0]
+            self._conn.execute("DELETE FROM docs WHERE rowid = ?", (doc_id,))
+            self._conn.execute("UPDATE indexed SET stamp = ? WHERE id = ?", (stamp, doc_id))
+        self._conn.execute(
+            f"INSERT INTO docs(rowid, {', '.join(COLUMNS)}) VALUES (?, ?, ?, ?, ?)",
+            (doc_id, *document_text(data)),
+        )
+
+    def _drop(self, name: str) -> bool:
+        row = self._conn.execute("SELECT id FROM indexed WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return False
+        self._conn.execute("DELETE FROM docs WHERE rowid = ?", (row[0],))
+        self._conn.execute("DELETE FROM indexed WHERE id = ?", (row[0],))
+        return True
+
+    def put(self, name: str, data: dict, stamp: float | None = None):
+        """(Re)index document `name`. stamp: see the module docstring."""
+        with self._lock, self._conn:
+            self._put(name, data, stamp)
+
+    def remove(self, name: str) -> bool:
+        with self._lock, self._conn:
+            return self._drop(name)
+
+    def rename(self, name: str, new_name: str) -> bool:
+        with self._lock, self._conn:
+            if name == new_name:
+                return True
+            self._drop(new_name)
+            cur = self._conn.execute(
+                "UPDATE indexed SET name = ?, stamp = NULL WHERE name = ?", (new_name, name)
+            )
+            return cur.rowcount > 0
+
+    # ---------- consistency ----------
+    def stamps(self) -> dict[str, float | None]:
+        with self._lock:
+            return dict(self._conn.execute("SELECT name, stamp FROM indexed"))
+
+    def sync(self, entries, load, complete: bool = True, progress=None) -> int:
+        """
+        Bring the index in line with `entries`: iterable of (name, mtime)
+        for the documents that exist. Documents whose mtime differs from
+        their stamp are re-read with load(name) -> dict | None (None: drop
+        it). complete=True also drops names missing from entries.
+
+        progress(done, total) is called after each batch of re-indexed
+        documents. Returns how many documents were (re)indexed.
+        """
+        stamps = self.stamps()
+        stale, adopt, seen = [], [], set()
+        for name, mtime in entries:
+            seen.add(name)
+            if name not in stamps:
+                stale.append((name, mtime))
+            elif stamps[name] is None:
+                adopt.append((mtime, name))
+            elif stamps[name] != mtime:
+                stale.append((name, mtime))
+        gone = [n for n in stamps if n not in seen] if complete else []
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE indexed SET stamp = ? WHERE name = ? AND stamp IS NULL", adopt
+            )
+            for name in gone:
+                self._drop(name)
+
+        done = 0
+        for start in range(0, len(stale), SYNC_BATCH):
+            batch = []
+            for name, mtime in stale[start:start + SYNC_BATCH]:
+                try:
+                    batch.append((name, load(name), mtime))
+                except Exception:
+                    batch.append((name, None, mtime))
+            with self._lock, self._conn:
+                for name, data, mtime in batch:
+                    if data is None:
+                        self._drop(name)
+                    else:
+                        self._put(name, data, mtime)
+                        done += 1
+            if progress is not None:
+                progress(min(start + SYNC_BATCH, len(stale)), len(stale))
+        return done
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM indexed").fetchone()[0]
+
+    # ---------- queries ----------
+    def search(self, query: str, limit: int = 50) -> list[dict]:
+        """
+        Best matches first: [{"name", "score", "snippet"}]. score is bm25
+        (lower is better); snippet is the best matching fragment with hits
+        in [brackets].
+        """
+        expr = match_query(query)
+        if expr is None or limit <= 0:
+            return []
+        with self._lock:
+            try:
+                rows = self._conn.execute(
+                    "SELECT indexed.name, hits.rank, hits.snip FROM ("
+                    "   SELECT rowid, rank, snippet(docs, -1, '[', ']', '…', 10) AS snip"
+                    "   FROM docs WHERE docs MATCH ? ORDER BY rank LIMIT ?"
+                    " ) AS hits JOIN indexed ON indexed.id = hits.rowid"
+                    " ORDER BY hits.rank",
+                    (expr, int(limit)),
+                ).fetchall()
+            except sqlite3.OperationalError:
+                return []
+        return [{"name": n, "score": s, "snippet": snip} for n, s, snip in rows]
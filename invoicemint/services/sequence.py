@@ -0,0 +1,200 @@
+# invoicemint/services/sequence.py
+"""
+Document number sequences shared by every InvoiceMint process.
+
+The next number of each sequence ("invoice", "quote") lives in a small
+state file, changed only while holding an exclusive lock on a lock file
+next to it. Two app windows, or an app and a batch job, therefore never
+hand out the same number. A batch job reserves a whole block with one
+allocate(name, count) call instead of one lock round trip per document.
+
+Every allocation is also appended to a ledger (JSON lines):
+
+    {"seq": "invoice", "from": 1001, "to": 1004, "at": "...", "pid": 123}
+    {"seq": "invoice", "reset": 2000, "at": "...", "pid": 123}
+
+so audit() can compare what was handed out with the numbers documents
+actually carry: gaps, duplicates, and numbers nobody allocated.
+"""
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from invoicemint.services import codec
+from invoicemint.services.writer import atomic_write_bytes, append_bytes
+
+DEFAULT_START = 1000
+LOCK_TIMEOUT = 10.0
+
+
+@contextmanager
+def file_lock(path: str | Path, timeout: float = LOCK_TIMEOUT):
+    """Exclusive lock on `path` (created if missing), across processes."""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if sys.platform == "win32":
+            import msvcrt
+
+            deadline = time.monotonic() + timeout
+            while True:
+                try:
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    if time.monotonic() >= deadline:
+                        raise TimeoutError(f"could not lock {path}")
+                    time.sleep(0.05)
+            try:
+                yield
+            finally:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            deadline = time.monotonic() + timeout
+            while True:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        raise TimeoutError(f"could not lock {path}")
+                    time.sleep(0.01)
+            try:
+                yield
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+class SequenceAllocator:
+    """
+    Sequences stored in `path` (state), `path`.lock and `path`.log (ledger).
+
+    seed: optional callable(name) -> first number for a sequence the state
+          file doesn't know yet (e.g. the legacy counters in settings.json)
+    """
+
+    def __init__(self, path: str | Path, seed=None):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.ledger_path = self.path.with_name(self.path.stem + ".log")
+        self._seed = seed
+
+    # ---------- state ----------
+    def _read(self) -> dict:
+        try:
+            state = codec.loads(self.path.read_bytes())
+        except (OSError, ValueError):
+            return {}
+        return state if isinstance(state, dict) else {}
+
+    def _next(self, state: dict, name: str) -> int:
+        entry = state.get(name)
+        if isinstance(entry, dict) and isinstance(entry.get("next"), int):
+            return entry["next"]
+        start = self._seed(name) if self._seed is not None else None
+        return int(start) if start is not None else DEFAULT_START
+
+    def _commit(self, state: dict, record: dict):
+        """Write state, then the ledger line (both before the lock is released)."""
+        atomic_write_bytes(self.path, codec.dumps(state, compact=True))
+        record = {**record, "at": datetime.now().isoformat(timespec="seconds"), "pid": os.getpid()}
+        append_bytes(self.ledger_path, codec.dumps(record, compact=True) + b"\n")
+
+    # ---------- allocation ----------
+    def peek(self, name: str) -> int:
+        """The number allocate(name) would return right now (no lock, no change)."""
+        return self._next(self._read(), name)
+
+    def allocate(self, name: str, count: int = 1) -> range:
+        """Reserve `count` consecutive numbers of sequence `name`."""
+        if count < 1:
+            raise ValueError("count must be at least 1")
+        with file_lock(self.lock_path):
+            state = self._read()
+            first = self._next(state, name)
+            state[name] = {"next": first + count}
+            self._commit(state, {"seq": name, "from": first, "to": first + count})
+        return range(first, first + count)
+
+    def claim(self, name: str, number: int) -> bool:
+        """
+        Record that `number` is in use (typed in by hand, say). The
+        sequence moves past it if needed. Returns False if the number
+        was already behind the sequence, i.e. handed out before.
+        """
+        with file_lock(self.lock_path):
+            state = self._read()
+            nxt = self._next(state, name)
+            if number < nxt:
+                return False
+            state[name] = {"next": number + 1}
+            self._commit(state, {"seq": name, "from": number, "to": number + 1})
+        return True
+
+    def set_next(self, name: str, number: int):
+        """Restart sequence `name` at `number` (recorded in the ledger)."""
+        with file_lock(self.lock_path):
+            state = self._read()
+            if self._next(state, name) == number and name in state:
+                return
+            state[name] = {"next": int(number)}
+            self._commit(state, {"seq": name, "reset": int(number)})
+
+    # ---------- audit ----------
+    def ledger(self, name: str | None = None) -> list[dict]:
+        try:
+            raw = self.ledger_path.read_bytes()
+        except OSError:
+            return []
+        out = []
+        for line in raw.splitlines():
+            try:
+                rec = codec.loads(line)
+            except ValueError:
+                continue
+            if name is None or rec.get("seq") == name:
+                out.append(rec)
+        return out
+
+    def audit(self, name: str, used) -> dict:
+        """
+        Compare the ledger of sequence `name` with the numbers documents
+        use (`used`: iterable of numbers, one per document).
+
+        Returns {"allocated", "used", "gaps", "duplicates",
+        "unallocated", "reissued"}, where:
+          gaps        - allocated, but no document has the number
+          duplicates  - number -> how many documents share it
+          unallocated - used by a document but never handed out
+          reissued    - handed out more than once (e.g. after a reset)
+        """
+        allocated: set[int] = set()
+        reissued: set[int] = set()
+        for rec in self.ledger(name):
+            if "from" not in rec:
+                continue
+            for n in range(int(rec["from"]), int(rec["to"])):
+                if n in allocated:
+                    reissued.add(n)
+                allocated.add(n)
+        counts: dict[int, int] = {}
+        for n in used:
+            counts[n] = counts.get(n, 0) + 1
+        low = min(allocated) if allocated else None
+        return {
+            "allocated": len(allocated),
+            "used": len(counts),
+            "gaps": sorted(allocated - counts.keys()),
+            "duplicates": {n: c for n, c in sorted(counts.items()) if c > 1},
+            # numbers from before the ledger existed can't be judged
+            "unallocated": sorted(n for n in counts
+                                  if n not in allocated and low is not None and n >= low),
+            "reissued": sorted(reissued),
+        }
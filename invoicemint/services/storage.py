@@ -1,31 +1,100 @@
 # invoicemint/services/storage.py
-import json
+import atexit
+import copy
+import heapq
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
 from pathlib import Path
 from datetime import datetime
+from types import MappingProxyType
+
+from invoicemint.services import codec, journal
+from invoicemint.services.client_store import ClientStore
+from invoicemint.services.layout import DraftsLayout
+from invoicemint.services.models import Document
+from invoicemint.services.revisions import RevisionStore
+from invoicemint.services.sequence import SequenceAllocator
+from invoicemint.services.writer import WriteBehindQueue, atomic_write_bytes
 
 # ---------- App directories ----------
 APP_DIR = Path.home() / ".invoicemint"
 DATA_DIR = APP_DIR / "data"
 DRAFTS_DIR = APP_DIR / "drafts"
 CLIENTS_FILE = DATA_DIR / "clients.json"
+CLIENTS_LOG_FILE = DATA_DIR / "clients.log"
 SETTINGS_FILE = DATA_DIR / "settings.json"
+DOCUMENTS_DB = DATA_DIR / "documents.db"
+DRAFTS_INDEX_FILE = DATA_DIR / "drafts_index.json"
+REVISIONS_DIR = DATA_DIR / "revisions"
+ARCHIVE_DIR = DATA_DIR / "archive"
+SEQUENCES_FILE = DATA_DIR / "sequences.json"
+SEARCH_DB = DATA_DIR / "search.db"
+ROLLUPS_FILE = DATA_DIR / "rollups.json"
 
 for p in (APP_DIR, DATA_DIR, DRAFTS_DIR):
     p.mkdir(parents=True, exist_ok=True)
 
 
 # ---------- JSON helpers ----------
+# Drafts, clients and settings are written by a background thread so the
+# Tk main loop never waits on the disk (see writer.py).
+_writer = WriteBehindQueue()
+_layout = DraftsLayout(DRAFTS_DIR)
+_revisions = RevisionStore(REVISIONS_DIR, writer=_writer)
+
+
 def _read_json(path, default):
+    # A write still queued for this file is newer than what is on disk
+    payload = _writer.pending(path)
+    if payload is not None:
+        try:
+            return codec.loads(payload)
+        except Exception:
+            return default
     if Path(path).exists():
         try:
-            return json.loads(Path(path).read_text(encoding="utf-8"))
+            return codec.loads(Path(path).read_bytes())
         except Exception:
             return default
     return default
 
 
+def _encode_json(data) -> bytes:
+    compact = bool((get_settings().get("storage") or {}).get("compact_json"))
+    return codec.dumps(data, compact=compact)
+
+
 def _write_json(path, data):
-    Path(path).write_text(json.dumps(data, indent=2), encoding="utf-8")
+    """Write now (atomically), superseding any queued write for path."""
+    _writer.discard(path)
+    atomic_write_bytes(path, _encode_json(data))
+
+
+def _write_json_later(path, data, on_written=None):
+    """
+    Queue an atomic write of data to path and return immediately. The data
+    is serialized here, so callers may keep mutating their dict.
+    """
+    _writer.submit(path, _encode_json(data), on_written)
+
+
+def flush_pending_writes(timeout: float | None = None) -> bool:
+    """Block until every queued write is on disk. False on timeout."""
+    return _writer.flush(timeout=timeout)
+
+
+def add_write_error_callback(callback):
+    """
+    Register callback(path, exc) for background write failures. It runs on
+    the writer thread, so UI code must hand the error over to the Tk loop.
+    """
+    _writer.add_error_callback(callback)
+
+
+def remove_write_error_callback(callback):
+    _writer.remove_error_callback(callback)
 
 
 # ---------- Settings & Clients ----------
@@ -39,13 +108,29 @@ DEFAULT_SETTINGS = {
     "invoice_seq": 1000,
     "quote_seq": 1000,
     "default_notes": "Thank you for your business!\nPayment is due in 14 days.",
+    # Where invoices/quotes live: "json" (one file per draft) or "sqlite"
+    "storage": {
+        "backend": "json",
+        # write drafts/clients/settings without indentation (smaller, faster)
+        "compact_json": False,
+    },
 }
 
 
 
-def load_settings():
-    data = _read_json(SETTINGS_FILE, DEFAULT_SETTINGS)
+# Cached merged settings: (stat key of SETTINGS_FILE, merged dict, frozen view)
+_settings_cache: tuple | None = None
+
+
+def _settings_stat_key():
+    try:
+        st = SETTINGS_FILE.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
 
+def _merge_settings(data) -> dict:
     # merge top-level
     merged = DEFAULT_SETTINGS.copy()
     merged.update(data or {})
@@ -55,75 +140,607 @@ def load_settings():
     pdf_cfg.update((data or {}).get("pdf", {}) or {})
     merged["pdf"] = pdf_cfg
 
+    # merge nested storage dict
+    storage_cfg = DEFAULT_SETTINGS.get("storage", {}).copy()
+    storage_cfg.update((data or {}).get("storage", {}) or {})
+    merged["storage"] = storage_cfg
+
     return merged
 
 
+def _freeze(value):
+    """Recursively wrap dicts in read-only proxies and lists in tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _cached_settings() -> tuple:
+    """
+    (merged, frozen) settings, re-read only when settings.json changed
+    size or mtime since the last read (or save_settings() was called).
+    """
+    global _settings_cache
+    key = _settings_stat_key()
+    if _settings_cache is None or _settings_cache[0] != key:
+        merged = _merge_settings(_read_json(SETTINGS_FILE, DEFAULT_SETTINGS))
+        _settings_cache = (key, merged, _freeze(merged))
+    return _settings_cache[1], _settings_cache[2]
+
+
+def get_settings() -> Mapping:
+    """
+    Read-only view of the current settings (nested dicts are read-only too).
+
+    Cheap enough for hot paths: one stat() call, no file read or JSON parse
+    unless settings.json changed. Use load_settings() for a copy to modify.
+    """
+    return _cached_settings()[1]
+
+
+def load_settings():
+    """Return a mutable copy of the merged settings (served from the cache)."""
+    return copy.deepcopy(_cached_settings()[0])
+
+
 def save_settings(data):
+    global _settings_cache
     if data is None:
         data = DEFAULT_SETTINGS
-    _write_json(SETTINGS_FILE, data)
+    merged = _merge_settings(journal.clone(data))
+    cached = (_settings_stat_key(), merged, _freeze(merged))
+    _settings_cache = cached
+
+    def _written():
+        # re-key the cache to the new file so it isn't re-read
+        global _settings_cache
+        if _settings_cache is cached:
+            _settings_cache = (_settings_stat_key(), merged, cached[2])
+
+    _write_json_later(SETTINGS_FILE, data, on_written=_written)
+
+
+# Client book: clients.json plus a per-record change log (see client_store.py).
+# The search index is built on first use and kept in step by upsert_client()
+# and delete_client(); when the store renumbers (reload, save_clients) it is
+# rebuilt.
+_clients = ClientStore(CLIENTS_FILE, CLIENTS_LOG_FILE, writer=_writer,
+                       encode=lambda data: _encode_json(data))
+_client_index: list | None = None  # [store generation, ClientIndex]
 
 
 def load_clients():
-    return _read_json(CLIENTS_FILE, [])
+    return _clients.clients()
 
 
 def save_clients(clients):
-    _write_json(CLIENTS_FILE, clients or [])
+    """Replace the whole client book (rewrites clients.json)."""
+    _clients.replace(clients)
 
 
-# ---------- Drafts API ----------
-def list_drafts():
-    """Return a list of available drafts with metadata."""
-    items = []
-    for p in sorted(DRAFTS_DIR.glob("*.json")):
+def get_client(client_id: str) -> dict | None:
+    return _clients.get(client_id)
+
+
+def get_client_index():
+    """Search index over the current client book (see client_index.py)."""
+    global _client_index
+    _clients.refresh()
+    if _client_index is None or _client_index[0] != _clients.generation:
+        from invoicemint.services.client_index import ClientIndex
+
+        _client_index = [_clients.generation, ClientIndex(_clients.rows)]
+    return _client_index[1]
+
+
+def _index_if_current():
+    if _client_index is not None and _client_index[0] == _clients.generation:
+        return _client_index[1]
+    return None
+
+
+def upsert_client(client: dict) -> str:
+    """
+    Add client, or replace the stored client with the same "id". Only the
+    change is appended to disk. Returns the client's id.
+    """
+    return upsert_clients([client])[0]
+
+
+def upsert_clients(clients) -> list[str]:
+    """upsert_client() for a batch, saved as one append. Returns the ids."""
+    ids = _clients.upsert_many(clients)
+    index = _index_if_current()
+    if index is not None:
+        for client_id in ids:
+            pos = _clients.position(client_id)
+            index.put(pos, _clients.rows[pos])
+    return ids
+
+
+def add_client(client: dict) -> str:
+    """Add a new client (a fresh id is assigned). Returns its id."""
+    return add_clients([client])[0]
+
+
+def add_clients(clients) -> list[str]:
+    """Add new clients in one batch. Returns their ids."""
+    return upsert_clients({k: v for k, v in c.items() if k != "id"} for c in clients)
+
+
+def delete_client(client_id: str) -> bool:
+    pos = _clients.position(client_id)
+    if not _clients.delete(client_id):
+        return False
+    index = _index_if_current()
+    if index is not None and pos is not None:
+        index.remove(pos)
+    return True
+
+
+# ---------- Document numbers ----------
+# Invoice and quote numbers come from a file-locked allocator (sequence.py),
+# safe across app instances and batch jobs. The old "invoice_seq" /
+# "quote_seq" settings only seed it the first time.
+_sequences = SequenceAllocator(
+    SEQUENCES_FILE, seed=lambda doc_type: get_settings().get(f"{doc_type}_seq")
+)
+
+
+def next_document_number(doc_type: str) -> int:
+    """The number the next new invoice/quote will get (nothing is reserved)."""
+    return _sequences.peek(doc_type)
+
+
+def allocate_document_numbers(doc_type: str, count: int = 1) -> range:
+    """Reserve `count` consecutive numbers for doc_type ("invoice" / "quote")."""
+    return _sequences.allocate(doc_type, count)
+
+
+def claim_document_number(doc_type: str, number: int) -> bool:
+    """
+    Mark a hand-picked number as used, moving the sequence past it.
+    False if the number was already behind the sequence.
+    """
+    return _sequences.claim(doc_type, number)
+
+
+def set_next_document_number(doc_type: str, number: int):
+    _sequences.set_next(doc_type, number)
+
+
+def audit_document_numbers(doc_type: str) -> dict:
+    """
+    Gaps, duplicates and never-allocated numbers for doc_type, comparing
+    the allocation ledger with the numbers saved (and archived) documents
+    carry. See SequenceAllocator.audit.
+    """
+    used = []
+    for e in list_drafts(rescan=True):
+        if (e.get("doc_type") or "invoice") != doc_type:
+            continue
         try:
-            stat = p.stat()
-            items.append({
-                "name": p.name,
-                "path": str(p),
-                "mtime": stat.st_mtime,
-            })
-        except Exception:
+            used.append(int(str(e.get("number") or "").strip()))
+        except ValueError:
             continue
-    return items
+    return _sequences.audit(doc_type, used)
+
+
+# ---------- Document store selection ----------
+_doc_store = None
+
+
+def _sqlite_store():
+    """
+    Return the SQLite document store when settings["storage"]["backend"] is
+    "sqlite", otherwise None (plain JSON files in DRAFTS_DIR).
+
+    The first time the store is opened, existing JSON drafts are imported
+    once so switching backends never hides older documents.
+    """
+    global _doc_store
+    backend = ((get_settings().get("storage") or {}).get("backend") or "json").lower()
+    if backend != "sqlite":
+        return None
+    if _doc_store is None:
+        from invoicemint.services.docstore import SQLiteDocumentStore
+
+        _doc_store = SQLiteDocumentStore(DOCUMENTS_DB)
+        if not _doc_store.get_meta("json_migrated_at"):
+            migrate_drafts_to_sqlite(_doc_store)
+    return _doc_store
+
+
+def migrate_drafts_to_sqlite(store=None, drafts_dir: str | Path | None = None) -> int:
+    """
+    One-shot import of every *.json draft into the SQLite store.
+
+    The JSON files are left in place (so switching back to the "json"
+    backend still works); documents already in the database are replaced
+    by the file version. Returns the number of imported drafts.
+    """
+    if store is None:
+        from invoicemint.services.docstore import SQLiteDocumentStore
+
+        store = _doc_store or SQLiteDocumentStore(DOCUMENTS_DB)
+    src = DraftsLayout(drafts_dir) if drafts_dir else _layout
+
+    def rows():
+        for entry in sorted(src.scan(), key=lambda e: e.name):
+            p = Path(entry.path)
+            loaded = _load_draft_file(p)
+            if loaded is None:
+                # Ignore corrupt or unreadable files
+                continue
+            data = loaded[0]
+            yield p.name, data, _draft_summary(data), p.stat().st_mtime
+
+    count = store.save_many(rows())
+    store.set_meta("json_migrated_at", datetime.now().isoformat(timespec="seconds"))
+    return count
+
+
+def _draft_filename(name: str) -> str:
+    return name if name.endswith(".json") else f"{name}.json"
+
+
+def _draft_key(path_or_name: str | Path) -> str:
+    """Store key for a draft given its full path, filename or base name."""
+    return _draft_filename(Path(path_or_name).name)
+
+
+def _draft_path(path_or_name: str | Path) -> Path:
+    """
+    Path of a draft given its full path, filename or base name. Drafts in
+    DRAFTS_DIR are found by name in their shard (see layout.py), so paths
+    from before the sharded layout keep working; other paths are used as is.
+    """
+    p = Path(path_or_name)
+    if not p.is_absolute() or _layout.contains(p):
+        return _layout.locate(_draft_key(p))
+    return p
+
+
+def _draft_summary(data: dict) -> dict:
+    """Pull the list-view fields out of a draft dict (any stored shape)."""
+    return Document.from_state(data).summary()
+
+
+def _summarize_draft_file(path: Path) -> dict:
+    with _layout.lock:
+        if not path.exists() and _layout.contains(path):
+            path = _layout.find(path.name) or path  # moved into its shard meanwhile
+        loaded = _load_draft_file(path)
+    return _draft_summary(loaded[0] if loaded else {})
+
+
+# ---------- Draft journal ----------
+# A JSON draft is a snapshot file plus an append-only journal of field-level
+# changes in its shard's .journal folder (see journal.py). Saving an existing
+# draft appends just the diff; once the journal passes JOURNAL_COMPACT_BYTES
+# the next save rewrites the snapshot on the writer thread and starts a fresh
+# journal.
+JOURNAL_COMPACT_BYTES = 256 * 1024
+_JOURNAL_TRACKED_MAX = 32
+
+# path -> {"state", "base", "journal_bytes", "stat"} for recently used drafts,
+# so a save can diff against the last state without re-reading the disk.
+_journal_tracked: OrderedDict[Path, dict] = OrderedDict()
+
+
+def _journal_path(path: Path) -> Path:
+    """drafts/3f/invoice-1001.json -> drafts/3f/.journal/invoice-1001.jsonl"""
+    return _layout.journal_path(path)
+
+
+def _draft_stat_key(path: Path, jpath: Path):
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    try:
+        jsize = jpath.stat().st_size
+    except OSError:
+        jsize = -1
+    return (st.st_mtime_ns, st.st_size, jsize)
+
+
+def _load_draft_file(path: Path) -> tuple | None:
+    """
+    Read snapshot + journal for a JSON draft.
+
+    Returns (state, base_id, journal_bytes, stat_key), or None when the
+    snapshot is missing or unreadable. journal_bytes is 0 when there is no
+    journal or it belongs to an older snapshot.
+    """
+    path = Path(path)
+    jpath = _journal_path(path)
+    # let queued writes for this draft land first
+    _writer.flush(path)
+    _writer.flush(jpath)
+    with _layout.lock:  # not mid-way through a move into a shard
+        key = _draft_stat_key(path, jpath)
+        try:
+            raw = path.read_bytes()
+        except OSError:
+            return None
+        try:
+            jraw = jpath.read_bytes()
+        except OSError:
+            jraw = b""
+    try:
+        state = codec.loads(raw)
+    except ValueError:
+        return None
+    if not isinstance(state, dict):
+        return None
+
+    base = journal.snapshot_id(raw)
+    journal_bytes = 0
+    if jraw:
+        state, applies = journal.replay(state, jraw, base)
+        if applies:
+            journal_bytes = len(jraw)
+    return state, base, journal_bytes, key
+
+
+def _track_draft(path: Path, state: dict, base: str, journal_bytes: int, key) -> dict:
+    rec = {"state": state, "base": base, "journal_bytes": journal_bytes, "stat": key}
+    _journal_tracked[path] = rec
+    _journal_tracked.move_to_end(path)
+    while len(_journal_tracked) > _JOURNAL_TRACKED_MAX:
+        _journal_tracked.popitem(last=False)
+    return rec
+
+
+def _tracked_draft(path: Path) -> dict | None:
+    """Tracked record for path, re-read if the files changed behind our back."""
+    path = Path(path)
+    jpath = _journal_path(path)
+    _writer.flush(path)
+    _writer.flush(jpath)
+    rec = _journal_tracked.get(path)
+    if rec is not None and rec["stat"] is not None \
+            and rec["stat"] == _draft_stat_key(path, jpath):
+        _journal_tracked.move_to_end(path)
+        return rec
+    loaded = _load_draft_file(path)
+    if loaded is None:
+        _journal_tracked.pop(path, None)
+        return None
+    return _track_draft(path, *loaded)
+
+
+def _read_draft(path: str | Path, default):
+    rec = _tracked_draft(Path(path))
+    if rec is None:
+        return default
+    return journal.clone(rec["state"])
+
+
+def _forget_draft(path: Path):
+    jpath = _journal_path(path)
+    _journal_tracked.pop(path, None)
+    _writer.discard(jpath)
+    try:
+        jpath.unlink()
+    except OSError:
+        pass
+
+
+def _save_draft_file(filename: str, path: Path, data: dict):
+    """Append a journal entry for data, or write a full snapshot."""
+    jpath = _journal_path(path)
+    manifest = _drafts_manifest()
+    summary = _draft_summary(data)
+    prev = _tracked_draft(path)
+
+    def _restat(rec):
+        try:
+            st = path.stat()
+        except OSError:
+            return
+        manifest.update(filename, summary, st)
+        rec["stat"] = _draft_stat_key(path, jpath)
+
+    if prev is not None:
+        ops = journal.diff(prev["state"], data)
+        entry = journal.encode_entry(ops) if ops else b""
+        if prev["journal_bytes"] + len(entry) <= JOURNAL_COMPACT_BYTES:
+            if not ops:
+                return
+            if prev["journal_bytes"] == 0:
+                payload, append = journal.encode_header(prev["base"]) + entry, False
+            else:
+                payload, append = entry, True
+            rec = _track_draft(path, journal.clone(data), prev["base"],
+                               prev["journal_bytes"] + len(payload), None)
+
+            def _journaled():
+                # bump the snapshot mtime so listings see the change
+                os.utime(path)
+                _restat(rec)
+
+            jpath.parent.mkdir(exist_ok=True)
+            _writer.submit(jpath, payload, on_written=_journaled, append=append)
+            return
+
+    # First save or compaction: full snapshot, then an empty journal
+    payload = _encode_json(data)
+    rec = _track_draft(path, journal.clone(data), journal.snapshot_id(payload), 0, None)
+    _writer.submit(path, payload, on_written=lambda: _restat(rec))
+    if jpath.exists():
+        _writer.submit(jpath, b"", on_written=lambda: _restat(rec))
+
+
+# ---------- Drafts manifest ----------
+_manifest = None
+
+
+def _drafts_manifest():
+    """
+    The on-disk summary index for JSON drafts (see manifest.py).
+
+    Loaded once per process and reconciled against DRAFTS_DIR stat data, so
+    only drafts changed behind our back are re-parsed. Saved lazily at exit
+    (see _flush_on_exit). Drafts left from the flat layout start moving into
+    their shards in the background at the same time.
+    """
+    global _manifest
+    if _manifest is None:
+        from invoicemint.services.manifest import DraftManifest
+
+        _manifest = DraftManifest(DRAFTS_INDEX_FILE, _layout, _summarize_draft_file)
+        _manifest.reconcile()
+        _layout.start_migration()
+    return _manifest
+
+
+def _with_path(entry: dict) -> dict:
+    return {**entry, "path": str(_layout.path(entry["name"]))}
+
+
+# ---------- Drafts API ----------
+def list_drafts(rescan: bool = False, archived: bool = True):
+    """
+    Return a list of available drafts with metadata.
+
+    Besides "name", "path" and "mtime" every item carries the cached summary
+    fields (doc_type, client_name, number, date, due_date, total, status,
+    size), so callers don't need to load drafts just to label them.
+    Documents in archive packs are listed too, with "archived": True and
+    "pack", unless a loose draft of the same name shadows them;
+    archived=False leaves them out.
+
+    rescan=True re-checks DRAFTS_DIR for drafts changed by other programs.
+    """
+    store = _sqlite_store()
+    if store is not None:
+        return [_with_path(row) for row in store.list_summaries()]
+
+    _writer.flush()
+    manifest = _drafts_manifest()
+    if rescan:
+        manifest.reconcile()
+    entries = [_with_path(e) for e in manifest.entries()]
+    if archived:
+        loose = {e["name"] for e in entries}
+        entries += [_with_path(e) for e in list_archived() if e["name"] not in loose]
+    return entries
+
+
+def sync_drafts(names) -> dict[str, dict | None]:
+    """
+    Re-check the named draft files against the disk (e.g. after a
+    DraftsWatcher event) and return name -> list_drafts()-style entry, or
+    None for drafts that no longer exist. A deleted loose draft whose name
+    is also archived comes back as the archived entry.
+
+    With the SQLite backend the files in DRAFTS_DIR are not the documents,
+    so nothing is reported.
+    """
+    if _sqlite_store() is not None:
+        return {}
+
+    names = [_draft_key(n) for n in names]
+    manifest = _drafts_manifest()
+    manifest.refresh(names)
+    out = {}
+    for n in names:
+        entry = manifest.get(n)
+        if entry is None:
+            entry = _archive().entry(n)
+        out[n] = _with_path(entry) if entry is not None else None
+    _sync_indexed_names(out)
+    return out
 
 
 def save_draft(data: dict, name: str | None = None) -> Path:
     """Save a draft dict to the drafts directory and return its path."""
     if name:
-        filename = name if name.endswith(".json") else f"{name}.json"
+        filename = _draft_filename(name)
     else:
         ts = datetime.now().strftime("%Y%m%d-%H%M%S")
         filename = f"invoice-{ts}.json"
 
-    path = DRAFTS_DIR / filename
-    _write_json(path, data)
+    store = _sqlite_store()
+    if store is not None:
+        path = _layout.path(filename)
+        store.save(filename, data, _draft_summary(data))
+    else:
+        path = _layout.locate(filename)
+        _save_draft_file(filename, path, data)
+    _revisions.record(filename, data)
+    _index_draft(filename, data)
     return path
 
 
 def load_draft(path: str | Path) -> dict:
-    """Load a draft JSON by path (string or Path)."""
-    return _read_json(Path(path), {})
+    """
+    Load a draft JSON by path (string or Path). Drafts that were moved into
+    an archive pack (see archive_drafts) are found there by name. With the
+    SQLite backend, drafts come from the store only; paths outside
+    DRAFTS_DIR are still read as files.
+    """
+    store = _sqlite_store()
+    if store is not None:
+        data = store.load(_draft_key(path))
+        if data is not None:
+            return data
+        if not Path(path).is_absolute() or _layout.contains(path):
+            # the store holds the drafts now; JSON files left in DRAFTS_DIR
+            # from before the switch must not stand in for deleted rows
+            return {}
+    p = _draft_path(path)
+    data = _read_draft(p, None)
+    if data is None and _layout.contains(p):
+        data = _archive().load(p.name)
+    return data if data is not None else {}
 
 
 def delete_draft(path_or_name: str) -> bool:
     """
-    Delete a draft file by full path or just filename.
-    Returns True on success, False if file wasn't removed.
+    Delete a draft file by full path or just filename. An archived copy of
+    the same name is deleted too (tombstoned, see archive.py), so it can't
+    come back in its place.
+    Returns True on success, False if nothing was removed.
     """
-    p = Path(path_or_name)
-    # If they passed just the filename, look in DRAFTS_DIR
-    if not p.is_absolute():
-        p = DRAFTS_DIR / p
+    key = _draft_key(path_or_name)
+    store = _sqlite_store()
+    if store is not None:
+        removed = store.delete(key)
+    else:
+        removed = _delete_draft_file(_draft_path(path_or_name))
+    # only once something is gone: a wrong name or a failed unlink must
+    # not wipe the document's history or drop it from search
+    if removed:
+        _revisions.delete(key)
+        _index_draft(key, None)
+    return removed
+
+
+def _delete_draft_file(p: Path) -> bool:
+    # Never let a queued save resurrect the file after it's gone
+    was_pending = _writer.is_pending(p)
+    _writer.discard(p)
+    _forget_draft(p)
 
+    removed = False
     try:
-        if p.exists():
+        if was_pending and not p.exists():
+            removed = True
+        elif p.exists():
             p.unlink()
-            return True
+            if _layout.contains(p):
+                _drafts_manifest().remove(p.name)
+            removed = True
+        if _layout.contains(p) and _archive().forget(p.name):
+            removed = True
     except Exception:
-        return False
-    return False
+        pass
+    return removed
 
 
 def rename_draft(path_or_name: str, new_name: str) -> Path | None:
@@ -138,25 +755,433 @@ def rename_draft(path_or_name: str, new_name: str) -> Path | None:
     if not new_name:
         return None
 
-    src = Path(path_or_name)
-    if not src.is_absolute():
-        src = DRAFTS_DIR / src
+    # Ensure .json extension
+    filename = _draft_filename(new_name)
 
-    if not src.exists():
+    store = _sqlite_store()
+    if store is not None:
+        if store.rename(_draft_key(path_or_name), filename):
+            _revisions.rename(_draft_key(path_or_name), filename)
+            _rename_indexed(_draft_key(path_or_name), filename)
+            return _layout.path(filename)
         return None
 
-    # Ensure .json extension
-    filename = new_name if new_name.endswith(".json") else f"{new_name}.json"
-    dest = src.with_name(filename)
+    src = _draft_path(path_or_name)
+
+    _writer.flush(src)
+    _writer.flush(_journal_path(src))
+    in_drafts = _layout.contains(src)
+    if not src.exists():
+        return _rename_archived(src.name, filename) if in_drafts else None
+
+    # a draft's shard depends on its name, so a rename usually moves it
+    dest = _layout.locate(filename) if in_drafts else src.with_name(filename)
+    _writer.discard(dest)
+    _forget_draft(dest)
 
     try:
         src.rename(dest)
-        return dest
     except Exception:
         return None
+    _journal_tracked.pop(src, None)
+    if _journal_path(src).exists():
+        try:
+            _journal_path(dest).parent.mkdir(exist_ok=True)
+            _journal_path(src).rename(_journal_path(dest))
+        except OSError:
+            pass
+    _revisions.rename(src.name, dest.name)
+    _rename_indexed(src.name, dest.name)
+    if in_drafts:
+        manifest = _drafts_manifest()
+        manifest.remove(dest.name)
+        try:
+            manifest.rename(src.name, dest.name, dest.stat())
+        except OSError:
+            manifest.remove(src.name)
+        # an older archived copy must not reappear under the old name
+        if src.name != dest.name:
+            _archive().forget(src.name)
+    return dest
+
+
+def _rename_archived(name: str, filename: str) -> Path | None:
+    """Rename an archive-only document: it becomes a loose draft again."""
+    data = _archive().load(name)
+    if data is None:
+        return None
+    dest = _layout.locate(filename)
+    if filename == name:
+        return dest
+    _writer.discard(dest)
+    _forget_draft(dest)
+    _save_draft_file(filename, dest, data)
+    _writer.flush(dest)
+    _archive().forget(name)
+    _revisions.rename(name, filename)
+    _rename_indexed(name, filename)
+    return dest
+
+
+# ---------- Revision history ----------
+# Every save_draft() adds a revision (see revisions.py); these take the same
+# path / filename / base name forms as the drafts API above.
+def list_revisions(path_or_name: str | Path) -> list[dict]:
+    """Revisions of a draft, oldest first: {"rev", "at", "kind", "changes"}."""
+    return _revisions.revisions(_draft_key(path_or_name))
+
+
+def load_revision(path_or_name: str | Path, rev: int) -> dict:
+    """Draft content as of revision rev. Raises KeyError if there is no such revision."""
+    return _revisions.load(_draft_key(path_or_name), rev)
+
+
+def diff_revisions(path_or_name: str | Path, rev_a: int, rev_b: int | None = None) -> list:
+    """
+    Field-level changes from rev_a to rev_b (default: the latest revision),
+    as journal ops: {"op": "set"|"del"|"splice", "path": [...], ...}.
+    """
+    return _revisions.diff(_draft_key(path_or_name), rev_a, rev_b)
+
+
+def restore_revision(path_or_name: str | Path, rev: int) -> Path:
+    """
+    Make revision rev the current content of the draft. The restore is
+    saved as a new revision, so nothing in the history is lost.
+    """
+    key = _draft_key(path_or_name)
+    return save_draft(_revisions.load(key, rev), key)
+
+
+def prune_revision_objects() -> int:
+    """Delete stored snapshots no longer referenced by any history."""
+    return _revisions.gc()
+
+
+# ---------- Archive packs ----------
+# Old documents can be moved out of DRAFTS_DIR into compressed packs in
+# ARCHIVE_DIR (see archive.py). load_draft() still opens them by name.
+ARCHIVE_PACK_DOCS = 5000
+_ARCHIVE_SAMPLE = 50
+_archive_packs = None
+
+
+def _archive():
+    global _archive_packs
+    if _archive_packs is None:
+        from invoicemint.services.archive import PackArchive
+
+        _archive_packs = PackArchive(ARCHIVE_DIR)
+    return _archive_packs
+
+
+def list_archived() -> list[dict]:
+    """Archived documents: name, mtime, pack and the list_drafts() summary fields."""
+    return _archive().entries()
+
+
+def _disk_usage(path: Path) -> int:
+    try:
+        st = path.stat()
+    except OSError:
+        return 0
+    blocks = getattr(st, "st_blocks", None)
+    return blocks * 512 if blocks is not None else st.st_size
+
+
+def _median_ms(samples: list[float]) -> float | None:
+    if not samples:
+        return None
+    samples = sorted(samples)
+    return samples[len(samples) // 2] * 1000
+
+
+def archive_drafts(before, dry_run: bool = False, progress=None):
+    """
+    Move drafts dated before `before` (a date or "YYYY-MM-DD"; drafts
+    without a document date go by file mtime) into compressed archive
+    packs, ARCHIVE_PACK_DOCS per pack. The loose files are removed once
+    their pack is safely on disk; revision history is kept.
+
+    progress(done, total) is called after each pack. Returns an
+    ArchiveReport with disk savings and loose-vs-packed load latency.
+    """
+    from time import perf_counter
+
+    from invoicemint.services.archive import ArchiveReport
+
+    if _sqlite_store() is not None:
+        raise RuntimeError("archive packs are for the JSON drafts backend")
+    cutoff = before.isoformat() if hasattr(before, "isoformat") else str(before)
+    report = ArchiveReport(cutoff=cutoff, dry_run=dry_run)
+
+    def dated(entry):
+        date = str(entry.get("date") or "")
+        if len(date) >= 10 and date[4] == "-" and date[7] == "-":
+            return date[:10]
+        return datetime.fromtimestamp(entry.get("mtime") or 0).strftime("%Y-%m-%d")
+
+    old = [e for e in list_drafts(rescan=True, archived=False) if dated(e) < cutoff]
+    for e in old:
+        path = Path(e["path"])
+        report.loose_bytes += _disk_usage(path) + _disk_usage(_journal_path(path))
+    report.documents = len(old)
+    if dry_run or not old:
+        return report
+
+    archive = _archive()
+    manifest = _drafts_manifest()
+    report.loose_bytes = 0
+    report.documents = 0
+    loose_times, packed_times = [], []
+    for start in range(0, len(old), ARCHIVE_PACK_DOCS):
+        chunk = []
+        for e in old[start:start + ARCHIVE_PACK_DOCS]:
+            path = _layout.locate(e["name"])
+            t0 = perf_counter()
+            loaded = _load_draft_file(path)
+            if len(loose_times) < _ARCHIVE_SAMPLE:
+                loose_times.append(perf_counter() - t0)
+            if loaded is None:
+                continue  # unreadable: leave it where it is
+            state, _base, _jbytes, key = loaded
+            chunk.append((e["name"], path, state, key))
+        if not chunk:
+            continue
+        pack_path = archive.add_pack(
+            (name, state, os.stat(path).st_mtime, _draft_summary(state))
+            for name, path, state, _key in chunk
+        )
+        report.packs.append(pack_path.name)
+        report.packed_bytes += pack_path.stat().st_size
+        for name, _path, _state, _key in chunk[:max(0, _ARCHIVE_SAMPLE - len(packed_times))]:
+            t0 = perf_counter()
+            archive.load(name)
+            packed_times.append(perf_counter() - t0)
+
+        for name, path, _state, key in chunk:
+            jpath = _journal_path(path)
+            # edited while we were packing: the loose file is newer, keep it
+            # (it shadows the packed copy)
+            if _writer.is_pending(path) or _writer.is_pending(jpath) \
+                    or _draft_stat_key(path, jpath) != key:
+                report.kept += 1
+                continue
+            report.loose_bytes += _disk_usage(path) + _disk_usage(jpath)
+            _forget_draft(path)
+            try:
+                path.unlink()
+            except OSError:
+                report.kept += 1
+                continue
+            manifest.remove(name)
+            report.documents += 1
+        if progress is not None:
+            progress(min(start + ARCHIVE_PACK_DOCS, len(old)), len(old))
+
+    report.loose_load_ms = _median_ms(loose_times)
+    report.packed_load_ms = _median_ms(packed_times)
+    manifest.save()
+    return report
+
+
+# ---------- Search index & report rollups ----------
+# Every document is indexed in SEARCH_DB (see search.py) and counted in the
+# report rollups (see reports.py) as it is saved, deleted or renamed. The
+# first use of either in a process also checks it against the listings,
+# which picks up drafts changed by other programs (and builds it the first
+# time). The rollups are only kept while loaded; until then a restart's
+# sync catches up from mtimes. That first sync re-reads every changed
+# document, so the app runs it on a background thread (start_index_sync)
+# rather than on the Tk thread.
+_search_index = None
+_search_synced = False
+_rollups = None
+_index_sync_lock = threading.RLock()   # one first-use sync at a time
+_index_sync_thread = None
+
+
+def _search():
+    """The search index, or None if this Python's SQLite lacks FTS5."""
+    global _search_index
+    if _search_index is None:
+        from invoicemint.services.search import SearchIndex, fts5_available
+
+        if not fts5_available():
+            return None
+        _search_index = SearchIndex(SEARCH_DB)
+    return _search_index
+
+
+def _indexes() -> list:
+    return [i for i in (_search(), _rollups) if i is not None]
+
+
+def _index_draft(name: str, data: dict | None):
+    # both are caches: a failed update is repaired by the next sync
+    for index in _indexes():
+        try:
+            if data is None:
+                index.remove(name)
+            else:
+                index.put(name, data)
+        except Exception:
+            pass
+
+
+def _rename_indexed(name: str, new_name: str):
+    for index in _indexes():
+        try:
+            index.rename(name, new_name)
+        except Exception:
+            pass
+
+
+def _document_mtimes(rescan: bool = False) -> dict:
+    """name -> mtime of every document; archived ones included."""
+    return {e["name"]: e.get("mtime") for e in list_drafts(rescan=rescan)}
+
+
+def _load_indexed(name: str) -> dict | None:
+    store = _sqlite_store()
+    if store is not None:
+        return store.load(name)
+    path = _layout.find(name)
+    loaded = _load_draft_file(path) if path is not None else None
+    if loaded is not None:
+        return loaded[0]
+    return _archive().load(name)
+
+
+def sync_search_index(rescan: bool = False, progress=None) -> int:
+    """
+    Re-index documents whose listing mtime differs from the indexed one
+    and drop documents that are gone; archived documents stay searchable.
+    progress(done, total) as in SearchIndex.sync. Returns how many
+    documents were (re)indexed.
+    """
+    global _search_synced
+    index = _search()
+    if index is None:
+        return 0
+    with _index_sync_lock:
+        count = index.sync(_document_mtimes(rescan).items(), _load_indexed, progress=progress)
+        _search_synced = True
+    return count
+
+
+def _sync_indexed_names(changes: dict):
+    """Catch up on drafts a watcher reported (name -> list_drafts() entry or None)."""
+    present = [(n, e.get("mtime")) for n, e in changes.items() if e is not None]
+    gone = [n for n, e in changes.items() if e is None]
+    indexes = [_rollups] if _rollups is not None else []
+    if _search_synced:
+        indexes.append(_search_index)
+    for index in indexes:
+        try:
+            index.sync(present, _load_indexed, complete=False)
+            for name in gone:
+                index.remove(name)
+        except Exception:
+            pass
+
+
+def search_documents(query: str, limit: int = 50, rescan: bool = False) -> list[dict]:
+    """
+    Full-text search over document numbers, client fields, line items and
+    notes. Every word must match; the last one may be a prefix ("serv"
+    finds "server"). Best matches first:
+
+        {"name", "path", "score", "snippet"}
+
+    score is bm25 (lower is better) and snippet shows the hits in [brackets].
+    """
+    index = _search()
+    if index is None:
+        return []
+    if rescan or not _search_synced:
+        with _index_sync_lock:  # waits for start_index_sync's run, if any
+            if rescan or not _search_synced:
+                sync_search_index(rescan=rescan)
+    return [_with_path(hit) for hit in index.search(query, limit)]
+
+
+def get_report_rollups(rescan: bool = False):
+    """
+    The report rollups (see reports.ReportRollups): count, subtotal, tax
+    and grand total per doc_type, status, client and month, plus
+    outstanding() and overdue() invoice totals. Loaded and brought up to
+    date on first use; kept current by the drafts API after that.
+    """
+    global _rollups
+    if _rollups is None:
+        from invoicemint.services.reports import ReportRollups
+
+        with _index_sync_lock:
+            if _rollups is None:
+                rollups = ReportRollups(ROLLUPS_FILE)
+                rollups.sync(_document_mtimes().items(), _load_indexed)
+                _rollups = rollups
+                # saves made during the (possibly long) sync weren't counted yet
+                rollups.sync(_document_mtimes().items(), _load_indexed)
+                rollups.save()
+                return _rollups
+    if rescan:
+        _rollups.sync(_document_mtimes(rescan=True).items(), _load_indexed)
+        _rollups.save()
+    return _rollups
+
+
+def report_rollups_if_ready():
+    """The report rollups if they are loaded and synced, else None (never blocks)."""
+    return _rollups
+
+
+def start_index_sync():
+    """
+    Load and sync the report rollups, then the search index, on a
+    background thread (once per process). Pages poll
+    report_rollups_if_ready() instead of blocking the Tk thread on it.
+    """
+    global _index_sync_thread
+    if _index_sync_thread is not None:
+        return
+    # created here so the thread never races the caller to create them
+    if _sqlite_store() is None:
+        _drafts_manifest()
+        _archive()
+    _search()
+
+    def run():
+        for step in (get_report_rollups, sync_search_index):
+            try:
+                step()
+            except Exception:
+                pass  # caches: the next use retries on the calling thread
+
+    _index_sync_thread = threading.Thread(target=run, name="invoicemint-index-sync", daemon=True)
+    _index_sync_thread.start()
 
 
 # ---------- Recent documents helper ----------
+# name -> st_mtime_ns of a draft version that could not be decoded; skipped
+# by get_recent_documents() until the file changes.
+_unreadable_drafts: dict[str, int] = {}
+
+
+def _recent_item(entry: dict) -> dict:
+    """Map a summary row (manifest / SQLite) to the dashboard item shape."""
+    return {
+        "id": Path(entry["name"]).stem,
+        "filename": entry["name"],
+        "client_name": entry.get("client_name") or "Unknown client",
+        "doc_type": entry.get("doc_type") or "invoice",
+        "total": entry.get("total"),
+        "date": entry.get("date"),
+        "modified": entry.get("mtime", 0),
+    }
+
+
 def get_recent_documents(limit: int = 5):
     """
     Return a list of recent documents (drafts) sorted by last modified time
@@ -173,43 +1198,86 @@ def get_recent_documents(limit: int = 5):
         "modified": 1734300000.0  # epoch seconds
     }
     """
+    store = _sqlite_store()
+    if store is not None:
+        return [_recent_item(row) for row in store.recent(limit)]
+
+    if limit <= 0:
+        return []
+
+    _writer.flush()
+
+    # Pick the newest `limit` candidates from stat data alone, then decode
+    # just those. A candidate that turns out unreadable is remembered and
+    # the pick is repeated, so the result still holds `limit` documents.
     docs: list[dict] = []
+    while True:
+        docs.clear()
+        failed = False
+        for mtime_ns, name, path, st in _newest_draft_entries(limit):
+            summary = _cached_summary(name, st)
+            if summary is None:
+                loaded = _load_draft_file(Path(path))
+                if loaded is None:
+                    _unreadable_drafts[name] = mtime_ns
+                    failed = True
+                    continue
+                summary = _draft_summary(loaded[0])
+                if _manifest is not None:
+                    _manifest.update(name, summary, st)
+            docs.append(_recent_item({
+                **summary, "name": name, "mtime": st.st_mtime,
+            }))
+        if not failed:
+            return docs
 
-    if not DRAFTS_DIR.exists():
-        return docs
 
-    for path in DRAFTS_DIR.glob("*.json"):
+def _newest_draft_entries(limit: int) -> list[tuple]:
+    """
+    (mtime_ns, name, path, stat) for the `limit` most recently modified
+    drafts, newest first. One scan of the shards with a bounded min-heap.
+    """
+    heap: list[tuple] = []
+    seen = set()
+    for entry in _layout.scan():
+        name = entry.name
+        if name in seen:
+            continue  # moved into its shard during the scan
+        seen.add(name)
         try:
-            data = _read_json(path, {}) or {}
-
-            # Try to infer client name from common shapes
-            client_name = (
-                (data.get("client") or {}).get("name")  # nested client dict
-                or data.get("client_name")              # flat
-                or "Unknown client"
-            )
-
-            # Try a couple of common date keys
-            date = (
-                data.get("date")
-                or data.get("invoice_date")
-                or data.get("issue_date")
-            )
-
-            doc = {
-                "id": path.stem,
-                "filename": path.name,
-                "client_name": client_name,
-                "doc_type": data.get("doc_type", "invoice"),
-                "total": data.get("total_amount"),
-                "date": date,
-                "modified": path.stat().st_mtime,
-            }
-            docs.append(doc)
-        except Exception:
-            # Ignore corrupt or unreadable files
+            st = entry.stat()
+        except OSError:
+            continue
+        key = st.st_mtime_ns
+        if _unreadable_drafts.get(name) == key:
             continue
+        item = (key, name, entry.path, st)
+        if len(heap) < limit:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+    heap.sort(reverse=True)
+    return heap
+
+
+def _cached_summary(name: str, st: os.stat_result) -> dict | None:
+    """Summary from the manifest if it is loaded and still matches the file."""
+    if _manifest is None:
+        return None
+    entry = _manifest.get(name)
+    if entry and entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns:
+        return entry
+    return None
+
+
+# ---------- Shutdown ----------
+def _flush_on_exit():
+    """Write out queued saves, then the drafts manifest."""
+    _writer.close(timeout=30)
+    if _manifest is not None:
+        _manifest.save()
+    if _rollups is not None:
+        _rollups.save()
+
 
-    # Newest first
-    docs.sort(key=lambda d: d["modified"], reverse=True)
-    return docs[:limit]
+atexit.register(_flush_on_exit)
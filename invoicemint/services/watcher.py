@@ -0,0 +1,301 @@
+# invoicemint/services/watcher.py
+"""
+Change notifications for the drafts directory.
+
+DraftsWatcher reports drafts that were added, changed or removed, whoever
+wrote them: this app, another instance, or a script. Drafts sit in shard
+subdirectories (see layout.py), so the directory and its immediate
+subdirectories are watched, and drafts are identified by file name alone.
+On Linux it sleeps on inotify. Elsewhere, or when inotify is unavailable,
+it polls with os.scandir. Either way the events come from comparing
+(mtime_ns, size) snapshots, so a burst of writes to one file shows up as
+one "changed" event, and a draft moved between shards is no event at all.
+
+Callbacks run on the watcher thread. UI code should hand events over to the
+Tk loop (e.g. through a queue polled with after()) before touching widgets.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+ADDED = "added"
+CHANGED = "changed"
+REMOVED = "removed"
+
+
+@dataclass(slots=True, frozen=True)
+class DraftEvent:
+    kind: str   # ADDED | CHANGED | REMOVED
+    name: str   # file name inside the watched directory
+    path: Path
+
+
+# ---------- inotify (Linux) ----------
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_ONLYDIR = 0x01000000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = (_IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO
+               | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_ONLYDIR)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _inotify_calls():
+    """(inotify_init1, inotify_add_watch) from libc, or None if unavailable."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        return libc.inotify_init1, libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+
+
+def _read_inotify(fd: int) -> tuple[set[tuple[int, str]], bool]:
+    """
+    Drain pending inotify events: ((watch descriptor, name) pairs touched,
+    needs full rescan). A directory created in the root also asks for a
+    rescan, so a new shard gets a watch.
+    """
+    names: set[tuple[int, str]] = set()
+    rescan = False
+    while True:
+        try:
+            buf = os.read(fd, 64 * 1024)
+        except BlockingIOError:
+            break
+        if not buf:
+            break
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buf):
+            _wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(buf, offset)
+            offset += _EVENT_HEADER.size
+            raw = buf[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & (_IN_Q_OVERFLOW | _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_ISDIR):
+                rescan = True
+            elif raw:
+                names.add((_wd, os.fsdecode(raw)))
+    return names, rescan
+
+
+# ---------- watcher ----------
+class DraftsWatcher:
+    """
+    Watch `directory` for *.json drafts being added, changed or removed.
+
+    interval: polling period in seconds (polling mode), and the longest
+              the inotify loop sleeps before re-checking for stop()
+    settle:   how long to keep collecting events after the first one, so
+              a save (temp file + rename + utime) is reported once
+    """
+
+    def __init__(self, directory: str | Path, interval: float = 1.0,
+                 settle: float = 0.05, use_inotify: bool = True):
+        self.directory = Path(directory)
+        self.interval = interval
+        self.settle = settle
+        self._use_inotify = use_inotify
+        self._callbacks: list = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        # name -> (mtime_ns, size, path)
+        self._known: dict[str, tuple[int, int, Path]] = {}
+        self._inotify = None
+        self._fd: int | None = None
+        self._watches: dict[int, Path] = {}  # inotify wd -> directory
+        self.mode: str | None = None  # "inotify" | "polling" once started
+
+    # ---------- subscribers ----------
+    def subscribe(self, callback):
+        """callback(events: list[DraftEvent]), called on the watcher thread."""
+        with self._lock:
+            self._callbacks.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def _emit(self, events: list[DraftEvent]):
+        if not events:
+            return
+        with self._lock:
+            callbacks = list(self._callbacks)
+        for cb in callbacks:
+            try:
+                cb(events)
+            except Exception:
+                pass
+
+    # ---------- stat diffing ----------
+    @staticmethod
+    def _wanted(name: str) -> bool:
+        return name.endswith(".json") and not name.startswith(".")
+
+    def _subdirs(self) -> list[Path]:
+        try:
+            with os.scandir(self.directory) as it:
+                return [Path(e.path) for e in it
+                        if not e.name.startswith(".") and e.is_dir(follow_symlinks=False)]
+        except OSError:
+            return []
+
+    @staticmethod
+    def _stat(path: Path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, path)
+
+    def _snapshot(self) -> dict[str, tuple[int, int, Path]]:
+        found = {}
+        for directory in [self.directory, *self._subdirs()]:
+            try:
+                it = os.scandir(directory)
+            except OSError:
+                continue
+            with it:
+                for entry in it:
+                    if not self._wanted(entry.name):
+                        continue
+                    try:
+                        if not entry.is_file():
+                            continue
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    found[entry.name] = (st.st_mtime_ns, st.st_size, Path(entry.path))
+        return found
+
+    def _diff(self, names, current: dict) -> list[DraftEvent]:
+        events = []
+        for name in sorted(names):
+            old, new = self._known.get(name), current.get(name)
+            if old == new:
+                continue
+            if new is None:
+                del self._known[name]
+                events.append(DraftEvent(REMOVED, name, old[2]))
+                continue
+            self._known[name] = new
+            if old is not None and old[:2] == new[:2]:
+                continue  # only moved (e.g. into its shard)
+            events.append(DraftEvent(ADDED if old is None else CHANGED, name, new[2]))
+        return events
+
+    def scan(self) -> list[DraftEvent]:
+        """Full stat-diff pass against the last known state."""
+        current = self._snapshot()
+        return self._diff(set(self._known) | set(current), current)
+
+    def check(self, names, dirs=()) -> list[DraftEvent]:
+        """
+        Stat-diff only the given file names: where they were last seen,
+        in the root, and in any of `dirs`.
+        """
+        names = {n for n in names if self._wanted(n)}
+        current = {}
+        for name in names:
+            known = self._known.get(name)
+            candidates = [self.directory, *dirs]
+            if known is not None:
+                candidates.insert(0, known[2].parent)
+            for directory in dict.fromkeys(candidates):
+                st = self._stat(directory / name)
+                if st is not None:
+                    current[name] = st
+                    break
+        return self._diff(names, current)
+
+    # ---------- lifecycle ----------
+    def _open_inotify(self) -> int | None:
+        """inotify fd watching the root and its subdirectories, or None."""
+        calls = _inotify_calls()
+        if calls is None:
+            return None
+        init1, add_watch = calls
+        fd = init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            return None
+        wd = add_watch(fd, os.fsencode(self.directory), _WATCH_MASK)
+        if wd < 0:
+            os.close(fd)
+            return None
+        self._fd, self._inotify = fd, add_watch
+        self._watches = {wd: self.directory}
+        self._watch_subdirs()
+        return fd
+
+    def _watch_subdirs(self):
+        watched = set(self._watches.values())
+        for directory in self._subdirs():
+            if directory not in watched:
+                wd = self._inotify(self._fd, os.fsencode(directory), _WATCH_MASK)
+                if wd >= 0:
+                    self._watches[wd] = directory
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._known = self._snapshot()
+        fd = self._open_inotify() if self._use_inotify else None
+        self.mode = "inotify" if fd is not None else "polling"
+        target = self._run_inotify if fd is not None else self._run_polling
+        args = (fd,) if fd is not None else ()
+        self._thread = threading.Thread(target=target, args=args,
+                                        name="invoicemint-drafts-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float | None = 2.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run_polling(self):
+        while not self._stop.wait(self.interval):
+            self._emit(self.scan())
+
+    def _run_inotify(self, fd: int):
+        try:
+            while not self._stop.is_set():
+                ready, _, _ = select.select([fd], [], [], self.interval)
+                if not ready:
+                    continue
+                touched, rescan = _read_inotify(fd)
+                # let the rest of the save land, then take it in one go
+                deadline = time.monotonic() + self.settle
+                while (left := deadline - time.monotonic()) > 0:
+                    if select.select([fd], [], [], left)[0]:
+                        more, more_rescan = _read_inotify(fd)
+                        touched |= more
+                        rescan = rescan or more_rescan
+                if rescan:
+                    self._watch_subdirs()
+                    self._emit(self.scan())
+                    continue
+                dirs = {self._watches[wd] for wd, _ in touched if wd in self._watches}
+                self._emit(self.check({name for _, name in touched}, dirs))
+        finally:
+            self._fd = None
+            os.close(fd)
@@ -0,0 +1,189 @@
+# invoicemint/services/writer.py
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+
+def atomic_write_bytes(path: str | Path, payload: bytes):
+    """
+    Write payload to path atomically: temp file in the same directory,
+    fsync, then os.replace() over the target. Readers see either the old
+    or the new file, never a half-written one.
+    """
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def append_bytes(path: str | Path, payload: bytes):
+    """Append payload to path (creating it) and fsync."""
+    with open(path, "ab") as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+class WriteBehindQueue:
+    """
+    Background writer thread for small JSON files.
+
+    submit() hands a serialized payload to the writer and returns at once.
+    Repeated submissions for the same path before it is written are
+    coalesced, so only the newest payload hits the disk. Failed writes are
+    reported to the registered error callbacks (called on the writer thread
+    as callback(path, exc)).
+    """
+
+    def __init__(self, name: str = "invoicemint-writer"):
+        self._name = name
+        # path -> (payload, callbacks, append)
+        self._pending: OrderedDict[Path, tuple[bytes, list, bool]] = OrderedDict()
+        self._inflight: Path | None = None
+        self._inflight_payload: bytes | None = None
+        self._cond = threading.Condition()
+        self._error_callbacks: list = []
+        self._thread: threading.Thread | None = None
+        self._closed = False
+
+    # ---------- producer side ----------
+    def submit(self, path: str | Path, payload: bytes, on_written=None, append: bool = False):
+        """
+        Queue payload for path. on_written (optional) is called on the
+        writer thread once the file is in place.
+
+        append=True adds payload to the end of the file instead of
+        replacing it; queued appends to the same file are concatenated
+        (onto a queued replacement, if there is one).
+        """
+        path = Path(path)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("write queue is closed")
+            callbacks = []
+            if path in self._pending:
+                # coalesce: keep the newest content, but run every callback
+                old_payload, callbacks, old_append = self._pending.pop(path)
+                if append:
+                    payload = old_payload + payload
+                    append = old_append
+            if on_written is not None:
+                callbacks.append(on_written)
+            self._pending[path] = (payload, callbacks, append)
+            self._ensure_thread()
+            self._cond.notify_all()
+
+    def pending(self, path: str | Path) -> bytes | None:
+        """
+        Full replacement content queued (or being written right now) for
+        path, if any. Queued appends are not reported; flush(path) first
+        when reading an append-only file.
+        """
+        path = Path(path)
+        with self._cond:
+            item = self._pending.get(path)
+            if item is not None:
+                return None if item[2] else item[0]
+            if self._inflight == path:
+                return self._inflight_payload
+        return None
+
+    def is_pending(self, path: str | Path) -> bool:
+        """True while any write for path is queued or in progress."""
+        path = Path(path)
+        with self._cond:
+            return path in self._pending or self._inflight == path
+
+    def discard(self, path: str | Path):
+        """Drop a queued write for path and wait out one already in progress."""
+        path = Path(path)
+        with self._cond:
+            self._pending.pop(path, None)
+            while self._inflight == path:
+                self._cond.wait()
+
+    def flush(self, path: str | Path | None = None, timeout: float | None = None) -> bool:
+        """
+        Block until everything queued (or just `path`) has been written.
+        Returns False if the timeout expired first.
+        """
+        target = Path(path) if path is not None else None
+
+        def busy():
+            if target is None:
+                return bool(self._pending) or self._inflight is not None
+            return target in self._pending or self._inflight == target
+
+        with self._cond:
+            return self._cond.wait_for(lambda: not busy(), timeout=timeout)
+
+    def add_error_callback(self, callback):
+        with self._cond:
+            self._error_callbacks.append(callback)
+
+    def remove_error_callback(self, callback):
+        with self._cond:
+            if callback in self._error_callbacks:
+                self._error_callbacks.remove(callback)
+
+    def close(self, timeout: float | None = None):
+        """Flush outstanding writes and stop the writer thread."""
+        self.flush(timeout=timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    # ---------- writer thread ----------
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                path, (payload, callbacks, append) = self._pending.popitem(last=False)
+                self._inflight = path
+                self._inflight_payload = None if append else payload
+
+            error = None
+            try:
+                if append:
+                    append_bytes(path, payload)
+                else:
+                    atomic_write_bytes(path, payload)
+                for cb in callbacks:
+                    cb()
+            except Exception as exc:
+                error = exc
+
+            with self._cond:
+                self._inflight = None
+                self._inflight_payload = None
+                listeners = list(self._error_callbacks)
+                self._cond.notify_all()
+
+            if error is not None:
+                for cb in listeners:
+                    try:
+                        cb(path, error)
+                    except Exception:
+                        pass
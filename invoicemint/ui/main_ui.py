@@ -1,10 +1,16 @@
 # Modern shell using CustomTkinter
+import queue
 import customtkinter as ctk
 from invoicemint.ui.pages.invoice_builder import InvoiceBuilder
 from invoicemint.ui.pages.clients import ClientsPage
 from invoicemint.ui.pages.templates import TemplatesPage
 from invoicemint.ui.pages.settings import SettingsPage
-from invoicemint.services.storage import load_settings, save_settings, list_drafts, load_draft
+from invoicemint.services.storage import (
+    load_settings, save_settings, list_drafts, load_draft,
+    flush_pending_writes, add_write_error_callback, remove_write_error_callback,
+    sync_drafts, start_index_sync, DRAFTS_DIR,
+)
+from invoicemint.services.watcher import DraftsWatcher
 from invoicemint.ui.pages.history import DraftsHistory
 from invoicemint.ui.pages.dashboard import DashboardPage
 
@@ -39,6 +45,25 @@ class MainApp(ctk.CTk):  # App window
         # Start on dashboard instead of invoice
         self.show_page("dashboard")
 
+        # Saves happen on a background writer; failures are reported from
+        # that thread, so queue them and show them from the Tk loop.
+        self._write_errors = queue.SimpleQueue()
+        add_write_error_callback(self._on_write_error)
+        self.after(500, self._poll_write_errors)
+
+        # Drafts written by another instance or a script show up without a
+        # manual refresh; events arrive on the watcher thread.
+        self._draft_events = queue.SimpleQueue()
+        self.drafts_watcher = DraftsWatcher(DRAFTS_DIR)
+        self.drafts_watcher.subscribe(self._draft_events.put)
+        self.drafts_watcher.start()
+        self.after(300, self._poll_draft_events)
+
+        # search index + report rollups catch up off the Tk thread
+        start_index_sync()
+
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
     # ---------- UI bits ----------
     def _build_topbar(self):
         self.topbar = ctk.CTkFrame(self, corner_radius=12)
@@ -96,6 +121,48 @@ class MainApp(ctk.CTk):  # App window
             )
             btn.pack(fill="x", padx=10, pady=6)
 
+    # ---------- Persistence ----------
+    def _on_write_error(self, path, exc):
+        # runs on the writer thread: never touch widgets here
+        self._write_errors.put((path, exc))
+
+    def _poll_write_errors(self):
+        try:
+            path, exc = self._write_errors.get_nowait()
+        except queue.Empty:
+            pass
+        else:
+            toast = ctk.CTkToplevel(self)
+            toast.title("Save failed")
+            ctk.CTkLabel(
+                toast,
+                text=f"Could not save {path}:\n{exc}",
+            ).pack(padx=16, pady=16)
+            toast.geometry("+%d+%d" % (self.winfo_rootx() + 120, self.winfo_rooty() + 80))
+            toast.after(4000, toast.destroy)
+        self.after(500, self._poll_write_errors)
+
+    def _poll_draft_events(self):
+        names = set()
+        while True:
+            try:
+                events = self._draft_events.get_nowait()
+            except queue.Empty:
+                break
+            names.update(e.name for e in events)
+        if names:
+            changes = sync_drafts(names)
+            if changes and hasattr(self.current_page, "apply_draft_changes"):
+                self.current_page.apply_draft_changes(changes)
+        self.after(300, self._poll_draft_events)
+
+    def _on_close(self):
+        self.drafts_watcher.stop()
+        # make sure queued saves reach the disk before the window goes away
+        flush_pending_writes(timeout=10)
+        remove_write_error_callback(self._on_write_error)
+        self.destroy()
+
     # ---------- Behavior ----------
     def toggle_theme(self):
         mode = ctk.get_appearance_mode()
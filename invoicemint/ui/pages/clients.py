@@ -1,6 +1,16 @@
 import customtkinter as ctk
 import tkinter as tk
-from invoicemint.services.storage import load_clients, save_clients
+from pathlib import Path
+from tkinter import filedialog
+
+from invoicemint.services.client_io import import_clients, export_clients
+from invoicemint.services.storage import (
+    load_clients, add_client, delete_client, get_client, get_client_index,
+)
+
+# Rendering a row per client is the slow part on big books; show the first
+# MAX_ROWS matches and say how many more there are.
+MAX_ROWS = 200
 
 
 class ClientsPage(ctk.CTkFrame):
@@ -28,12 +38,23 @@ class ClientsPage(ctk.CTkFrame):
         search = ctk.CTkEntry(
             header_row,
             textvariable=self.search_var,
-            placeholder_text="Search clients (name, email, address)…",
+            placeholder_text="Search clients (name, email, address, phone)…",
             width=360,
         )
         search.grid(row=0, column=1, sticky="e", padx=(12, 0))
         search.bind("<KeyRelease>", self._on_search)
 
+        ctk.CTkButton(header_row, text="Import…", width=90, command=self._import).grid(
+            row=0, column=2, padx=(8, 0)
+        )
+        ctk.CTkButton(header_row, text="Export…", width=90, command=self._export).grid(
+            row=0, column=3, padx=(8, 0)
+        )
+        self.progress_var = tk.StringVar(value="")
+        ctk.CTkLabel(
+            header_row, textvariable=self.progress_var, text_color=("#6b7280", "#9ca3af")
+        ).grid(row=1, column=0, columnspan=4, sticky="e")
+
         # Form row
         form = ctk.CTkFrame(self, corner_radius=12)
         form.grid(row=1, column=0, sticky="ew", padx=16, pady=(0, 8))
@@ -59,21 +80,10 @@ class ClientsPage(ctk.CTkFrame):
     # -------------------------
     # Search / filtering
     # -------------------------
-    def _matches(self, client: dict, q: str) -> bool:
-        if not q:
-            return True
-        q = q.lower().strip()
-
-        name = str(client.get("name", "")).lower()
-        email = str(client.get("email", "")).lower()
-        addr = str(client.get("address", "")).lower()
-
-        # simple contains; we can upgrade to fuzzy later
-        return (q in name) or (q in email) or (q in addr)
-
     def _on_search(self, *_):
         q = (self.search_var.get() or "").strip()
-        self.filtered_clients = [c for c in self.clients if self._matches(c, q)]
+        index = get_client_index()
+        self.filtered_clients = index.search_clients(q) if q else list(self.clients)
         self._render_list()
 
     # -------------------------
@@ -85,8 +95,15 @@ class ClientsPage(ctk.CTkFrame):
 
     def _render_list(self):
         self._clear_list()
-        for c in self.filtered_clients:
+        for c in self.filtered_clients[:MAX_ROWS]:
             self._add_list_row(c)
+        hidden = len(self.filtered_clients) - MAX_ROWS
+        if hidden > 0:
+            ctk.CTkLabel(
+                self.list_frame,
+                text=f"…and {hidden:,} more. Refine the search to narrow it down.",
+                text_color=("#6b7280", "#9ca3af"),
+            ).pack(padx=10, pady=10)
 
     def _add_list_row(self, c):
         row = ctk.CTkFrame(self.list_frame, corner_radius=8)
@@ -99,9 +116,13 @@ class ClientsPage(ctk.CTkFrame):
         ctk.CTkLabel(row, text=name, width=180, anchor="w").pack(side="left", padx=10, pady=10)
         ctk.CTkLabel(row, text=email, width=220, anchor="w").pack(side="left", padx=10, pady=10)
         ctk.CTkLabel(row, text=addr, anchor="w").pack(side="left", padx=10, pady=10)
+        ctk.CTkButton(
+            row, text="Delete", width=70, fg_color="transparent", border_width=1,
+            command=lambda cid=c.get("id"): self.delete_client(cid),
+        ).pack(side="right", padx=10, pady=10)
 
     # -------------------------
-    # Add
+    # Add / delete
     # -------------------------
     def add_client(self):
         name = self.e_name.get().strip()
@@ -111,8 +132,7 @@ class ClientsPage(ctk.CTkFrame):
             return
 
         obj = {"name": name, "email": email, "address": addr}
-        self.clients.append(obj)
-        save_clients(self.clients)
+        self.clients.append(get_client(add_client(obj)))
 
         # Clear inputs
         self.e_name.delete(0, tk.END)
@@ -121,3 +141,72 @@ class ClientsPage(ctk.CTkFrame):
 
         # Re-filter using current search text so list stays consistent
         self._on_search()
+
+    def delete_client(self, client_id):
+        if not client_id or not delete_client(client_id):
+            return
+        self.clients = [c for c in self.clients if c.get("id") != client_id]
+        self._on_search()
+
+    # -------------------------
+    # Import / export
+    # -------------------------
+    def _show_progress(self, text):
+        self.progress_var.set(text)
+        self.update_idletasks()
+
+    def _import(self):
+        path = filedialog.askopenfilename(
+            title="Import clients",
+            filetypes=[("Clients", "*.csv *.vcf *.vcard"), ("CSV", "*.csv"), ("vCard", "*.vcf *.vcard")],
+        )
+        if not path:
+            return
+        # dry run first, so the user sees what will happen before anything is saved
+        report = import_clients(
+            path, dry_run=True,
+            progress=lambda r: self._show_progress(f"Checking… {r.rows:,} rows"),
+        )
+        self._show_progress("")
+
+        win = ctk.CTkToplevel(self)
+        win.title("Import clients")
+        ctk.CTkLabel(win, text=f"{Path(path).name}\n\n{report.summary()}",
+                     wraplength=380, justify="left").pack(padx=16, pady=(16, 8))
+        buttons = ctk.CTkFrame(win, fg_color="transparent")
+        buttons.pack(pady=(0, 16))
+
+        def run():
+            win.destroy()
+            done = import_clients(
+                path, progress=lambda r: self._show_progress(f"Importing… {r.rows:,} rows")
+            )
+            self._show_progress(done.summary())
+            self.clients = load_clients() or []
+            self._on_search()
+
+        ok = ctk.CTkButton(buttons, text=f"Import {report.added:,}", width=120, command=run)
+        ok.pack(side="left", padx=6)
+        if not report.added:
+            ok.configure(state="disabled")
+        ctk.CTkButton(buttons, text="Cancel", width=90, command=win.destroy).pack(side="left", padx=6)
+        win.transient(self.winfo_toplevel())
+        win.grab_set()
+
+    def _export(self):
+        path = filedialog.asksaveasfilename(
+            title="Export clients",
+            defaultextension=".csv",
+            initialfile="clients.csv",
+            filetypes=[("CSV", "*.csv"), ("vCard", "*.vcf")],
+        )
+        if not path:
+            return
+        try:
+            count = export_clients(
+                path, progress=lambda n: self._show_progress(f"Exporting… {n:,} clients")
+            )
+        except (OSError, ValueError) as e:
+            self._show_progress(f"Export failed: {e}")
+            return
+        self._show_progress(f"Exported {count:,} clients to {Path(path).name}")
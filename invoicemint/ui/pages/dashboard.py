@@ -1,6 +1,12 @@
+from datetime import date
+
 import customtkinter as ctk
 
-from invoicemint.services.storage import get_recent_documents, DRAFTS_DIR
+from invoicemint.services.storage import (
+    get_recent_documents, report_rollups_if_ready, start_index_sync, DRAFTS_DIR,
+)
+
+STATS_POLL_MS = 250  # while the report rollups are still syncing in the background
 
 
 class DashboardPage(ctk.CTkFrame):
@@ -19,6 +25,8 @@ class DashboardPage(ctk.CTkFrame):
         """
         super().__init__(master, **kwargs)
         self.app = app
+        self._rows: dict[str, tuple] = {}  # filename -> (row frame, doc)
+        self._stats_job = None
 
         self._build_ui()
         self.refresh()
@@ -109,6 +117,28 @@ class DashboardPage(ctk.CTkFrame):
         )
         self.quote_count_label.grid(row=2, column=0, sticky="w", padx=10, pady=2)
 
+        # Money figures, from the report rollups
+        self.paid_label = ctk.CTkLabel(stats_frame, text="Paid: $0.00", font=ctk.CTkFont(size=13))
+        self.paid_label.grid(row=3, column=0, sticky="w", padx=10, pady=(10, 2))
+
+        self.outstanding_label = ctk.CTkLabel(
+            stats_frame, text="Outstanding: $0.00", font=ctk.CTkFont(size=13)
+        )
+        self.outstanding_label.grid(row=4, column=0, sticky="w", padx=10, pady=2)
+
+        self.overdue_label = ctk.CTkLabel(
+            stats_frame,
+            text="Overdue: $0.00",
+            font=ctk.CTkFont(size=13),
+            text_color=("#b91c1c", "#f87171"),
+        )
+        self.overdue_label.grid(row=5, column=0, sticky="w", padx=10, pady=2)
+
+        self.month_label = ctk.CTkLabel(
+            stats_frame, text="Invoiced this month: $0.00", font=ctk.CTkFont(size=13)
+        )
+        self.month_label.grid(row=6, column=0, sticky="w", padx=10, pady=2)
+
         # Recent docs list
         recent_frame = ctk.CTkFrame(lower_frame)
         recent_frame.grid(row=0, column=1, rowspan=2, sticky="nsew", padx=(5, 10), pady=10)
@@ -150,73 +180,129 @@ class DashboardPage(ctk.CTkFrame):
         Reload stats and recent documents.
         Call this when the dashboard is shown to keep it up to date.
         """
-        docs = get_recent_documents(limit=10)
+        self._render_stats()
+        self._render(get_recent_documents(limit=10), rebuild=True)
 
-        # Update stats
-        total = len(docs)
-        invoices = sum(1 for d in docs if d.get("doc_type") == "invoice")
-        quotes = sum(1 for d in docs if d.get("doc_type") == "quote")
+    def apply_draft_changes(self, changes: dict):
+        """
+        Drafts changed on disk (see storage.sync_drafts): re-read the recent
+        list and rebuild only rows whose document changed.
+        """
+        if changes:
+            self._render_stats()
+            self._render(get_recent_documents(limit=10), changed=set(changes))
+
+    def _render_stats(self):
+        # Every document, not just the recent ones; each figure is a lookup.
+        # The first sync of the rollups re-reads changed drafts, so it runs
+        # in the background and the figures appear when it's done.
+        rollups = report_rollups_if_ready()
+        if rollups is None:
+            start_index_sync()
+            self.total_docs_label.configure(text="Total documents: counting…")
+            if self._stats_job is None:
+                self._stats_job = self.after(STATS_POLL_MS, self._poll_stats)
+            return
+        invoices = rollups.get("doc_type", "invoice")
+        quotes = rollups.get("doc_type", "quote")
+        paid = rollups.get("status", "PAID", doc_type="invoice")
+        outstanding = rollups.outstanding()
+        overdue = rollups.overdue()
+        this_month = rollups.get("month", date.today().strftime("%Y-%m"), doc_type="invoice")
+
+        self.total_docs_label.configure(text=f"Total documents: {rollups.total().count}")
+        self.invoice_count_label.configure(
+            text=f"Invoices: {invoices.count} (${invoices.grand_total:,.2f})"
+        )
+        self.quote_count_label.configure(
+            text=f"Quotes: {quotes.count} (${quotes.grand_total:,.2f})"
+        )
+        self.paid_label.configure(text=f"Paid: ${paid.grand_total:,.2f}")
+        self.outstanding_label.configure(
+            text=f"Outstanding: ${outstanding.grand_total:,.2f} ({outstanding.count})"
+        )
+        self.overdue_label.configure(
+            text=f"Overdue: ${overdue.grand_total:,.2f} ({overdue.count})"
+        )
+        self.month_label.configure(
+            text=f"Invoiced this month: ${this_month.grand_total:,.2f}"
+        )
 
-        self.total_docs_label.configure(text=f"Total documents: {total}")
-        self.invoice_count_label.configure(text=f"Invoices: {invoices}")
-        self.quote_count_label.configure(text=f"Quotes: {quotes}")
+    def _poll_stats(self):
+        self._stats_job = None
+        if self.winfo_exists():
+            self._render_stats()
 
-        # Clear existing rows in recent_list
-        for widget in self.recent_list.winfo_children():
-            widget.destroy()
+    def _render(self, docs: list[dict], changed=(), rebuild: bool = False):
+        # Drop rows that left the list, changed, or (rebuild) all of them
+        wanted = {d["filename"]: d for d in docs}
+        for filename, (row, doc) in list(self._rows.items()):
+            if rebuild or filename in changed or wanted.get(filename) != doc:
+                row.destroy()
+                del self._rows[filename]
 
         if not docs:
-            self._empty_label = ctk.CTkLabel(
-                self.recent_list,
-                text="No documents yet. Create your first invoice to see it here.",
-                font=ctk.CTkFont(size=12, slant="italic"),
-            )
-            self._empty_label.grid(row=0, column=0, padx=10, pady=10, sticky="w")
+            if self._empty_label is None:
+                self._empty_label = ctk.CTkLabel(
+                    self.recent_list,
+                    text="No documents yet. Create your first invoice to see it here.",
+                    font=ctk.CTkFont(size=12, slant="italic"),
+                )
+                self._empty_label.grid(row=0, column=0, padx=10, pady=10, sticky="w")
             return
+        if self._empty_label is not None:
+            self._empty_label.destroy()
+            self._empty_label = None
 
-        # Re-build rows
+        # Build missing rows, then put every row in list order
         for row_index, doc in enumerate(docs):
-            row = ctk.CTkFrame(self.recent_list)
+            if doc["filename"] not in self._rows:
+                self._rows[doc["filename"]] = (self._build_row(doc), doc)
+            row = self._rows[doc["filename"]][0]
             row.grid(row=row_index, column=0, sticky="ew", padx=0, pady=4)
-            row.grid_columnconfigure(0, weight=1)
-            row.grid_columnconfigure(1, weight=0)
 
-            title = f"{doc.get('client_name', 'Unknown client')}"
+    def _build_row(self, doc: dict) -> ctk.CTkFrame:
+        row = ctk.CTkFrame(self.recent_list)
+        row.grid_columnconfigure(0, weight=1)
+        row.grid_columnconfigure(1, weight=0)
 
-            doc_type = doc.get("doc_type", "invoice").capitalize()
-            date_str = doc.get("date") or ""
-            total = doc.get("total")
+        title = f"{doc.get('client_name', 'Unknown client')}"
 
-            # Left text: client + meta
-            main_label = ctk.CTkLabel(
-                row,
-                justify="left",
-                text=f"{title}\n{doc_type} • {date_str}",
-            )
-            main_label.grid(row=0, column=0, sticky="w", padx=10, pady=6)
-
-            # Right side: amount + open button
-            right_frame = ctk.CTkFrame(row, fg_color="transparent")
-            right_frame.grid(row=0, column=1, sticky="e", padx=10, pady=6)
-            right_frame.grid_columnconfigure(0, weight=0)
-            right_frame.grid_columnconfigure(1, weight=0)
-
-            if total is not None:
-                amount_label = ctk.CTkLabel(
-                    right_frame,
-                    text=f"${total:,.2f}",
-                    font=ctk.CTkFont(size=13, weight="bold"),
-                )
-                amount_label.grid(row=0, column=0, sticky="e", padx=(0, 8))
+        doc_type = doc.get("doc_type", "invoice").capitalize()
+        date_str = doc.get("date") or ""
+        total = doc.get("total")
+
+        # Left text: client + meta
+        main_label = ctk.CTkLabel(
+            row,
+            justify="left",
+            text=f"{title}\n{doc_type} • {date_str}",
+        )
+        main_label.grid(row=0, column=0, sticky="w", padx=10, pady=6)
+
+        # Right side: amount + open button
+        right_frame = ctk.CTkFrame(row, fg_color="transparent")
+        right_frame.grid(row=0, column=1, sticky="e", padx=10, pady=6)
+        right_frame.grid_columnconfigure(0, weight=0)
+        right_frame.grid_columnconfigure(1, weight=0)
 
-            # Use filename so we can build the exact path in _open_document
-            open_btn = ctk.CTkButton(
+        if total is not None:
+            amount_label = ctk.CTkLabel(
                 right_frame,
-                text="Open",
-                width=70,
-                command=lambda filename=doc["filename"]: self._open_document(filename),
+                text=f"${total:,.2f}",
+                font=ctk.CTkFont(size=13, weight="bold"),
             )
-            open_btn.grid(row=0, column=1, sticky="e")
+            amount_label.grid(row=0, column=0, sticky="e", padx=(0, 8))
+
+        # Use filename so we can build the exact path in _open_document
+        open_btn = ctk.CTkButton(
+            right_frame,
+            text="Open",
+            width=70,
+            command=lambda filename=doc["filename"]: self._open_document(filename),
+        )
+        open_btn.grid(row=0, column=1, sticky="e")
+        return row
 
     def _open_document(self, filename: str):
         """
@@ -7,9 +7,16 @@ import sys
 import subprocess
 
 from invoicemint.services.storage import (
-    list_drafts, load_draft, delete_draft, rename_draft, save_draft
+    list_drafts, load_draft, delete_draft, rename_draft, save_draft,
+    list_revisions, restore_revision, search_documents,
 )
 
+SEARCH_DELAY_MS = 250   # wait for typing to pause before searching
+SEARCH_LIMIT = 200
+# Building a row per draft is the slow part with years of documents; show
+# the newest MAX_ROWS (or best matches) and say how many more there are.
+MAX_ROWS = 200
+
 
 class DraftsHistory(ctk.CTkFrame):
     def __init__(self, parent, on_open_state=None):
@@ -19,6 +26,11 @@ class DraftsHistory(ctk.CTkFrame):
         """
         super().__init__(parent, corner_radius=12)
         self.on_open_state = on_open_state
+        self._entries: dict[str, dict] = {}       # draft name -> list entry, newest first
+        self._rows: dict[str, ctk.CTkFrame] = {}  # draft name -> row, for shown drafts only
+        self._empty_label = None
+        self._more_label = None
+        self._search_job = None
         self._build()
         self.refresh()
 
@@ -59,10 +71,24 @@ class DraftsHistory(ctk.CTkFrame):
             text="Drafts / History",
             font=("Segoe UI", 16, "bold"),
         ).pack(side="left", padx=10, pady=10)
-        ctk.CTkButton(header, text="Refresh", command=self.refresh).pack(
+        ctk.CTkButton(header, text="Refresh", command=self._rescan).pack(
             side="right", padx=10, pady=10
         )
 
+        # Full-text search: numbers, clients, line items, notes
+        self.search_entry = search = ctk.CTkEntry(
+            header,
+            placeholder_text="Search invoices and quotes…",
+            width=280,
+        )
+        search.pack(side="right", padx=(10, 0), pady=10)
+        search.bind("<KeyRelease>", lambda _e: self._schedule_search())
+        search.bind("<Escape>", lambda _e: self._clear_search())
+        self.search_status = ctk.CTkLabel(
+            header, text="", text_color=("#6b7280", "#9ca3af")
+        )
+        self.search_status.pack(side="right", padx=6)
+
         # table header
         th = ctk.CTkFrame(self, corner_radius=10)
         th.pack(fill="x", padx=12, pady=(0, 4))
@@ -78,106 +104,192 @@ class DraftsHistory(ctk.CTkFrame):
         self.table = ctk.CTkScrollableFrame(self, corner_radius=12, height=460)
         self.table.pack(fill="both", expand=True, padx=12, pady=(0, 12))
 
-    def refresh(self):
-        for child in self.table.winfo_children():
-            child.destroy()
+    def _rescan(self):
+        """Refresh button: also pick up drafts changed outside the app."""
+        self.refresh(rescan=True)
+        if self.search_entry.get().strip():
+            self._apply_search(rescan=True)
+
+    # ---------- search ----------
+    def _schedule_search(self):
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+        self._search_job = self.after(SEARCH_DELAY_MS, self._apply_search)
+
+    def _clear_search(self):
+        self.search_entry.delete(0, "end")
+        self._apply_search()
+
+    def _apply_search(self, rescan: bool = False):
+        """Show only the drafts matching the search box, best match first."""
+        self._search_job = None
+        query = self.search_entry.get().strip()
+        if not query:
+            self.search_status.configure(text="")
+            self._show(list(self._entries))
+            return
+        hits = search_documents(query, limit=SEARCH_LIMIT, rescan=rescan)
+        order = [h["name"] for h in hits if h["name"] in self._entries]
+        self.search_status.configure(
+            text=f"{len(order)} match" + ("" if len(order) == 1 else "es")
+        )
+        self._show(order)
 
-        drafts = sorted(list_drafts(), key=lambda d: d.get("mtime", 0), reverse=True)
-        if not drafts:
-            ctk.CTkLabel(
+    def _show(self, names: list[str]):
+        """
+        Pack the rows of the first MAX_ROWS names in order, building missing
+        rows and destroying ones that are no longer shown.
+        """
+        shown = names[:MAX_ROWS]
+        keep = set(shown)
+        for name in list(self._rows):
+            if name in keep:
+                self._rows[name].pack_forget()
+            else:
+                self._rows.pop(name).destroy()
+        if self._more_label is not None:
+            self._more_label.destroy()
+            self._more_label = None
+        for name in shown:
+            row = self._rows.get(name)
+            if row is None:
+                row = self._rows[name] = self._build_row(self._entries[name])
+            row.pack(fill="x", padx=6, pady=6)
+        hidden = len(names) - len(shown)
+        if hidden > 0:
+            self._more_label = ctk.CTkLabel(
                 self.table,
-                text="No drafts yet.",
+                text=f"…and {hidden:,} more. Search to find older documents.",
                 text_color=("#6b7280", "#9ca3af"),
-            ).pack(padx=16, pady=16)
-            return
+            )
+            self._more_label.pack(padx=10, pady=10)
+        self._update_empty_state(len(shown))
 
-        for d in drafts:
-            row = ctk.CTkFrame(self.table, corner_radius=8)
-            row.pack(fill="x", padx=6, pady=6)
+    def refresh(self, rescan: bool = False):
+        for row in self._rows.values():
+            row.destroy()
+        self._rows.clear()
 
-            name = d.get("name", "")
-            when = datetime.fromtimestamp(d.get("mtime", 0)).strftime("%Y-%m-%d %H:%M")
-            path = d.get("path", "")
-
-            # Load state to detect type + totals (best-effort; ignore errors)
-            doc_type = "Invoice"
-            try:
-                state = load_draft(path) or {}
-                doc_type = state.get("doc_type", "invoice").capitalize()
-            except Exception:
-                state = {}
-
-            # Name
-            ctk.CTkLabel(row, text=name, anchor="w").grid(
-                row=0, column=0, padx=10, pady=10, sticky="w"
-            )
+        drafts = sorted(list_drafts(rescan=rescan), key=lambda d: d.get("mtime", 0), reverse=True)
+        self._entries = {d.get("name", ""): d for d in drafts}
+        self._apply_search()
 
-            # Type (Invoice / Quote)
-            type_color = ("#6b7280", "#9ca3af")
-            if doc_type.lower() == "quote":
-                type_color = ("#0f766e", "#34d399")  # a bit more prominent for quotes
-            ctk.CTkLabel(
-                row,
-                text=doc_type,
-                text_color=type_color,
-            ).grid(row=0, column=1, padx=10, pady=10, sticky="w")
-
-            # Modified timestamp
-            ctk.CTkLabel(
-                row,
-                text=when,
+    def apply_draft_changes(self, changes: dict):
+        """
+        Patch just the affected rows. changes: name -> list_drafts() entry,
+        or None when the draft is gone (see storage.sync_drafts).
+        """
+        for name, entry in changes.items():
+            old = self._rows.pop(name, None)
+            if old is not None:
+                old.destroy()
+            self._entries.pop(name, None)
+            if entry is not None:
+                # added or just modified: newest first, so it goes on top
+                self._entries = {name: entry, **self._entries}
+        self._apply_search()
+
+    def _update_empty_state(self, shown: int):
+        if self._empty_label is not None:
+            self._empty_label.destroy()
+            self._empty_label = None
+        if not shown:
+            self._empty_label = ctk.CTkLabel(
+                self.table,
+                text="No matching documents." if self._entries else "No drafts yet.",
                 text_color=("#6b7280", "#9ca3af"),
-            ).grid(row=0, column=2, padx=10, pady=10, sticky="w")
-
-            # Actions
-            btns = ctk.CTkFrame(row, fg_color="transparent")
-            btns.grid(row=0, column=3, padx=8, pady=8, sticky="e")
+            )
+            self._empty_label.pack(padx=16, pady=16)
 
-            # Open
-            ctk.CTkButton(
-                btns,
-                text="Open",
-                width=72,
-                command=lambda p=path: self._open_draft(p),
-            ).pack(side="left", padx=4)
+    def _build_row(self, d: dict) -> ctk.CTkFrame:
+        row = ctk.CTkFrame(self.table, corner_radius=8)
+        name = d.get("name", "")
+        when = datetime.fromtimestamp(d.get("mtime", 0)).strftime("%Y-%m-%d %H:%M")
+        path = d.get("path", "")
 
-            # For quotes, offer "Convert to Invoice"
-            if doc_type.lower() == "quote":
-                ctk.CTkButton(
-                    btns,
-                    text="Convert to Invoice",
-                    width=140,
-                    command=lambda p=path: self._convert_quote_to_invoice(p),
-                ).pack(side="left", padx=4)
+        # Type comes from the drafts index; no need to load the draft
+        doc_type = str(d.get("doc_type") or "invoice").capitalize()
 
-            # Rename
-            ctk.CTkButton(
-                btns,
-                text="Rename",
-                width=72,
-                command=lambda p=path: self._rename(p),
-            ).pack(side="left", padx=4)
+        # Name
+        ctk.CTkLabel(row, text=name, anchor="w").grid(
+            row=0, column=0, padx=10, pady=10, sticky="w"
+        )
 
-            # Delete
-            ctk.CTkButton(
-                btns,
-                text="Delete",
-                width=72,
-                fg_color="#b91c1c",
-                command=lambda p=path: self._delete(p),
-            ).pack(side="left", padx=4)
+        # Type (Invoice / Quote)
+        type_color = ("#6b7280", "#9ca3af")
+        if doc_type.lower() == "quote":
+            type_color = ("#0f766e", "#34d399")  # a bit more prominent for quotes
+        ctk.CTkLabel(
+            row,
+            text=doc_type,
+            text_color=type_color,
+        ).grid(row=0, column=1, padx=10, pady=10, sticky="w")
 
-            # Reveal in file system
+        # Modified timestamp
+        ctk.CTkLabel(
+            row,
+            text=when,
+            text_color=("#6b7280", "#9ca3af"),
+        ).grid(row=0, column=2, padx=10, pady=10, sticky="w")
+
+        # Actions
+        btns = ctk.CTkFrame(row, fg_color="transparent")
+        btns.grid(row=0, column=3, padx=8, pady=8, sticky="e")
+
+        # Open
+        ctk.CTkButton(
+            btns,
+            text="Open",
+            width=72,
+            command=lambda p=path: self._open_draft(p),
+        ).pack(side="left", padx=4)
+
+        # For quotes, offer "Convert to Invoice"
+        if doc_type.lower() == "quote":
             ctk.CTkButton(
                 btns,
-                text="Reveal",
-                width=72,
-                command=lambda p=path: self._reveal_in_fs(p),
+                text="Convert to Invoice",
+                width=140,
+                command=lambda p=path: self._convert_quote_to_invoice(p),
             ).pack(side="left", padx=4)
 
-            for i, w in enumerate([220, 80, 160, 260]):
-                row.grid_columnconfigure(i, minsize=w)
-            row.grid_columnconfigure(0, weight=1)
+        # Rename
+        ctk.CTkButton(
+            btns,
+            text="Rename",
+            width=72,
+            command=lambda p=path: self._rename(p),
+        ).pack(side="left", padx=4)
+
+        # Revision history
+        ctk.CTkButton(
+            btns,
+            text="Revisions",
+            width=80,
+            command=lambda p=path: self._show_revisions(p),
+        ).pack(side="left", padx=4)
+
+        # Delete
+        ctk.CTkButton(
+            btns,
+            text="Delete",
+            width=72,
+            fg_color="#b91c1c",
+            command=lambda p=path: self._delete(p),
+        ).pack(side="left", padx=4)
+
+        # Reveal in file system
+        ctk.CTkButton(
+            btns,
+            text="Reveal",
+            width=72,
+            command=lambda p=path: self._reveal_in_fs(p),
+        ).pack(side="left", padx=4)
+
+        for i, w in enumerate([220, 80, 160, 260]):
+            row.grid_columnconfigure(i, minsize=w)
+        row.grid_columnconfigure(0, weight=1)
+        return row
 
     # ---------- actions ----------
     def _open_draft(self, path):
@@ -254,6 +366,51 @@ class DraftsHistory(ctk.CTkFrame):
         toast.after(1200, toast.destroy)
         self.refresh()
 
+    def _show_revisions(self, path):
+        revs = list_revisions(path)
+        win = ctk.CTkToplevel(self)
+        win.title(f"Revisions - {Path(path).name}")
+        self._center_and_modal(win, 460, 360)
+
+        frame = ctk.CTkScrollableFrame(win)
+        frame.pack(fill="both", expand=True, padx=12, pady=12)
+        if not revs:
+            ctk.CTkLabel(frame, text="No revisions recorded yet.").pack(padx=16, pady=16)
+            return
+
+        latest = revs[-1]["rev"]
+        for r in reversed(revs):
+            row = ctk.CTkFrame(frame, corner_radius=8)
+            row.pack(fill="x", padx=4, pady=4)
+            when = (r.get("at") or "").replace("T", " ")
+            if r["kind"] == "delta":
+                detail = f"{r['changes']} change(s)"
+            else:
+                detail = "full copy"
+            if r["rev"] == latest:
+                detail += " · current"
+            ctk.CTkLabel(row, text=f"#{r['rev']}  {when}", anchor="w").pack(
+                side="left", padx=10, pady=8
+            )
+            ctk.CTkLabel(row, text=detail, text_color=("#6b7280", "#9ca3af")).pack(
+                side="left", padx=6
+            )
+            if r["rev"] != latest:
+                ctk.CTkButton(
+                    row,
+                    text="Restore",
+                    width=72,
+                    command=lambda n=r["rev"]: self._restore_revision(win, path, n),
+                ).pack(side="right", padx=8, pady=6)
+
+    def _restore_revision(self, win, path, rev):
+        try:
+            restore_revision(path, rev)
+        except Exception:
+            return
+        win.destroy()
+        self.refresh()
+
     def _delete(self, path):
         confirm = ctk.CTkInputDialog(
             title="Delete Draft",
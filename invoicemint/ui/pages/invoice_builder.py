@@ -10,8 +10,11 @@ import tempfile
 import subprocess
 
 from invoicemint.services.storage import (
-    save_draft, load_draft, list_drafts, load_settings, save_settings, load_clients,
+    save_draft, load_draft, list_drafts, get_settings, load_settings,
+    load_clients, get_client_index,
+    next_document_number, allocate_document_numbers, claim_document_number,
 )
+from invoicemint.services.models import Client, Document, LineItem, Totals
 from invoicemint.services.pdf import generate_invoice_pdf
 
 # column widths (header == rows)
@@ -24,6 +27,7 @@ COL_TOTAL   = 100
 COL_REMOVE  = 50
 
 TERMS_OPTIONS = ["Due on receipt", "Net 7", "Net 14", "Net 30"]
+SUGGEST_LIMIT = 8  # best client matches offered in the search popup
 
 
 def _today_str():
@@ -88,20 +92,32 @@ class InvoiceBuilder(ctk.CTkFrame):
     # INDEPENDENT NUMBER SEQUENCES
     # ------------------------------------------------------------------
     def _init_invoice_number(self):
-        settings = load_settings() or {}
-        if self.doc_type == "quote":
-            seq = int(settings.get("quote_seq", 1000))
-        else:
-            seq = int(settings.get("invoice_seq", 1000))
-        self.inv_no_var.set(str(seq))
+        # Only a preview: the number is allocated once the PDF is written
+        # (see _reserve_number), so two windows can't both use it.
+        self._fresh_number = str(next_document_number(self.doc_type))
+        self.inv_no_var.set(self._fresh_number)
 
     def _next_invoice_number(self):
         try:
             return str(int(self.inv_no_var.get().strip() or "0") + 1)
         except Exception:
-            settings = load_settings() or {}
-            key = "quote_seq" if self.doc_type == "quote" else "invoice_seq"
-            return str(int(settings.get(key, 1000)) + 1)
+            return str(next_document_number(self.doc_type))
+
+    def _reserve_number(self, doc: Document) -> str:
+        """
+        Number doc's exported PDF keeps. Called only after the PDF is written,
+        so a failed export takes no number. A previewed number is allocated
+        now and may come back higher if another window took it meanwhile. A
+        number typed in or loaded with a draft is claimed as is.
+        """
+        number = (doc.number or "").strip()
+        if number and number == self._fresh_number:
+            return str(allocate_document_numbers(doc.doc_type)[0])
+        try:
+            claim_document_number(doc.doc_type, int(number))
+        except ValueError:
+            pass
+        return number
 
     # ------------------------------------------------------------------
     # CLIENT SEARCH HELPERS
@@ -109,18 +125,6 @@ class InvoiceBuilder(ctk.CTkFrame):
     def _client_display(self, c: dict) -> str:
         return c.get("business") or c.get("name") or c.get("email", "Unnamed")
 
-    def _client_matches(self, c: dict, q: str) -> bool:
-        if not q:
-            return True
-        q = q.lower().strip()
-        return (
-            q in str(c.get("business", "") or "").lower()
-            or q in str(c.get("name", "") or "").lower()
-            or q in str(c.get("email", "") or "").lower()
-            or q in str(c.get("address", "") or "").lower()
-            or q in str(c.get("phone", "") or "").lower()
-        )
-
     # ------------------------------------------------------------------
     # AUTOCOMPLETE DROPDOWN (REAL POPUP)
     # ------------------------------------------------------------------
@@ -231,7 +235,7 @@ class InvoiceBuilder(ctk.CTkFrame):
             self._hide_suggest()
             return
 
-        matches = [c for c in (self.clients or []) if self._client_matches(c, q)]
+        matches = get_client_index().rank_clients(q, k=SUGGEST_LIMIT)
         if not matches:
             self._hide_suggest()
             return
@@ -435,7 +439,7 @@ class InvoiceBuilder(ctk.CTkFrame):
         self.notes_text = ctk.CTkTextbox(notes, height=70)
         self.notes_text.pack(fill="x", padx=10, pady=(4, 8))
 
-        s = load_settings() or {}
+        s = get_settings() or {}
         default_notes = s.get(
             "default_notes",
             "Thank you for your business!\nPayment is due in 14 days.",
@@ -598,12 +602,12 @@ class InvoiceBuilder(ctk.CTkFrame):
         self.rows.append(tup)
 
         if preset:
-            e_service.insert(0, preset.get("service", ""))
+            e_service.insert(0, preset.service)
             t_desc.delete("1.0", "end")
-            t_desc.insert("1.0", preset.get("description", ""))
-            e_qty.insert(0, str(preset.get("qty", 0)))
-            e_price.insert(0, str(preset.get("unit_price", 0)))
-            e_tax.insert(0, str(preset.get("tax_pct", 0)))
+            t_desc.insert("1.0", preset.description)
+            e_qty.insert(0, str(preset.qty))
+            e_price.insert(0, str(preset.unit_price))
+            e_tax.insert(0, str(preset.tax_pct))
         self.recompute()
 
     # ------------------------------------------------------------------
@@ -643,63 +647,46 @@ class InvoiceBuilder(ctk.CTkFrame):
         base["phone"] = self.client_vars["phone"].get().strip()
         return base
 
-    def get_state(self) -> dict:
-        items = []
-        for _, e_service, t_desc, qty, price, tax, _ in self.rows:
-            items.append(
-                {
-                    "service": e_service.get(),
-                    "description": t_desc.get("1.0", "end").rstrip("\n"),
-                    "qty": float(qty.get() or 0),
-                    "unit_price": float(price.get() or 0),
-                    "tax_pct": float(tax.get() or 0),
-                }
+    def get_document(self) -> Document:
+        items = [
+            LineItem(
+                service=e_service.get(),
+                description=t_desc.get("1.0", "end").rstrip("\n"),
+                qty=float(qty.get() or 0),
+                unit_price=float(price.get() or 0),
+                tax_pct=float(tax.get() or 0),
             )
+            for _, e_service, t_desc, qty, price, tax, _ in self.rows
+        ]
 
         raw_status = (self.status_var.get() or "").strip()
         status_value = "" if raw_status.lower() == "no watermark" else raw_status
 
-        totals = {
-            "subtotal": float(self.subtotal_var.get()),
-            "tax": float(self.tax_var.get()),
-            "grand_total": float(self.total_var.get()),
-        }
-
-        kind = "invoice" if self.doc_type == "invoice" else "quote"
-
-        state = {
-            "kind": kind,
-            "created_at": datetime.now().isoformat(timespec="seconds"),
-            "client": self._current_client_for_state(),
-            "meta": {
-                "number": self.inv_no_var.get().strip(),
-                "date": self.inv_date_var.get().strip(),
-                "due_date": self.due_date_var.get().strip(),
-                "terms": self.terms_var.get().strip(),
-                "status": status_value,
-            },
-            "items": items,
-            "totals": totals,
-            "notes": self.notes_text.get("1.0", "end").strip(),
-        }
-
-        if self.doc_type == "invoice" and self.converted_from_quote:
-            state["meta"]["converted_from_quote"] = self.converted_from_quote
-            state["converted_from_quote"] = self.converted_from_quote
-
-        state["doc_type"] = self.doc_type
-        state["date"] = state["meta"]["date"]
-        state["total_amount"] = totals["grand_total"]
-        state["status"] = status_value
-
-        return state
-
-    def set_state(self, state: dict):
-        dtype = state.get("doc_type")
-        if dtype not in ("invoice", "quote"):
-            kind = state.get("kind")
-            dtype = kind if kind in ("invoice", "quote") else "invoice"
-        self.doc_type = dtype
+        return Document(
+            doc_type=self.doc_type,
+            number=self.inv_no_var.get().strip(),
+            date=self.inv_date_var.get().strip(),
+            due_date=self.due_date_var.get().strip(),
+            terms=self.terms_var.get().strip(),
+            status=status_value,
+            client=Client.from_dict(self._current_client_for_state()),
+            items=items,
+            totals=Totals(
+                subtotal=float(self.subtotal_var.get()),
+                tax=float(self.tax_var.get()),
+                grand_total=float(self.total_var.get()),
+            ),
+            notes=self.notes_text.get("1.0", "end").strip(),
+            converted_from_quote=self.converted_from_quote or "",
+            created_at=datetime.now().isoformat(timespec="seconds"),
+        )
+
+    def get_state(self) -> dict:
+        return self.get_document().to_state()
+
+    def set_state(self, state: dict | Document):
+        doc = state if isinstance(state, Document) else Document.from_state(state)
+        self.doc_type = doc.doc_type
 
         if self.meta_type_label is not None:
             self.meta_type_label.configure(text=("Quote #" if self.doc_type == "quote" else "Invoice #"))
@@ -712,29 +699,25 @@ class InvoiceBuilder(ctk.CTkFrame):
                 if self.convert_btn.winfo_manager():
                     self.convert_btn.pack_forget()
 
-        meta = state.get("meta") or {}
-        if "number" in meta:
-            self.inv_no_var.set(str(meta["number"]))
-        if "date" in meta:
-            self.inv_date_var.set(meta["date"])
-        if "due_date" in meta:
-            self.due_date_var.set(meta["due_date"])
-        if "terms" in meta and meta["terms"] in TERMS_OPTIONS:
-            self.terms_var.set(meta["terms"])
-
-        self.converted_from_quote = (
-            meta.get("converted_from_quote")
-            or state.get("converted_from_quote")
-            or None
-        )
+        # partial states (imports, templates) keep what the form already has
+        if doc.number:
+            self.inv_no_var.set(doc.number)
+            self._fresh_number = None  # a saved number, not a preview
+        if doc.date:
+            self.inv_date_var.set(doc.date)
+        if doc.due_date:
+            self.due_date_var.set(doc.due_date)
+        if doc.terms in TERMS_OPTIONS:
+            self.terms_var.set(doc.terms)
 
-        stored_status = (meta.get("status") or "").strip()
-        self.status_var.set("No watermark" if not stored_status else stored_status)
+        self.converted_from_quote = doc.converted_from_quote or None
 
-        cli = state.get("client") or {}
-        self._apply_client_to_card(cli)
+        self.status_var.set(doc.status or "No watermark")
 
-        display = cli.get("business") or cli.get("name") or cli.get("email", "")
+        cli = doc.client
+        self._apply_client_to_card(cli.to_dict())
+
+        display = cli.display_name or cli.email
         if display and display in self.client_names:
             self.client_var.set(display)
         else:
@@ -746,7 +729,7 @@ class InvoiceBuilder(ctk.CTkFrame):
         for tup in list(self.rows):
             tup[0].destroy()
         self.rows.clear()
-        for it in state.get("items", []):
+        for it in doc.items:
             self.add_row(preset=it)
         if not self.rows:
             self.add_row()
@@ -754,10 +737,10 @@ class InvoiceBuilder(ctk.CTkFrame):
 
         if hasattr(self, "notes_text"):
             self.notes_text.delete("1.0", "end")
-            if "notes" in state:
-                self.notes_text.insert("1.0", state.get("notes", ""))
+            if doc.notes is not None:
+                self.notes_text.insert("1.0", doc.notes)
             else:
-                s = load_settings() or {}
+                s = get_settings() or {}
                 default_notes = s.get(
                     "default_notes",
                     "Thank you for your business!\nPayment is due in 14 days.",
@@ -773,8 +756,7 @@ class InvoiceBuilder(ctk.CTkFrame):
 
         original_quote_no = (self.inv_no_var.get() or "").strip() or None
 
-        settings = load_settings() or {}
-        base_seq = int(settings.get("invoice_seq", 1000))
+        base_seq = next_document_number("invoice")
 
         try:
             current_num = int(self.inv_no_var.get() or "0")
@@ -784,6 +766,7 @@ class InvoiceBuilder(ctk.CTkFrame):
         new_num = max(base_seq, current_num)
         if new_num <= 0:
             new_num = base_seq
+        self._fresh_number = str(new_num) if new_num == base_seq else None
 
         self.doc_type = "invoice"
         self.inv_no_var.set(str(new_num))
@@ -886,26 +869,24 @@ class InvoiceBuilder(ctk.CTkFrame):
     # PDF PREVIEW / EXPORT
     # ------------------------------------------------------------------
     def on_preview_pdf(self):
-        state = self.get_state()
-        settings = load_settings() or {}
+        doc = self.get_document()
+        settings = get_settings() or {}
 
-        tmp = tempfile.NamedTemporaryFile(
+        # the viewer needs a file, but reportlab writes straight into the
+        # open handle: no close and reopen by path
+        with tempfile.NamedTemporaryFile(
             prefix="InvoiceMint-preview-",
             suffix=".pdf",
             delete=False,
-        )
-        tmp_path = tmp.name
-        tmp.close()
-
-        generate_invoice_pdf(state, settings, tmp_path)
-        self._open_file(tmp_path)
+        ) as tmp:
+            generate_invoice_pdf(doc, settings, tmp)
+        self._open_file(tmp.name)
 
     def on_export_pdf(self):
-        state = self.get_state()
+        doc = self.get_document()
         settings = load_settings() or {}
-        prefix = "Quote" if state.get("doc_type") == "quote" else "Invoice"
         default_name = (
-            f"{prefix}-{state['meta']['number'] or datetime.now().strftime('%Y%m%d-%H%M%S')}.pdf"
+            f"{doc.title}-{doc.number or datetime.now().strftime('%Y%m%d-%H%M%S')}.pdf"
         )
         path = filedialog.asksaveasfilename(
             title="Export PDF",
@@ -916,25 +897,21 @@ class InvoiceBuilder(ctk.CTkFrame):
         if not path:
             return
 
-        generate_invoice_pdf(state, settings, path)
+        if doc.number and doc.number == self._fresh_number:
+            # catch up with numbers other windows took since the preview
+            self._init_invoice_number()
+            doc = self.get_document()
 
-        doc_type = state.get("doc_type", "invoice")
-        try:
-            num = int(state["meta"]["number"] or "0")
-        except Exception:
-            num = 0
+        generate_invoice_pdf(doc, settings, path)
 
-        if doc_type == "invoice":
-            base = int(settings.get("invoice_seq", 1000))
-            next_seq = max(base, num) + 1
-            settings["invoice_seq"] = next_seq
-        else:
-            base = int(settings.get("quote_seq", 1000))
-            next_seq = max(base, num) + 1
-            settings["quote_seq"] = next_seq
+        number = self._reserve_number(doc)
+        if number != doc.number:
+            # lost a race for the previewed number: write it under the new one
+            self.inv_no_var.set(number)
+            doc = self.get_document()
+            generate_invoice_pdf(doc, settings, path)
 
-        save_settings(settings)
-        self.inv_no_var.set(str(next_seq))
+        self._init_invoice_number()
 
         toast = ctk.CTkToplevel(self)
         toast.title("Exported")
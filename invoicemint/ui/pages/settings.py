@@ -3,7 +3,9 @@ import customtkinter as ctk
 import tkinter as tk
 from tkinter import filedialog
 
-from invoicemint.services.storage import load_settings, save_settings
+from invoicemint.services.storage import (
+    load_settings, save_settings, next_document_number, set_next_document_number,
+)
 
 
 class SettingsPage(ctk.CTkFrame):
@@ -27,13 +29,14 @@ class SettingsPage(ctk.CTkFrame):
             value=self.pdf_cfg.get("template", "Minimal")
         )
 
-        # New: separate sequences for invoices and quotes
-        self.invoice_seq_var = tk.StringVar(
-            value=str(self.settings.get("invoice_seq", 1000))
-        )
-        self.quote_seq_var = tk.StringVar(
-            value=str(self.settings.get("quote_seq", 1000))
-        )
+        # Separate sequences for invoices and quotes (kept by the number
+        # allocator, not in settings.json)
+        self._seq_shown = {
+            "invoice": next_document_number("invoice"),
+            "quote": next_document_number("quote"),
+        }
+        self.invoice_seq_var = tk.StringVar(value=str(self._seq_shown["invoice"]))
+        self.quote_seq_var = tk.StringVar(value=str(self._seq_shown["quote"]))
 
         self.default_notes_text = None  # will be CTkTextbox
 
@@ -252,23 +255,21 @@ class SettingsPage(ctk.CTkFrame):
             self.default_notes_text.get("1.0", "end").rstrip("\n")
         )
 
-        # parse sequences safely
-        try:
-            invoice_seq = int(self.invoice_seq_var.get() or "0")
-        except ValueError:
-            invoice_seq = int(self.settings.get("invoice_seq", 1000))
-
-        try:
-            quote_seq = int(self.quote_seq_var.get() or "0")
-        except ValueError:
-            quote_seq = int(self.settings.get("quote_seq", 1000))
+        # Restart a sequence only if the user edited it here, so numbers
+        # handed out by another window meanwhile aren't rolled back
+        for doc_type, var in (("invoice", self.invoice_seq_var), ("quote", self.quote_seq_var)):
+            try:
+                seq = int(var.get() or "0")
+            except ValueError:
+                continue
+            if seq > 0 and seq != self._seq_shown[doc_type]:
+                set_next_document_number(doc_type, seq)
+                self._seq_shown[doc_type] = seq
 
         # update settings dict
         self.settings["company"] = self.company
         self.settings["pdf"] = self.pdf_cfg
         self.settings["default_notes"] = default_notes
-        self.settings["invoice_seq"] = invoice_seq
-        self.settings["quote_seq"] = quote_seq
 
         save_settings(self.settings)
 
@@ -0,0 +1,38 @@
+# tests/conftest.py
+"""
+Shared fixtures. storage.py puts its files under ~/.invoicemint when it is
+imported, so every test gets a scratch HOME and a freshly imported module.
+"""
+import importlib
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("USERPROFILE", str(tmp_path))
+    from invoicemint.services import storage as module
+
+    module = importlib.reload(module)
+    yield module
+    module._flush_on_exit()
+    if module._search_index is not None:
+        module._search_index.close()
+
+
+def make_doc(number: str, date: str = "2025-06-01", client: str = "Acme Ltd",
+             price: float = 100.0) -> dict:
+    """A minimal one-line invoice draft."""
+    return {
+        "doc_type": "invoice",
+        "meta": {"number": number, "date": date, "due_date": date, "status": "UNPAID"},
+        "client": {"name": client},
+        "items": [{"service": "Consulting", "description": "", "qty": 1,
+                   "unit_price": price, "tax_pct": 0}],
+        "notes": "",
+    }
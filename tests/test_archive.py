@@ -0,0 +1,60 @@
+# tests/test_archive.py
+from conftest import make_doc
+
+
+def _archive_old(storage):
+    storage.save_draft(make_doc("1000", date="2020-01-05"), "old")
+    storage.save_draft(make_doc("1001", date="2025-06-01"), "new")
+    storage.flush_pending_writes()
+    report = storage.archive_drafts("2021-01-01")
+    assert report.documents == 1
+    assert not storage._layout.locate("old.json").exists()
+
+
+def test_archived_documents_are_listed(storage):
+    _archive_old(storage)
+    listed = {e["name"]: e for e in storage.list_drafts()}
+    assert set(listed) == {"old.json", "new.json"}
+    assert listed["old.json"]["archived"] is True
+    assert storage.load_draft(listed["old.json"]["path"])["meta"]["number"] == "1000"
+    assert {e["name"] for e in storage.list_drafts(archived=False)} == {"new.json"}
+
+
+def test_delete_after_archive_and_resave(storage):
+    _archive_old(storage)
+    rollups = storage.get_report_rollups()
+    storage.save_draft(make_doc("2000", date="2025-07-01"), "old")
+    storage.flush_pending_writes()
+    assert storage.load_draft("old")["meta"]["number"] == "2000"
+
+    assert storage.delete_draft("old") is True
+    assert storage.load_draft("old") == {}
+    assert "old.json" not in {e["name"] for e in storage.list_drafts()}
+    assert rollups.total().count == 1
+    assert storage.get_report_rollups(rescan=True).total().count == 1
+
+
+def test_delete_archive_only_document(storage):
+    _archive_old(storage)
+    assert storage.delete_draft("old") is True
+    assert storage.load_draft("old") == {}
+    assert storage.delete_draft("old") is False
+    assert [e["name"] for e in storage.list_drafts()] == ["new.json"]
+
+
+def test_rename_archive_only_document(storage):
+    _archive_old(storage)
+    dest = storage.rename_draft("old", "renamed")
+    assert dest is not None and dest.exists()
+    assert storage.load_draft("renamed")["meta"]["number"] == "1000"
+    assert storage.load_draft("old") == {}
+    assert {e["name"] for e in storage.list_drafts()} == {"new.json", "renamed.json"}
+
+
+def test_deleted_name_can_be_archived_again(storage):
+    _archive_old(storage)
+    storage.delete_draft("old")
+    storage.save_draft(make_doc("3000", date="2020-02-01"), "old")
+    storage.flush_pending_writes()
+    storage.archive_drafts("2021-01-01")
+    assert storage.load_draft("old")["meta"]["number"] == "3000"
@@ -0,0 +1,49 @@
+# tests/test_client_index.py
+import random
+
+from invoicemint.services.client_index import ClientIndex, haystack, is_short, normalize, words
+
+CLIENTS = [
+    {"name": "Acme Inc.", "email": "billing@acme.example"},
+    {"name": "Smith, John", "phone": "+1 (555) 010-2000"},
+    {"name": "Major Tom", "business": "Ground Control Ltd."},
+    {"name": "Jo O'Neil", "address": "12 High St., Dublin"},
+    {"business": "Über-Café GmbH", "email": "info@ueber.example"},
+]
+
+
+def naive(clients, query):
+    """The old linear scan (plus the word-start rule for short queries)."""
+    q = normalize(query).strip()
+    out = []
+    for i, c in enumerate(clients):
+        text = haystack(c)
+        if not q:
+            out.append(i)
+        elif is_short(q):
+            if any(w.startswith(q) for w in words(text)):
+                out.append(i)
+        elif q in text:
+            out.append(i)
+    return out
+
+
+def test_punctuated_queries():
+    index = ClientIndex(CLIENTS)
+    assert index.search_clients("nc.") == [CLIENTS[0]]
+    assert index.search_clients("th,") == [CLIENTS[1]]
+    assert index.search_clients("d.") == [CLIENTS[2]]
+    assert index.search_clients("jo") == [CLIENTS[1], CLIENTS[3]]
+
+
+def test_matches_naive_scan():
+    rng = random.Random(7)
+    index = ClientIndex(CLIENTS)
+    index.update(2, {"name": "Major Tom", "business": "Space Oddity, Inc."})
+    clients = list(CLIENTS)
+    clients[2] = index.get(2)
+    for _ in range(3000):
+        text = haystack(rng.choice(clients)).replace("\x1f", " ")
+        start = rng.randrange(len(text))
+        query = text[start:start + rng.randint(1, 8)] + rng.choice(["", ".", ",", "-", "@", " "])
+        assert index.search(query) == naive(clients, query), query
@@ -0,0 +1,26 @@
+# tests/test_client_io.py
+from invoicemint.services import client_io
+
+
+def test_vcard_round_trip_business_only(storage, tmp_path):
+    storage.add_client({"business": "Acme Ltd", "phone": "555"})
+    storage.add_client({"name": "Ada Lovelace", "business": "Engines", "email": "ada@example.com"})
+    path = tmp_path / "clients.vcf"
+    assert client_io.export_clients(path) == 2
+
+    read = [c for _line, c in client_io.iter_vcard(path)]
+    assert read[0] == {"business": "Acme Ltd", "phone": "555"}
+    assert read[1]["name"] == "Ada Lovelace"
+
+    report = client_io.import_clients(path, dry_run=True)
+    assert (report.added, report.existing) == (0, 2)
+    client_io.import_clients(path)
+    assert len(storage.load_clients()) == 2
+
+
+def test_vcard_person_with_empty_n_keeps_fn(tmp_path):
+    path = tmp_path / "card.vcf"
+    path.write_text("BEGIN:VCARD\r\nVERSION:3.0\r\nFN:Grace Hopper\r\nN:;;;;\r\n"
+                    "ORG:Navy\r\nEND:VCARD\r\n", encoding="utf-8")
+    [(_line, client)] = list(client_io.iter_vcard(path))
+    assert client == {"name": "Grace Hopper", "business": "Navy"}
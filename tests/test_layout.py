@@ -0,0 +1,38 @@
+# tests/test_layout.py
+import os
+
+from invoicemint.services.layout import SUPERSEDED_DIRNAME, DraftsLayout
+
+
+def _write(path, text, mtime):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, (mtime, mtime))
+
+
+def test_migrate_moves_flat_drafts(tmp_path):
+    layout = DraftsLayout(tmp_path)
+    _write(layout.legacy_path("a.json"), "{}", 1_000)
+    assert layout.migrate() == 1
+    assert layout.path("a.json").read_text() == "{}"
+    assert not layout.legacy_path("a.json").exists()
+
+
+def test_migrate_keeps_newer_flat_copy(tmp_path):
+    layout = DraftsLayout(tmp_path)
+    _write(layout.path("a.json"), '{"v": "shard"}', 1_000)
+    _write(layout.legacy_path("a.json"), '{"v": "flat"}', 2_000)
+    assert layout.migrate() == 1
+    assert layout.path("a.json").read_text() == '{"v": "flat"}'
+    assert (tmp_path / SUPERSEDED_DIRNAME / "a.json").read_text() == '{"v": "shard"}'
+    assert [e.name for e in layout.scan()] == ["a.json"]
+
+
+def test_migrate_sets_older_flat_copy_aside(tmp_path):
+    layout = DraftsLayout(tmp_path)
+    _write(layout.path("a.json"), '{"v": "shard"}', 2_000)
+    _write(layout.legacy_path("a.json"), '{"v": "flat"}', 1_000)
+    assert layout.migrate() == 0
+    assert layout.path("a.json").read_text() == '{"v": "shard"}'
+    assert not layout.legacy_path("a.json").exists()
+    assert (tmp_path / SUPERSEDED_DIRNAME / "a.json").read_text() == '{"v": "flat"}'
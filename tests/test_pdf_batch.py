@@ -0,0 +1,15 @@
+# tests/test_pdf_batch.py
+import pytest
+from conftest import make_doc
+
+from invoicemint.services.pdf import generate_invoice_pdfs
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_bad_state_fails_alone(tmp_path, workers):
+    results = generate_invoice_pdfs([make_doc("1001"), 5, make_doc("1002")], {},
+                                    tmp_path, workers=workers)
+    assert [r.ok for r in results] == [True, False, True]
+    assert results[1].source == "#2" and results[1].path is None
+    assert "AttributeError" in results[1].error
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["Invoice-1001.pdf", "Invoice-1002.pdf"]
@@ -0,0 +1,33 @@
+# tests/test_render.py
+import json
+
+from conftest import make_doc
+
+
+def test_unreadable_file_fails_the_run(storage, tmp_path, capsys):
+    from invoicemint import render
+
+    bad = tmp_path / "bad.json"
+    bad.write_text("{not json", encoding="utf-8")
+    good = tmp_path / "good.json"
+    good.write_text(json.dumps(make_doc("1001")), encoding="utf-8")
+    out = tmp_path / "out"
+
+    assert render.main(["-o", str(out), "-j", "1", str(bad), str(good)]) == 1
+    assert sorted(p.name for p in out.iterdir()) == ["good.pdf"]
+    captured = capsys.readouterr()
+    assert "failed: bad.json" in captured.err
+    assert "rendered 1 of 2" in captured.out
+
+
+def test_unreadable_draft_in_folder_fails_the_run(storage, tmp_path):
+    from invoicemint import render
+
+    folder = tmp_path / "drafts"
+    folder.mkdir()
+    (folder / "bad.json").write_text("[1, 2", encoding="utf-8")
+    (folder / "good.json").write_text(json.dumps(make_doc("1002")), encoding="utf-8")
+    out = tmp_path / "out"
+
+    assert render.main(["-o", str(out), "-j", "1", "-q", str(folder)]) == 1
+    assert sorted(p.name for p in out.iterdir()) == ["good.pdf"]
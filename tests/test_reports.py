@@ -0,0 +1,21 @@
+# tests/test_reports.py
+import importlib
+
+from conftest import make_doc
+
+
+def test_rollups_sync_in_background(storage):
+    for i in range(20):
+        storage.save_draft(make_doc(str(1000 + i), price=10.0), f"d{i}")
+    storage.flush_pending_writes()
+    storage._flush_on_exit()
+    storage = importlib.reload(storage)  # a fresh start: rollups not loaded yet
+
+    assert storage.report_rollups_if_ready() is None
+    storage.start_index_sync()
+    storage._index_sync_thread.join(timeout=30)
+    rollups = storage.report_rollups_if_ready()
+    assert rollups is not None
+    assert rollups.total().count == 20
+    assert rollups.get("doc_type", "invoice").grand_total == 200.0
+    assert [h["name"] for h in storage.search_documents("1007")] == ["d7.json"]
@@ -0,0 +1,42 @@
+# tests/test_storage.py
+from conftest import make_doc
+
+
+def _use_sqlite(storage):
+    settings = storage.load_settings()
+    settings["storage"] = {"backend": "sqlite"}
+    storage.save_settings(settings)
+    storage.flush_pending_writes()
+
+
+def test_sqlite_delete_ignores_leftover_json(storage):
+    storage.save_draft(make_doc("1000"), "old")
+    storage.flush_pending_writes()
+    _use_sqlite(storage)
+    assert storage.load_draft("old")["meta"]["number"] == "1000"  # imported once
+
+    assert storage.delete_draft("old") is True
+    assert storage.load_draft("old") == {}
+    assert storage.load_draft(storage._layout.path("old.json")) == {}
+
+
+def test_failed_delete_keeps_history_and_search(storage, monkeypatch):
+    storage.save_draft(make_doc("1000"), "a")
+    storage.save_draft(make_doc("1000", client="Globex"), "a")
+    storage.flush_pending_writes()
+    assert len(storage.list_revisions("a")) == 2
+
+    assert storage.delete_draft("typo") is False
+
+    def refuse(self, missing_ok=False):
+        raise PermissionError(self)
+
+    with monkeypatch.context() as m:
+        m.setattr(type(storage._layout.path("a.json")), "unlink", refuse)
+        assert storage.delete_draft("a") is False
+
+    assert len(storage.list_revisions("a")) == 2
+    assert [h["name"] for h in storage.search_documents("globex")] == ["a.json"]
+    assert storage.delete_draft("a") is True
+    assert storage.list_revisions("a") == []
+    assert storage.search_documents("globex") == []